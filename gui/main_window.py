@@ -1,7 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from translation_core.translator import Translator # Import Translator
-from utils.config_manager import save_api_key, load_api_key # Added for API key save/load
+from utils.config_manager import save_api_keys, load_api_keys, load_key_rate_limit # Added for API key save/load
+from llm_services.key_pool import parse_api_keys
 from utils.app_config_manager import save_app_settings, load_app_settings # For app settings
 from .model_selection_dialog import ModelSelectionDialog
 import os
@@ -53,7 +54,7 @@ class MainWindow:
         self.llm_combo_box.bind("<<ComboboxSelected>>", self._on_llm_provider_changed)
 
         # API key input
-        api_key_label = ttk.Label(left_frame, text="API Key:")
+        api_key_label = ttk.Label(left_frame, text="API Key(s):")  # Several keys are separated by commas
         api_key_label.grid(row=1, column=0, sticky=tk.W, pady=5)
         self.api_key_var = tk.StringVar()
         self.api_key_entry = ttk.Entry(left_frame, show="*", textvariable=self.api_key_var)
@@ -563,6 +564,12 @@ class MainWindow:
         else:
             self.translate_button.config(state=tk.DISABLED)
 
+    def _apply_key_rate_limit(self, llm_provider):
+        """Apply the saved per-key rate limit of the provider when several API keys are pooled"""
+        requests_per_minute = load_key_rate_limit(llm_provider)
+        if requests_per_minute and self.translator and self.translator.key_pool:
+            self._log_message(self.translator.set_key_rate_limit(requests_per_minute))
+
     def _log_message(self, message):
         """Log a message to the log area with timestamp"""
         import datetime
@@ -606,6 +613,7 @@ class MainWindow:
                 if llm_provider and api_key:
                     try:
                         self.translator = Translator(llm_provider_name=llm_provider, api_key=api_key)
+                        self._apply_key_rate_limit(llm_provider)
                         self._log_message(f"{llm_provider} service has been initialized.")
                     except Exception as e:
                         self._log_message(f"Error initializing translator: {e}")
@@ -665,7 +673,7 @@ class MainWindow:
     def _on_llm_provider_changed(self, event=None):
         """Handles LLM provider changes, loads API key, and updates the service."""
         provider = self.llm_var.get()
-        api_key = load_api_key(provider) # Load API key for the selected provider
+        api_key = ", ".join(load_api_keys(provider)) # Load API keys for the selected provider
         
         if api_key:
             self.api_key_var.set(api_key) # Set the API key in the entry field
@@ -688,8 +696,8 @@ class MainWindow:
     def _save_current_api_key(self):
         llm_provider = self.llm_var.get()
         api_key = self.api_key_var.get()
-        if llm_provider and api_key: # Only save if provider and key are present
-            save_api_key(llm_provider, api_key)
+        if llm_provider and parse_api_keys(api_key): # Only save if provider and key are present
+            save_api_keys(llm_provider, parse_api_keys(api_key))
             self._log_message(f"API key for {llm_provider} has been saved.")
         elif llm_provider and not api_key:
              self._log_message(f"API key for {llm_provider} is empty, not saved.")
@@ -724,6 +732,7 @@ class MainWindow:
                 return
             
             self.model_button.config(state=tk.NORMAL)
+            self._apply_key_rate_limit(llm_provider)
             self._log_message(f"{llm_provider} service has been initialized.")
 
             # Now that translator is initialized, try to load the last selected model for this provider
@@ -845,17 +854,8 @@ class MainWindow:
                 update_callback=update_translation_result  # Pass update callback
             )
             
-            # Check if translation contains error messages
-            error_keywords = ["Error:", "[CHUNK_ERROR:", "[CHUNK_EXCEPTION:", "500 Internal error"]
-            has_error = any(keyword in translated_content for keyword in error_keywords)
-            
-            if has_error:
-                # Extract actual translation content by removing error messages
-                lines = translated_content.split('\n')
-                cleaned_lines = [line for line in lines if not any(keyword in line for keyword in error_keywords)]
-                translated_content = '\n'.join(cleaned_lines)
-                
-                # Log the error but don't show in translation result
+            # Failed chunks keep their original text; errors are only reported in the log
+            if self.translator.last_job_metrics.get('failed_chunks'):
                 self._log_message("Warning: Some parts of the translation had errors. Check the log for details.")
             
             self.translated_content_for_export = translated_content
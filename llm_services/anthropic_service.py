@@ -1,5 +1,6 @@
 # Anthropic API integration will be implemented here 
 from .base_llm import BaseLLM
+from .errors import AuthError, classify_error
 import anthropic # Import actual Anthropic library
 import re # For version and date sorting
 
@@ -15,6 +16,9 @@ KNOWN_ANTHROPIC_MODELS = [
     "claude-instant-1.2"
 ]
 
+# Response headers reporting remaining requests and tokens
+RATE_LIMIT_HEADERS = ("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-tokens-remaining")
+
 def anthropic_model_sort_key(model_name):
     # Example: claude-3-opus-20240229, claude-3.5-sonnet-20240620
     # 1. Claude version (3.5 > 3 > 2 > 1)
@@ -43,6 +47,8 @@ def anthropic_model_sort_key(model_name):
     return (-version_major, -version_minor, size_priority, -int(date_str))
 
 class AnthropicService(BaseLLM):
+    supports_streaming = True
+
     def __init__(self, api_key):
         super().__init__(api_key)
         try:
@@ -70,45 +76,85 @@ class AnthropicService(BaseLLM):
             # In case of emergency, return unsorted list or minimal list
             return sorted(KNOWN_ANTHROPIC_MODELS, reverse=True) 
 
-    def translate(self, text, target_language, model_name):
-        if not self.api_key:
-            return "Error: Anthropic API key not set."
-        try:
-            response = self.client.messages.create(
-                model=model_name,
-                max_tokens=len(text) + 500, 
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"""Translate the following text into {target_language}.
+    def _translation_messages(self, text, target_language):
+        """Build the messages used for translation requests."""
+        return [
+            {
+                "role": "user",
+                "content": f"""Translate the following text into {target_language}.
 
 Rules to follow strictly:
 1. Provide ONLY the translated text itself, without any explanations or remarks
 2. Do not include the original text in your response
-3. IMPORTANT: Do not translate any text between __KEYWORD_X__ markers (where X is a number)
-4. Keep all __KEYWORD_X__ markers exactly as they appear in the original text
+3. IMPORTANT: Do not translate placeholder markers such as __KEYWORD_X__, ⟦X⟧ or <kX/> (where X is a number)
+4. Keep all placeholder markers and <lb/> or ⟦¶⟧ line separators exactly as they appear in the original text
 5. Maintain the exact same formatting and spacing around the keywords
 
 Original text:
 {text}
 
 Translated text in {target_language}:"""
-                    }
-                ]
+            }
+        ]
+
+    def translate(self, text, target_language, model_name):
+        if not self.api_key:
+            raise AuthError("Anthropic API key not set.", provider="Anthropic")
+        try:
+            raw_response = self.client.messages.with_raw_response.create(
+                model=model_name,
+                max_tokens=len(text) + 500, 
+                messages=self._translation_messages(text, target_language)
             )
+            self._record_rate_limit_headers(raw_response.headers, *RATE_LIMIT_HEADERS)
+            response = raw_response.parse()
             translated_text = response.content[0].text
             return translated_text.strip()
-        except anthropic.APIError as e:
-            print(f"Anthropic API Error ({model_name}): {e}")
-            if hasattr(e, 'status_code') and e.status_code == 401:
-                 return "Error: Anthropic API key is not valid or not authorized for this model."
-            elif hasattr(e, 'status_code') and e.status_code == 429:
-                 return "Error: Anthropic API rate limit exceeded. Please try again later or check your plan."
-            error_message = str(e.message) if hasattr(e, 'message') else str(e)
-            return f"Anthropic API Error: {error_message}"
         except Exception as e:
             print(f"Translation failed with Anthropic ({model_name}): {e}")
-            return f"Translation error with Anthropic: {e}" 
+            raise classify_error(e, "Anthropic") from e
+
+    def count_tokens(self, text, model_name):
+        """Count tokens with the token counting endpoint; the count includes the few tokens of the message."""
+        try:
+            response = self.client.messages.count_tokens(model=model_name, messages=[{"role": "user", "content": text}])
+            return response.input_tokens
+        except Exception as e:
+            print(f"Token counting failed with Anthropic ({model_name}): {e}")
+            return None
+
+    def translate_stream(self, text, target_language, model_name):
+        """
+        Stream a translation from Anthropic, yielding text deltas as they arrive.
+
+        Raises:
+            LLMServiceError: Typed error describing why the request failed
+        """
+        if not self.api_key:
+            raise AuthError("API key is required for Anthropic", provider="Anthropic")
+        stream = None
+        try:
+            raw_response = self.client.messages.with_raw_response.create(
+                model=model_name,
+                max_tokens=len(text) + 500,
+                messages=self._translation_messages(text, target_language),
+                stream=True
+            )
+            self._record_rate_limit_headers(raw_response.headers, *RATE_LIMIT_HEADERS)
+            stream = raw_response.parse()
+            for event in stream:
+                # Only text deltas carry output; message_start/stop etc. are skipped
+                if getattr(event, 'type', None) == 'content_block_delta':
+                    delta = getattr(event.delta, 'text', None)
+                    if delta:
+                        yield delta
+        except Exception as e:
+            print(f"Streaming translation failed with Anthropic ({model_name}): {e}")
+            raise classify_error(e, "Anthropic") from e
+        finally:
+            # Release the HTTP connection if the consumer stopped early (e.g. a cancelled hedge)
+            if stream is not None and hasattr(stream, 'close'):
+                stream.close()
 
     def get_completion(self, prompt, temperature=0.3):
         """
@@ -120,9 +166,12 @@ Translated text in {target_language}:"""
             
         Returns:
             str: The generated completion text
+
+        Raises:
+            LLMServiceError: Typed error describing why the request failed
         """
         if not self.api_key:
-            raise ValueError("API key is required for Anthropic")
+            raise AuthError("API key is required for Anthropic", provider="Anthropic")
         
         try:
             # Use the model that was set, or fall back to a default model
@@ -140,4 +189,4 @@ Translated text in {target_language}:"""
             return message.content[0].text
         except Exception as e:
             print(f"Error in Anthropic service: {e}")
-            raise 
\ No newline at end of file
+            raise classify_error(e, "Anthropic") from e 
\ No newline at end of file
@@ -3,9 +3,15 @@ from abc import ABC, abstractmethod
 # Abstract base class for LLM services will be defined here
 
 class BaseLLM(ABC):
+    # Set to True by services that implement a real streaming translate_stream()
+    supports_streaming = False
+
     def __init__(self, api_key):
         self.api_key = api_key
         self.model = None
+        # Rate limit state reported by the provider with the last response, e.g.
+        # {'remaining_requests': 10, 'remaining_tokens': 40000}. Empty if unknown.
+        self.rate_limit_info = {}
 
     @abstractmethod
     def get_models(self):
@@ -14,9 +20,48 @@ class BaseLLM(ABC):
 
     @abstractmethod
     def translate(self, text, target_language, model_name):
-        """Translates the given text to the target language."""
+        """
+        Translates the given text to the target language.
+
+        Raises:
+            LLMServiceError: A typed error from llm_services.errors when the request fails
+        """
         pass
 
+    def translate_stream(self, text, target_language, model_name):
+        """
+        Translate the given text, yielding the response text incrementally.
+
+        Services that support streaming override this and yield each text delta
+        as soon as the provider sends it. The default implementation falls back
+        to translate() and yields the whole response at once.
+
+        Yields:
+            str: Pieces of the translated text, in order
+        """
+        yield self.translate(text, target_language, model_name)
+
+    def count_tokens(self, text, model_name):
+        """
+        Count the input tokens of a text with the provider's tokenizer.
+
+        Returns:
+            int or None: The token count, or None when the service cannot count tokens
+        """
+        return None
+
+    def _record_rate_limit_headers(self, headers, requests_header, tokens_header):
+        """Store remaining request/token counts from provider response headers."""
+        info = {}
+        for key, header in (('remaining_requests', requests_header), ('remaining_tokens', tokens_header)):
+            value = headers.get(header) if headers is not None else None
+            if value is not None:
+                try:
+                    info[key] = int(value)
+                except ValueError:
+                    pass
+        self.rate_limit_info = info
+
     def get_completion(self, prompt):
         """Get a completion from the LLM."""
         raise NotImplementedError("Subclasses must implement get_completion")
@@ -27,4 +72,4 @@ class BaseLLM(ABC):
 
     def set_model(self, model_name):
         """Set the current model to use for completions."""
-        self.model = model_name 
\ No newline at end of file
+        self.model = model_name
@@ -0,0 +1,142 @@
+import threading
+import time
+
+from .errors import LLMServiceError, TransientError
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_THRESHOLD = 5  # Consecutive transport/5xx failures before the circuit opens
+DEFAULT_COOLDOWN = 60  # Seconds the circuit stays open before a probe request is let through
+
+# Exception class names raised by the provider libraries for transport and server errors
+TRANSPORT_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "InternalServerError", "OverloadedError",
+    "ServiceUnavailable", "DeadlineExceeded", "BadGateway",
+    "GatewayTimeout", "ConnectionError", "Timeout", "ReadTimeout", "ConnectTimeout",
+}
+TRANSPORT_ERROR_TEXT = ["500", "502", "503", "504", "529", "timed out", "timeout", "connection", "unavailable", "overloaded"]
+
+
+def is_transport_error(error):
+    """Check whether an error means the provider endpoint itself is failing (transport or 5xx)."""
+    if isinstance(error, LLMServiceError):
+        return isinstance(error, TransientError)
+    for attr in ('status_code', 'http_status', 'code'):
+        status = getattr(error, attr, None)
+        if isinstance(status, int):
+            return status >= 500
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if any(cls.__name__ in TRANSPORT_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    error_text = str(error).lower()
+    return any(marker in error_text for marker in TRANSPORT_ERROR_TEXT)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"Circuit breaker for {name} is open, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker around the calls to one LLM provider.
+
+    The circuit opens after failure_threshold consecutive transport/5xx failures,
+    and calls then fail fast with CircuitOpenError. After the cooldown a single
+    probe call is let through (half-open): success closes the circuit, another
+    transport failure opens it again. Errors that show the endpoint is reachable
+    (e.g. 4xx) do not count as failures.
+    """
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN,
+                 on_state_change=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.on_state_change = on_state_change  # Called as on_state_change(breaker, old_state, new_state)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+        self.rejected_calls = 0
+        self._lock = threading.Lock()
+
+    def _set_state(self, new_state):
+        old_state = self.state
+        self.state = new_state
+        if new_state == OPEN:
+            self.opened_at = time.time()
+            self.times_opened += 1
+        return old_state
+
+    def _notify(self, old_state, new_state):
+        if old_state != new_state and self.on_state_change:
+            self.on_state_change(self, old_state, new_state)
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not go through right now."""
+        with self._lock:
+            old_state = self.state
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN:
+                retry_in = self.opened_at + self.cooldown - time.time()
+                if retry_in > 0:
+                    self.rejected_calls += 1
+                    raise CircuitOpenError(self.name, retry_in)
+                # Cooldown elapsed: let this call through as the probe
+                self._set_state(HALF_OPEN)
+                self.probe_in_flight = True
+            elif self.probe_in_flight:
+                self.rejected_calls += 1
+                raise CircuitOpenError(self.name, self.cooldown)
+            else:
+                self.probe_in_flight = True
+        self._notify(old_state, HALF_OPEN)
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            old_state = self._set_state(CLOSED)
+        self._notify(old_state, CLOSED)
+
+    def record_failure(self, error):
+        if not is_transport_error(error):
+            # The endpoint answered, so it is up even though this request failed
+            self.record_success()
+            return
+        with self._lock:
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            old_state = self.state
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self._set_state(OPEN)
+        self._notify(old_state, self.state)
+
+    def release(self):
+        """Release a call that ended without an outcome (e.g. a cancelled hedge)."""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = max(0.0, self.opened_at + self.cooldown - time.time()) if self.state == OPEN else 0.0
+            return {
+                'name': self.name,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+                'rejected_calls': self.rejected_calls,
+                'retry_in': retry_in,
+            }
@@ -0,0 +1,162 @@
+import re
+import time
+from email.utils import parsedate_to_datetime
+
+# Exception class names raised by the provider libraries, grouped by meaning
+RATE_LIMIT_ERROR_NAMES = {"RateLimitError", "ResourceExhausted", "TooManyRequests"}
+AUTH_ERROR_NAMES = {"AuthenticationError", "PermissionDeniedError", "PermissionDenied", "Unauthenticated", "Unauthorized"}
+BLOCKED_ERROR_NAMES = {"BlockedPromptException", "StopCandidateException"}
+
+# Message fragments used when the provider does not raise a specific exception class
+CONTEXT_TOO_LONG_TEXT = ["context length", "context_length_exceeded", "maximum context", "prompt is too long",
+                         "too many tokens", "token limit", "input is too long"]
+BLOCKED_TEXT = ["safety", "content_filter", "content filter", "content policy", "blocked", "recitation"]
+RATE_LIMIT_TEXT = ["quota", "rate limit", "rate_limit", "too many requests"]
+AUTH_TEXT = ["invalid api key", "incorrect api key", "api key not valid", "api_key_invalid", "unauthorized"]
+
+# Headers reporting when a throttled request may be retried
+RETRY_AFTER_HEADERS = ("retry-after-ms", "retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+
+
+class LLMServiceError(Exception):
+    """
+    Base class for errors raised by the LLM services.
+
+    Attributes:
+        provider (str): Name of the provider that raised the error, if known
+        status_code (int): HTTP status code of the failed request, if known
+        retry_after (float): Seconds the provider asked to wait before retrying, if known
+    """
+
+    def __init__(self, message, provider=None, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class RateLimited(LLMServiceError):
+    """The request was throttled or the quota is used up (HTTP 429)."""
+    pass
+
+
+class TransientError(LLMServiceError):
+    """Connection failure, timeout, overload or 5xx error; the same request may succeed later."""
+    pass
+
+
+class AuthError(LLMServiceError):
+    """The API key is missing, invalid or not allowed to use the model."""
+    pass
+
+
+class ContentBlocked(LLMServiceError):
+    """The provider refused the request or the response because of its content filters."""
+    pass
+
+
+class ContextTooLong(LLMServiceError):
+    """The request does not fit in the model's context window."""
+    pass
+
+
+class InvalidRequest(LLMServiceError):
+    """Any other request the provider rejected (4xx); sending it again will not help."""
+    pass
+
+
+def _status_code(error):
+    for attr in ('status_code', 'http_status', 'code'):
+        status = getattr(error, attr, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def _parse_duration(value):
+    """
+    Parse a retry delay header value into seconds.
+
+    Accepts plain seconds ("20", "1.5"), durations like "1m30s" or "250ms",
+    and HTTP dates ("Wed, 21 Oct 2026 07:28:00 GMT").
+    """
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        scale = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+        return sum(float(number) * scale[unit] for number, unit in parts)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_retry_after(error):
+    """
+    Find how many seconds the provider asked to wait before retrying.
+
+    Looks at the retry headers of the error's HTTP response first, then at hints
+    in the error message (e.g. Gemini's "retry_delay { seconds: 30 }").
+
+    Returns:
+        float or None: Seconds to wait, or None if the provider gave no hint
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers is not None:
+        for header in RETRY_AFTER_HEADERS:
+            value = headers.get(header)
+            if value is None:
+                continue
+            seconds = _parse_duration(value)
+            if seconds is not None:
+                return seconds / 1000 if header == "retry-after-ms" else seconds
+
+    error_text = str(error)
+    match = (re.search(r'retry_delay\s*{\s*seconds:\s*(\d+)', error_text)
+             or re.search(r'(?:retry|try again) (?:in|after) (\d+(?:\.\d+)?)\s*s', error_text, re.IGNORECASE))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def classify_error(error, provider=None):
+    """
+    Convert an exception raised by a provider library into a typed LLMServiceError.
+
+    Args:
+        error (Exception): The exception raised by the provider library
+        provider (str, optional): Name of the provider, used in the error message
+
+    Returns:
+        LLMServiceError: The typed error (error itself if it is already typed)
+    """
+    if isinstance(error, LLMServiceError):
+        return error
+
+    status = _status_code(error)
+    names = {cls.__name__ for cls in type(error).__mro__}
+    error_text = str(error).lower()
+    message = f"{provider} API error: {error}" if provider else str(error)
+    details = {'provider': provider, 'status_code': status}
+
+    if status == 429 or names & RATE_LIMIT_ERROR_NAMES or any(t in error_text for t in RATE_LIMIT_TEXT):
+        return RateLimited(message, retry_after=extract_retry_after(error), **details)
+    if status is not None and status >= 500:
+        return TransientError(message, retry_after=extract_retry_after(error), **details)
+    if status in (401, 403) or names & AUTH_ERROR_NAMES or any(t in error_text for t in AUTH_TEXT):
+        return AuthError(message, **details)
+    if status == 413 or any(t in error_text for t in CONTEXT_TOO_LONG_TEXT):
+        return ContextTooLong(message, **details)
+    if names & BLOCKED_ERROR_NAMES or any(t in error_text for t in BLOCKED_TEXT):
+        return ContentBlocked(message, **details)
+    if status is not None and 400 <= status < 500:
+        return InvalidRequest(message, **details)
+    # 5xx, transport failures and anything unrecognized are worth another attempt
+    return TransientError(message, retry_after=extract_retry_after(error), **details)
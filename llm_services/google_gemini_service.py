@@ -1,7 +1,9 @@
 # Google Gemini API integration will be implemented here 
 from .base_llm import BaseLLM
+from .errors import LLMServiceError, AuthError, ContentBlocked, TransientError, classify_error
 import google.generativeai as genai # Import actual Google Gemini library
 import re # For version sorting
+import threading
 from collections import defaultdict
 
 # Known latest and major Gemini models (focusing on models likely to support translation)
@@ -74,11 +76,35 @@ def get_gemini_model_key_components(model_name_full):
 # Default stable model to use as fallback
 DEFAULT_MODEL = "gemini-1.0-pro"
 
+# Safety settings used for translation requests (game text often trips the default filters)
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+]
+
+# genai.configure() sets the API key globally. When services with different keys
+# exist (an API key pool), each request configures its key under this lock first.
+_configure_lock = threading.Lock()
+_configured_api_key = None
+_service_api_keys = set()
+
+def _configure_api_key(api_key):
+    global _configured_api_key
+    if _configured_api_key != api_key:
+        genai.configure(api_key=api_key)
+        _configured_api_key = api_key
+
 class GoogleGeminiService(BaseLLM):
+    supports_streaming = True
+
     def __init__(self, api_key):
         super().__init__(api_key)
         try:
-            genai.configure(api_key=self.api_key)
+            with _configure_lock:
+                _configure_api_key(self.api_key)
+                _service_api_keys.add(self.api_key)
             print("Google Gemini API key configured successfully.")
         except Exception as e:
             print(f"Error configuring Google Gemini API key: {e}")
@@ -170,46 +196,101 @@ class GoogleGeminiService(BaseLLM):
             print(f"Failed to get complete Google Gemini model list: {e}")
             return []
 
-    def translate(self, text, target_language, model_name):
-        if not self.api_key:
-            return "Error: Google Gemini API key not set."
-        
-        model_to_use = f'models/{model_name}' if not model_name.startswith('models/') else model_name
-        
-        try:
-            model = genai.GenerativeModel(model_to_use)
-            prompt = f"""Translate the following text into {target_language}.
+    def _generate_content(self, model_name, prompt, **kwargs):
+        """
+        Create the model and send the request with this service's API key.
+
+        With several keys in use the global key is switched under a lock; for a
+        streamed request the lock is only held until the stream is opened.
+        """
+        if len(_service_api_keys) <= 1:
+            return genai.GenerativeModel(model_name).generate_content(prompt, **kwargs)
+        with _configure_lock:
+            _configure_api_key(self.api_key)
+            return genai.GenerativeModel(model_name).generate_content(prompt, **kwargs)
+
+    def _translation_prompt(self, text, target_language):
+        """Build the prompt used for translation requests."""
+        return f"""Translate the following text into {target_language}.
 
 Rules to follow strictly:
 1. Provide ONLY the translated text itself, without any explanations or remarks
 2. Do not include the original text in your response
-3. IMPORTANT: Do not translate any text between __KEYWORD_X__ markers (where X is a number)
-4. Keep all __KEYWORD_X__ markers exactly as they appear in the original text
+3. IMPORTANT: Do not translate placeholder markers such as __KEYWORD_X__, ⟦X⟧ or <kX/> (where X is a number)
+4. Keep all placeholder markers and <lb/> or ⟦¶⟧ line separators exactly as they appear in the original text
 5. Maintain the exact same formatting and spacing around the keywords
 
 Original text: {text}
 
 Translated text:"""
 
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
+    def translate(self, text, target_language, model_name):
+        if not self.api_key:
+            raise AuthError("Google Gemini API key not set.", provider="Google Gemini")
+        
+        model_to_use = f'models/{model_name}' if not model_name.startswith('models/') else model_name
+        
+        try:
+            prompt = self._translation_prompt(text, target_language)
 
-            response = model.generate_content(prompt, safety_settings=safety_settings)
+            response = self._generate_content(model_to_use, prompt, safety_settings=SAFETY_SETTINGS)
             if response and response.text and response.text.strip():
                 return response.text.strip()
             else:
                 error_msg = "Empty response from model"
                 print(error_msg)
-                return f"Error: {error_msg}"
+                raise TransientError(error_msg, provider="Google Gemini")
+
+        except LLMServiceError:
+            raise
+        except Exception as e:
+            print(f"Translation error with model {model_name}: {str(e)}")
+            raise classify_error(e, "Google Gemini") from e
+
+    def count_tokens(self, text, model_name):
+        """Count tokens with the model's count_tokens request."""
+        try:
+            with _configure_lock:
+                _configure_api_key(self.api_key)
+                return genai.GenerativeModel(model_name).count_tokens(text).total_tokens
+        except Exception as e:
+            print(f"Token counting failed with Google Gemini ({model_name}): {e}")
+            return None
+
+    def translate_stream(self, text, target_language, model_name):
+        """
+        Stream a translation from Gemini, yielding text deltas as they arrive.
 
+        Raises:
+            LLMServiceError: Typed error describing why the request failed
+        """
+        if not self.api_key:
+            raise AuthError("API key is required for Google Gemini", provider="Google Gemini")
+
+        model_to_use = f'models/{model_name}' if not model_name.startswith('models/') else model_name
+
+        try:
+            prompt = self._translation_prompt(text, target_language)
+            response = self._generate_content(model_to_use, prompt, safety_settings=SAFETY_SETTINGS, stream=True)
+            received_text = False
+            stopped_without_text = False
+            for chunk in response:
+                # chunk.text raises when a streamed candidate has no text parts (e.g. safety stop)
+                try:
+                    delta = chunk.text
+                except ValueError:
+                    stopped_without_text = True
+                    continue
+                if delta:
+                    received_text = True
+                    yield delta
+            if stopped_without_text and not received_text:
+                raise ContentBlocked("Response blocked by Gemini safety filters", provider="Google Gemini")
+        except LLMServiceError:
+            raise
         except Exception as e:
-            error_msg = f"Translation error with model {model_name}: {str(e)}"
-            print(error_msg)
-            return f"Error: {error_msg}"
+            print(f"Streaming translation error with model {model_name}: {e}")
+            raise classify_error(e, "Google Gemini") from e
 
     def get_completion(self, prompt, temperature=0.3):
         """
@@ -221,20 +302,18 @@ Translated text:"""
             
         Returns:
             str: The generated completion text
+
+        Raises:
+            LLMServiceError: Typed error describing why the request failed
         """
         if not self.api_key:
-            raise ValueError("API key is required for Google Gemini")
-        
-        # Set up API key
-        genai.configure(api_key=self.api_key)
+            raise AuthError("API key is required for Google Gemini", provider="Google Gemini")
         
         try:
             # Use the model that was set, or fall back to a default model
             model_name = self.model or 'gemini-1.5-flash'
             
-            model = genai.GenerativeModel(model_name=model_name)
-            
-            response = model.generate_content(prompt)
+            response = self._generate_content(model_name, prompt)
             
             # Handle potential errors in response
             if hasattr(response, 'text'):
@@ -252,4 +331,4 @@ Translated text:"""
                 
         except Exception as e:
             print(f"Error in Google Gemini service: {e}")
-            raise 
\ No newline at end of file
+            raise classify_error(e, "Google Gemini") from e 
\ No newline at end of file
@@ -0,0 +1,198 @@
+import re
+import threading
+import time
+
+# Key pool settings
+RATE_LIMIT_COOLDOWN = 60  # Seconds a throttled key is rotated out when no retry delay is known
+DISABLED_COOLDOWN = 3600  # Seconds a rejected (invalid or unauthorized) key is rotated out
+
+
+def parse_api_keys(value):
+    """
+    Normalize API key input into a list of keys.
+
+    Accepts a single key, several keys separated by commas, semicolons or
+    newlines, or a list of keys. Empty entries and duplicates are dropped.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[,;\n]", value)
+    keys = []
+    for key in value:
+        key = key.strip() if isinstance(key, str) else key
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def mask_api_key(api_key):
+    """Return a key shortened for logs, e.g. "sk-...a1b2"."""
+    if len(api_key) <= 8:
+        return "..." + api_key[-2:]
+    return f"{api_key[:3]}...{api_key[-4:]}"
+
+
+class TokenBucket:
+    """Request rate limiter refilled continuously at requests_per_minute."""
+
+    def __init__(self, requests_per_minute):
+        self.capacity = float(requests_per_minute)
+        self.tokens = self.capacity
+        self.refill_rate = self.capacity / 60.0
+        self.updated_at = time.time()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def available(self, now):
+        self._refill(now)
+        return self.tokens >= 1
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def wait_time(self, now):
+        """Seconds until the next request may be sent."""
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.refill_rate)
+
+
+class PooledKey:
+    """One API key of a pool with its own service instance, rate bucket and usage counters."""
+
+    def __init__(self, api_key, service, requests_per_minute=None):
+        self.api_key = api_key
+        self.service = service
+        self.bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+
+        # Usage counters
+        self.requests = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.tokens_sent = 0
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.remaining_requests = None  # From provider rate limit headers, if reported
+
+    @property
+    def name(self):
+        return mask_api_key(self.api_key)
+
+    def is_available(self, now):
+        return now >= self.cooldown_until
+
+
+class KeyPool:
+    """
+    Spread the requests to one provider across several API keys.
+
+    Each request takes the key with the fewest requests in flight among the keys
+    whose rate bucket has room. A key that hits a rate limit or reports no
+    remaining requests is rotated out until its quota resets, and a key that is
+    rejected as invalid is rotated out for much longer. Sending requests
+    concurrently then gets the combined throughput of all keys.
+    """
+
+    def __init__(self, provider, keys, requests_per_minute=None):
+        """
+        Args:
+            provider (str): Provider name, used in logs
+            keys (list): (api_key, service) pairs
+            requests_per_minute (int, optional): Request rate allowed per key; unlimited if None
+        """
+        if not keys:
+            raise ValueError("KeyPool requires at least one key")
+        self.provider = provider
+        self.keys = [PooledKey(api_key, service, requests_per_minute) for api_key, service in keys]
+        self._lock = threading.Lock()
+
+    def set_rate_limit(self, requests_per_minute):
+        """Set the request rate allowed per key (None for unlimited)."""
+        with self._lock:
+            for key in self.keys:
+                key.bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+
+    def acquire(self, exclude=()):
+        """
+        Take a key for one request, waiting for a rate bucket to refill if needed.
+
+        Args:
+            exclude: Keys that must not be chosen (e.g. ones already throttled for this request)
+
+        Returns:
+            PooledKey or None if every key is excluded or rotated out
+        """
+        while True:
+            with self._lock:
+                now = time.time()
+                candidates = [k for k in self.keys if k not in exclude and k.is_available(now)]
+                if not candidates:
+                    return None
+                ready = [k for k in candidates if k.bucket is None or k.bucket.available(now)]
+                if ready:
+                    key = min(ready, key=lambda k: (k.in_flight, k.requests))
+                    if key.bucket:
+                        key.bucket.take(now)
+                    key.in_flight += 1
+                    key.requests += 1
+                    return key
+                wait = min(k.bucket.wait_time(now) for k in candidates)
+            time.sleep(wait)
+
+    def record_success(self, key, tokens=0, rate_limit_info=None):
+        with self._lock:
+            key.in_flight = max(0, key.in_flight - 1)
+            key.tokens_sent += tokens
+            if rate_limit_info and rate_limit_info.get('remaining_requests') is not None:
+                key.remaining_requests = rate_limit_info['remaining_requests']
+                if key.remaining_requests == 0:
+                    key.cooldown_until = time.time() + RATE_LIMIT_COOLDOWN
+
+    def record_rate_limited(self, key, retry_after=None):
+        """Rotate a throttled key out until its quota is expected to reset."""
+        with self._lock:
+            key.in_flight = max(0, key.in_flight - 1)
+            key.rate_limited += 1
+            key.cooldown_until = time.time() + (retry_after or RATE_LIMIT_COOLDOWN)
+
+    def record_rejected(self, key):
+        """Rotate out a key the provider rejected as invalid or unauthorized."""
+        with self._lock:
+            key.in_flight = max(0, key.in_flight - 1)
+            key.failures += 1
+            key.cooldown_until = time.time() + DISABLED_COOLDOWN
+        print(f"API key {key.name} for {self.provider} was rejected and is rotated out")
+
+    def record_failure(self, key):
+        with self._lock:
+            key.in_flight = max(0, key.in_flight - 1)
+            key.failures += 1
+
+    def release(self, key):
+        """Release a request that ended without an outcome (e.g. a cancelled hedge)."""
+        with self._lock:
+            key.in_flight = max(0, key.in_flight - 1)
+
+    def next_available_in(self):
+        """Return the seconds until the first rotated-out key is available again."""
+        with self._lock:
+            now = time.time()
+            return max(0.0, min(k.cooldown_until for k in self.keys) - now)
+
+    def snapshot(self):
+        """Return the usage counters of every key as a list of dicts."""
+        with self._lock:
+            now = time.time()
+            return [{
+                'key': k.name,
+                'requests': k.requests,
+                'rate_limited': k.rate_limited,
+                'failures': k.failures,
+                'tokens_sent': k.tokens_sent,
+                'remaining_requests': k.remaining_requests,
+                'available': k.is_available(now),
+                'cooldown_remaining': max(0.0, k.cooldown_until - now),
+            } for k in self.keys]
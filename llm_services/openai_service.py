@@ -1,6 +1,14 @@
 from .base_llm import BaseLLM
+from .errors import AuthError, classify_error
 import openai # Import actual OpenAI library
 
+# Optional tokenizer, used to count tokens offline
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
 # Preferred latest OpenAI models order (for Chat Completions)
 PREFERRED_OPENAI_MODELS_ORDER = [
     "gpt-4-turbo", # Generally one of the latest and most powerful models
@@ -10,9 +18,14 @@ PREFERRED_OPENAI_MODELS_ORDER = [
     "gpt-3.5-turbo",
 ]
 
+# Response headers reporting remaining requests and tokens
+RATE_LIMIT_HEADERS = ("x-ratelimit-remaining-requests", "x-ratelimit-remaining-tokens")
+
 # OpenAI API integration will be implemented here
 
 class OpenAIService(BaseLLM):
+    supports_streaming = True
+
     def __init__(self, api_key):
         super().__init__(api_key)
         try:
@@ -67,39 +80,80 @@ class OpenAIService(BaseLLM):
             print(f"Failed to get OpenAI model list: {e}")
             return ["gpt-3.5-turbo"] 
 
-    def translate(self, text, target_language, model_name):
-        if not self.api_key:
-            return "Error: OpenAI API key not set."
-        try:
-            response = self.client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": f"""You are a helpful assistant that translates text into {target_language}. 
+    def _translation_messages(self, text, target_language):
+        """Build the chat messages used for translation requests."""
+        return [
+            {"role": "system", "content": f"""You are a helpful assistant that translates text into {target_language}. 
 Follow these rules strictly:
 1. Provide ONLY the translated text itself, without any additional explanations or remarks
 2. Do not include the original text in your response
-3. IMPORTANT: Do not translate any text between __KEYWORD_X__ markers (where X is a number)
-4. Keep all __KEYWORD_X__ markers exactly as they appear in the original text
+3. IMPORTANT: Do not translate placeholder markers such as __KEYWORD_X__, ⟦X⟧ or <kX/> (where X is a number)
+4. Keep all placeholder markers and <lb/> or ⟦¶⟧ line separators exactly as they appear in the original text
 5. Maintain the exact same formatting and spacing around the keywords"""},
-                    {"role": "user", "content": text}
-                ],
+            {"role": "user", "content": text}
+        ]
+
+    def translate(self, text, target_language, model_name):
+        if not self.api_key:
+            raise AuthError("OpenAI API key not set.", provider="OpenAI")
+        try:
+            raw_response = self.client.chat.completions.with_raw_response.create(
+                model=model_name,
+                messages=self._translation_messages(text, target_language),
                 max_tokens=len(text) + 500,
                 temperature=0.7,
             )
+            self._record_rate_limit_headers(raw_response.headers, *RATE_LIMIT_HEADERS)
+            response = raw_response.parse()
             translated_text = response.choices[0].message.content.strip()
             return translated_text
-        except openai.APIError as e:
-            print(f"OpenAI API Error ({model_name}): {e}")
-            if "Invalid API key" in str(e) or (hasattr(e, 'http_status') and e.http_status == 401):
-                 return "Error: OpenAI API key is not valid. Please check your API key."
-            elif hasattr(e, 'http_status') and e.http_status == 429:
-                 return "Error: OpenAI API rate limit exceeded. Please try again later or check your plan."
-            error_message = str(e.message) if hasattr(e, 'message') else str(e)
-            error_code = str(e.code) if hasattr(e, 'code') else 'N/A'
-            return f"OpenAI API Error: {error_code} - {error_message}"
         except Exception as e:
             print(f"Translation failed with OpenAI ({model_name}): {e}")
-            return f"Translation error with OpenAI: {e}" 
+            raise classify_error(e, "OpenAI") from e
+
+    def count_tokens(self, text, model_name):
+        """Count tokens with tiktoken, when it is installed."""
+        if not TIKTOKEN_AVAILABLE:
+            return None
+        try:
+            encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return len(encoding.encode(text))
+
+    def translate_stream(self, text, target_language, model_name):
+        """
+        Stream a translation from OpenAI, yielding text deltas as they arrive.
+
+        Raises:
+            LLMServiceError: Typed error describing why the request failed
+        """
+        if not self.api_key:
+            raise AuthError("API key is required for OpenAI", provider="OpenAI")
+        stream = None
+        try:
+            raw_response = self.client.chat.completions.with_raw_response.create(
+                model=model_name,
+                messages=self._translation_messages(text, target_language),
+                max_tokens=len(text) + 500,
+                temperature=0.7,
+                stream=True,
+            )
+            self._record_rate_limit_headers(raw_response.headers, *RATE_LIMIT_HEADERS)
+            stream = raw_response.parse()
+            for event in stream:
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if delta:
+                    yield delta
+        except Exception as e:
+            print(f"Streaming translation failed with OpenAI ({model_name}): {e}")
+            raise classify_error(e, "OpenAI") from e
+        finally:
+            # Release the HTTP connection if the consumer stopped early (e.g. a cancelled hedge)
+            if stream is not None and hasattr(stream, 'close'):
+                stream.close()
 
     def get_completion(self, prompt, temperature=0.3):
         """
@@ -111,9 +165,12 @@ Follow these rules strictly:
             
         Returns:
             str: The generated completion text
+
+        Raises:
+            LLMServiceError: Typed error describing why the request failed
         """
         if not self.api_key:
-            raise ValueError("API key is required for OpenAI")
+            raise AuthError("API key is required for OpenAI", provider="OpenAI")
         
         client = openai.OpenAI(api_key=self.api_key)
         
@@ -133,4 +190,4 @@ Follow these rules strictly:
             return response.choices[0].message.content
         except Exception as e:
             print(f"Error in OpenAI service: {e}")
-            raise 
\ No newline at end of file
+            raise classify_error(e, "OpenAI") from e 
\ No newline at end of file
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROMPT_MARKER = "Text to translate:\n"
+PROMPT_END = "\n\nExpected output"
+
+
+def prompt_text(prompt):
+    """Return the text a translation prompt asks the model to translate."""
+    if PROMPT_MARKER not in prompt:
+        return prompt
+    return prompt.split(PROMPT_MARKER, 1)[1].rsplit(PROMPT_END, 1)[0]
+
+
+@pytest.fixture
+def make_translator(monkeypatch):
+    """
+    Build Translators backed by a fake LLM service.
+
+    The returned factory takes respond(text) -> translation, called with the text of
+    each prompt; the default upper-cases it and, like most models, drops surrounding
+    whitespace. The prompts sent are collected in the
+    service's `prompts` list.
+    """
+    translator_module = pytest.importorskip("translation_core.translator")
+    from llm_services.base_llm import BaseLLM
+
+    def factory(respond=lambda text: text.strip().upper()):
+        prompts = []
+
+        class FakeLLM(BaseLLM):
+            supports_streaming = False
+
+            def get_models(self):
+                return ["fake-model"]
+
+            def translate(self, text, target_language, model_name):
+                prompts.append(text)
+                return respond(prompt_text(text))
+
+        monkeypatch.setitem(translator_module.SUPPORTED_LLM_SERVICES, "Fake", FakeLLM)
+        monkeypatch.setattr(translator_module, "BASE_DELAY", 0)
+        translator = translator_module.Translator("Fake", "test-key")
+        translator.streaming_enabled = False
+        translator.deferred_state_dir = None
+        translator.prompts = prompts
+        return translator
+
+    return factory
@@ -0,0 +1,57 @@
+import pytest
+
+from translation_core.alignment import AlignmentMap, line_ending
+
+
+def test_line_ending():
+    assert line_ending("text\r\n") == "\r\n"
+    assert line_ending("text\n") == "\n"
+    assert line_ending("text") == ""
+
+
+def test_alignment_needs_one_translation_per_source_line():
+    with pytest.raises(ValueError):
+        AlignmentMap(["a\n", "b\n"], ["A\n"])
+
+
+def test_matches_ignores_a_trailing_newline_and_crlf():
+    alignment = AlignmentMap(["a\r\n", "b"], ["A\r\n", "B"], "French")
+
+    assert alignment.matches("A\nB")
+    assert alignment.matches("A\r\nB\n")
+    assert alignment.trailing_newline("A\nB\n") == "\n"
+    assert not alignment.matches("A\nB edited")
+
+
+def test_entries_of_text_lines_maps_merged_and_split_translations():
+    # Entry 0 lost its line ending, entry 1 came back as two lines
+    alignment = AlignmentMap(["a\n", "b\n", "c\n"], ["A", "B1\nB2\n", "C\n"])
+
+    assert alignment.entries_of_text_lines() == [[0, 1], [1], [2], []]
+
+
+def test_update_keeps_the_source_line_ending():
+    alignment = AlignmentMap(["a\r\n", "b"], ["a\r\n", "b"])
+
+    alignment.update(0, "A\n")
+    alignment.update(1, "B\n")
+
+    assert alignment.target_lines == ["A\r\n", "B"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "out.txt.align.json"
+    AlignmentMap(["a\n"], ["A\n"], "French", adapter="json").save(str(path))
+
+    loaded = AlignmentMap.load(str(path))
+
+    assert (loaded.source_lines, loaded.target_lines) == (["a\n"], ["A\n"])
+    assert (loaded.output_language, loaded.adapter) == ("French", "json")
+
+
+def test_load_rejects_other_json(tmp_path):
+    path = tmp_path / "other.json"
+    path.write_text('{"version": 99}', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        AlignmentMap.load(str(path))
@@ -0,0 +1,32 @@
+import pytest
+
+
+def test_tiers_sharing_a_model_name_get_their_own_requests(make_translator):
+    cascade_module = pytest.importorskip("translation_core.cascade")
+    from llm_services.base_llm import BaseLLM
+
+    class ScriptedLLM(BaseLLM):
+        def __init__(self, api_key, respond):
+            super().__init__(api_key)
+            self.respond = respond
+            self.calls = 0
+
+        def get_models(self):
+            return ["shared-model"]
+
+        def translate(self, text, target_language, model_name):
+            self.calls += 1
+            return self.respond(text)
+
+    translator = make_translator()
+    tiers = [cascade_module.CascadeTier("Fake", "shared-model", "cheap-key"),
+             cascade_module.CascadeTier("Fake", "shared-model", "strong-key")]
+    translator.set_cascade(cascade_module.ModelCascade(tiers))
+    tiers[0].service = ScriptedLLM("cheap-key", lambda text: "")
+    tiers[1].service = ScriptedLLM("strong-key", lambda text: "BONJOUR")
+
+    translated = translator.translate_line_list(["hello\n"], "French", "shared-model")
+
+    assert translated == ["BONJOUR\n"]
+    assert (tiers[0].service.calls, tiers[1].service.calls) == (1, 1)
+    assert [tier['requests'] for tier in translator.cascade.snapshot()] == [1, 1]
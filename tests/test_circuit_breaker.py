@@ -0,0 +1,41 @@
+import pytest
+
+from llm_services.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from llm_services.errors import TransientError, InvalidRequest
+
+
+def test_circuit_opens_after_consecutive_transport_failures():
+    breaker = CircuitBreaker("Fake", failure_threshold=2, cooldown=60)
+
+    breaker.record_failure(TransientError("503"))
+    assert breaker.state == CLOSED
+    breaker.record_failure(TransientError("503"))
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.snapshot()['rejected_calls'] == 1
+
+
+def test_errors_from_a_reachable_endpoint_do_not_count():
+    breaker = CircuitBreaker("Fake", failure_threshold=1)
+
+    breaker.record_failure(InvalidRequest("400"))
+
+    assert breaker.state == CLOSED
+
+
+def test_probe_after_cooldown_closes_or_reopens_the_circuit():
+    breaker = CircuitBreaker("Fake", failure_threshold=1, cooldown=0)
+    breaker.record_failure(TransientError("503"))
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # Only one probe at a time
+    breaker.record_failure(TransientError("503"))
+    assert breaker.state == OPEN
+
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
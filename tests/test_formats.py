@@ -0,0 +1,36 @@
+import json
+
+from translation_core.formats import get_adapter, segment_lines, segment_translations
+
+
+def test_paradox_yaml_round_trip_translates_only_values():
+    lines = ["﻿l_english:\n", " # comment\n", ' GREETING:0 "Hello $NAME$"\r\n', ' REF:0 "$OTHER$"\n']
+    adapter = get_adapter("auto", "mod_l_english.yml", lines)
+
+    document, segments = adapter.extract(lines)
+    output = list(adapter.reinject(document, ["Bonjour $NAME$"], "French"))
+
+    assert adapter.name == "paradox_yaml"
+    assert segments == [("GREETING", "Hello $NAME$")]
+    assert output == ["﻿l_french:\n", " # comment\n", ' GREETING:0 "Bonjour $NAME$"\r\n', ' REF:0 "$OTHER$"\n']
+
+
+def test_json_adapter_keeps_keys_and_untranslated_values():
+    lines = json.dumps({"title": "Hello", "count": 3, "nested": {"text": "Bye"}}, indent=2).splitlines(True)
+    adapter = get_adapter("json", "strings.json", lines)
+
+    document, segments = adapter.extract(lines)
+    output = json.loads("".join(adapter.reinject(document, ["Bonjour", None], "French")))
+
+    assert [text for _, text in segments] == ["Hello", "Bye"]
+    assert output == {"title": "Bonjour", "count": 3, "nested": {"text": "Bye"}}
+
+
+def test_plain_format_has_no_adapter():
+    assert get_adapter("plain", "notes.yml", ["l_english:\n"]) is None
+
+
+def test_segment_lines_round_trip_multiline_text():
+    segments = [("a", "two\nlines"), ("b", "one")]
+
+    assert segment_translations(segment_lines(segments)) == ["two\nlines", "one"]
@@ -0,0 +1,68 @@
+import pytest
+
+from translation_core.incremental import plan_incremental, line_key
+
+
+OLD_SOURCE = [
+    "l_english:\n",
+    " GREETING:0 \"Hello\"\n",
+    " FAREWELL:0 \"Goodbye\"\n",
+    " OBSOLETE:0 \"Gone\"\n",
+    "\n",
+    "Plain line\n",
+]
+OLD_TRANSLATION = [
+    "l_french:\n",
+    " GREETING:0 \"Bonjour\"\n",
+    " FAREWELL:0 \"Au revoir\"\n",
+    " OBSOLETE:0 \"Parti\"\n",
+    "\n",
+    "Ligne simple\n",
+]
+
+
+def test_line_key():
+    assert line_key(' GREETING:0 "Hello"\n') == "GREETING"
+    assert line_key("volume = 10\n") == "volume"
+    assert line_key("Just some text\n") is None
+
+
+def test_plan_carries_unchanged_lines_and_sends_the_rest():
+    new_source = [
+        "l_english:\n",
+        " GREETING:0 \"Hello\"\n",
+        " FAREWELL:0 \"See you\"\n",
+        " NEW_KEY:0 \"Welcome\"\n",
+        "\n",
+        "Plain line\n",
+        "Another plain line\n",
+    ]
+
+    plan = plan_incremental(OLD_SOURCE, new_source, OLD_TRANSLATION)
+
+    assert plan.delta_lines == [" FAREWELL:0 \"See you\"\n", " NEW_KEY:0 \"Welcome\"\n", "Another plain line\n"]
+    assert (plan.added, plan.changed, plan.unchanged, plan.removed) == (2, 1, 3, 1)
+    # The header has no value, so it is matched by content and position like plain lines
+    assert plan.entries[0] == ("l_english:\n", "l_french:\n")
+
+
+def test_merge_puts_translations_back_in_order_with_source_line_endings():
+    new_source = [" GREETING:0 \"Hello\"\r\n", " FAREWELL:0 \"See you\"\r\n", "Plain line"]
+    plan = plan_incremental(OLD_SOURCE, new_source, OLD_TRANSLATION)
+
+    merged = plan.merge([" FAREWELL:0 \"A plus\"\n"])
+
+    assert merged == [" GREETING:0 \"Bonjour\"\r\n", " FAREWELL:0 \"A plus\"\r\n", "Ligne simple"]
+
+
+def test_merge_rejects_a_wrong_number_of_translations():
+    plan = plan_incremental(OLD_SOURCE, [" NEW_KEY:0 \"Welcome\"\n", "Other\n"], OLD_TRANSLATION)
+
+    with pytest.raises(ValueError):
+        plan.merge(["only one\n"])
+
+
+def test_unkeyed_lines_are_not_carried_when_the_old_files_do_not_line_up():
+    plan = plan_incremental(["Plain line\n"], ["Plain line\n"], ["Ligne simple\n", "Extra\n"])
+
+    assert plan.delta_lines == ["Plain line\n"]
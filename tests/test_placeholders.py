@@ -0,0 +1,29 @@
+import pytest
+
+from translation_core.placeholders import SCHEMES, DEFAULT_SCHEME, LEGACY_SCHEME
+
+
+def test_default_scheme_is_the_legacy_sentinels():
+    assert DEFAULT_SCHEME == LEGACY_SCHEME
+    assert SCHEMES[DEFAULT_SCHEME].keyword(0) == "__KEYWORD_0__"
+
+
+@pytest.mark.parametrize("name, spaced", [
+    ("legacy", "__ KEYWORD_0 __"),
+    ("bracket", "⟦ 0 ⟧"),
+    ("tag", "< K0 />"),
+])
+def test_restore_tolerates_spaces_and_case_in_placeholders(name, spaced):
+    scheme = SCHEMES[name]
+    keywords = {scheme.keyword(0): "$NAME$"}
+
+    assert scheme.restore(f"Bonjour {spaced} !", keywords) == "Bonjour $NAME$ !"
+    assert scheme.restore(f"Bonjour {scheme.keyword(1)}", keywords) == f"Bonjour {scheme.keyword(1)}"
+
+
+@pytest.mark.parametrize("name", sorted(SCHEMES))
+def test_split_lines_at_line_break_tokens(name):
+    scheme = SCHEMES[name]
+    text = f"one{scheme.line_break}two {scheme.line_break} three"
+
+    assert [line.strip() for line in scheme.split_lines(text)] == ["one", "two", "three"]
@@ -0,0 +1,52 @@
+import pytest
+
+
+@pytest.fixture
+def project_module():
+    return pytest.importorskip("translation_core.project")
+
+
+def make_project(project_module, translator, files):
+    project = project_module.TranslationProject(translator, "French", "fake-model", pack_small_files=True)
+    for path, lines in files:
+        project.add_file(path, lines)
+    return project
+
+
+def run_project(project):
+    outputs = {}
+    metrics = project.run(file_callback=lambda project_file, text: outputs.__setitem__(project_file.path, text))
+    return outputs, metrics
+
+
+def test_packed_files_get_their_own_lines_back(make_translator, project_module):
+    translator = make_translator()
+    project = make_project(project_module, translator, [("a.txt", ["one\n", "two\n"]), ("b.txt", ["three\n"])])
+
+    outputs, metrics = run_project(project)
+
+    assert len(translator.prompts) == 1
+    assert outputs == {"a.txt": "ONE\nTWO\n", "b.txt": "THREE\n"}
+    assert metrics['failed_chunks'] == []
+
+
+def test_packed_line_count_mismatch_falls_back_to_one_request_per_file(make_translator, project_module):
+    def merge_first_lines(text):
+        # Like a model merging two lines: long responses come back one line short
+        lines = translator.placeholder_scheme.split_lines(text.strip().upper())
+        if len(lines) >= 4:
+            lines = [lines[0] + " " + lines[1]] + lines[2:]
+        return translator.LINE_BREAK_TOKEN.join(lines)
+
+    translator = make_translator(merge_first_lines)
+    translator.set_fuzzy_matching(True)
+    files = [("a.txt", ["one\n", "two\n"]), ("b.txt", ["three\n", "four\n"]), ("c.txt", ["five\n"])]
+    project = make_project(project_module, translator, files)
+
+    outputs, metrics = run_project(project)
+
+    assert outputs == {"a.txt": "ONE\nTWO\n", "b.txt": "THREE\nFOUR\n", "c.txt": "FIVE\n"}
+    assert metrics['failed_chunks'] == []
+    assert len(translator.prompts) == 4  # The packed request, then one per file
+    # The misaligned packed response did not reach the translation memory
+    assert translator.translation_memory.lookup("French", "two") == "TWO"
@@ -0,0 +1,35 @@
+import pytest
+
+from llm_services.errors import RateLimited, TransientError, ContextTooLong, AuthError, InvalidRequest
+from translation_core.retry_policy import RetryPolicy, RETRY, SPLIT, GIVE_UP
+
+
+@pytest.fixture
+def policy():
+    return RetryPolicy(max_attempts=3, base_delay=1, max_delay=10, max_retry_after=60, jitter=0)
+
+
+def test_transient_errors_are_retried_with_backoff_until_max_attempts(policy):
+    first = policy.decide(TransientError("503"), 1)
+    second = policy.decide(TransientError("503"), 2)
+
+    assert (first.action, first.delay) == (RETRY, 2)
+    assert (second.action, second.delay) == (RETRY, 4)
+    assert policy.decide(TransientError("503"), 3).action == GIVE_UP
+
+
+def test_retry_after_hint_replaces_the_backoff(policy):
+    decision = policy.decide(RateLimited("429", retry_after=30), 1)
+
+    assert (decision.action, decision.delay) == (RETRY, 30)
+    assert policy.decide(RateLimited("429", retry_after=3600), 1).action == GIVE_UP
+
+
+def test_too_long_requests_are_split_when_possible(policy):
+    assert policy.decide(ContextTooLong("too long"), 1, can_split=True).action == SPLIT
+    assert policy.decide(ContextTooLong("too long"), 1, can_split=False).action == GIVE_UP
+
+
+@pytest.mark.parametrize("error", [AuthError("401"), InvalidRequest("400")])
+def test_errors_another_attempt_cannot_fix_are_given_up(policy, error):
+    assert policy.decide(error, 1).action == GIVE_UP
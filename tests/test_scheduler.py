@@ -0,0 +1,68 @@
+import threading
+
+from translation_core.scheduler import ChunkScheduler, MicroBatcher, estimate_tokens
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("日本語") == 3
+
+
+def test_single_worker_keeps_file_order_and_many_workers_start_largest_first():
+    assert ChunkScheduler(1).order([1, 5, 3]) == [0, 1, 2]
+    assert ChunkScheduler(4).order([1, 5, 3]) == [1, 2, 0]
+
+
+def test_run_collects_results_and_skips_after_stop():
+    started = []
+
+    def worker(index, task):
+        started.append(index)
+        return task * 2
+
+    results, skipped = ChunkScheduler(1).run([1, 2, 3], [1, 1, 1], worker, should_stop=lambda: len(started) >= 2)
+
+    assert results == {0: 2, 1: 4}
+    assert skipped == [2]
+
+
+def test_batchable_tasks_reach_the_micro_batcher_together():
+    sent = []
+
+    def send(key, items):
+        sent.append(list(items))
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(send, window=5.0, max_size=100, max_items=3)
+    tasks = ["a", "b", "c"]
+    results, _ = ChunkScheduler(1).run(tasks, [1, 1, 1], lambda i, task: batcher.submit("key", task, 1),
+                                       batchable=[True, True, True])
+
+    assert results == {0: "A", 1: "B", 2: "C"}
+    assert [sorted(items) for items in sent] == [["a", "b", "c"]]
+    assert batcher.stats() == {'batches': 1, 'batched_chunks': 3}
+
+
+def test_micro_batcher_sends_a_full_batch_at_once_and_raises_item_errors():
+    def send(key, items):
+        return [ValueError("bad") if item == "bad" else item for item in items]
+
+    batcher = MicroBatcher(send, window=10.0, max_size=100, max_items=2)
+    outcomes = {}
+
+    def submit(item):
+        try:
+            outcomes[item] = batcher.submit("key", item, 1)
+        except ValueError as e:
+            outcomes[item] = e
+
+    threads = [threading.Thread(target=submit, args=(item,)) for item in ("good", "bad")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert outcomes["good"] == "good"
+    assert isinstance(outcomes["bad"], ValueError)
+    assert batcher.stats()['batches'] == 1
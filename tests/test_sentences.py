@@ -0,0 +1,43 @@
+from translation_core.sentences import LineSplit, split_text
+
+
+def test_split_text_prefers_sentence_ends():
+    text = "First sentence here. Second one, with a clause. Third."
+
+    pieces = split_text(text, 25)
+
+    assert "".join(pieces) == text
+    assert pieces[0] == "First sentence here. "
+    assert all(len(piece) <= 25 for piece in pieces)
+
+
+def test_split_text_keeps_protected_spans_whole():
+    text = "aaaa [Root.GetName] bbbb"
+    start = text.index("[")
+    end = text.index("]") + 1
+
+    pieces = split_text(text, 8, protected=[(start, end)])
+
+    assert "".join(pieces) == text
+    assert any("[Root.GetName]" in piece for piece in pieces)
+
+
+def test_line_split_rebuilds_one_line():
+    line = "    Hello there. How are you today? Fine.\r\n"
+
+    split = LineSplit.split(line, 16)
+
+    assert split.pieces == ["Hello there.", "How are you", "today?", "Fine."]
+    assert split.leading == "    " and split.ending == "\r\n"
+    assert split.join(split.pieces) == line
+    assert split.join([piece.upper() for piece in split.pieces]) == line.upper()
+
+
+def test_short_line_is_not_split():
+    assert LineSplit.split("Short line\n", 100) is None
+
+
+def test_cjk_pieces_joined_with_latin_translations_get_a_space():
+    split = LineSplit.split("今日は晴れです。明日は雨です。\n", 8)
+
+    assert split.join(["It is sunny today.", "It rains tomorrow."]) == "It is sunny today. It rains tomorrow.\n"
@@ -0,0 +1,37 @@
+import re
+
+from translation_core.stream_parser import DelimitedSegmentParser, JsonStringLeafParser
+
+
+def test_delimited_segments_are_emitted_when_their_delimiter_arrives():
+    parser = DelimitedSegmentParser("<lb/>")
+
+    assert parser.feed("one<l") == []
+    assert parser.feed("b/>two<lb/>") == ["one", "two"]
+    assert parser.feed("three") == []
+    assert parser.close() == ["three"]
+
+
+def test_delimiter_pattern_matches_variants():
+    parser = DelimitedSegmentParser(re.compile(r"\s*<\s*lb\s*/?\s*>\s*", re.IGNORECASE))
+
+    assert parser.feed("one < LB /> two<lb>") == ["one", "two"]
+    assert parser.close() == [""]
+
+
+def test_empty_response_has_no_segments():
+    parser = DelimitedSegmentParser("<lb/>")
+
+    assert parser.close() == []
+
+
+def test_json_string_leaves_are_emitted_with_their_path():
+    parser = JsonStringLeafParser()
+    response = '```json\n{"French": ["Bonjour", "Au \\"revoir\\""], "German": ["Hallo", null, "Tsch'
+
+    leaves = parser.feed(response[:30]) + parser.feed(response[30:])
+    leaves += parser.feed('üss"]}\n```')
+
+    assert leaves == [(("French", 0), "Bonjour"), (("French", 1), 'Au "revoir"'),
+                      (("German", 0), "Hallo"), (("German", 2), "Tschüss")]
+    assert parser.close() == []
@@ -0,0 +1,43 @@
+import pytest
+
+
+def test_failover_does_not_send_streamed_lines_twice(make_translator):
+    router_module = pytest.importorskip("translation_core.router")
+    from llm_services.base_llm import BaseLLM
+    from llm_services.errors import TransientError
+
+    attempts = []
+
+    class FlakyStreamingLLM(BaseLLM):
+        """Streams two lines, then fails on the first request; later requests succeed."""
+        supports_streaming = True
+
+        def get_models(self):
+            return ["fake-model"]
+
+        def translate(self, text, target_language, model_name):
+            return "".join(self.translate_stream(text, target_language, model_name))
+
+        def translate_stream(self, text, target_language, model_name):
+            attempts.append(self)
+            yield "ONE<lb/>TWO<lb/>"
+            if len(attempts) == 1:
+                raise TransientError("connection reset", provider="Fake")
+            yield "THREE"
+
+    translator = make_translator()
+    translator.set_placeholder_scheme("tag")
+    router = router_module.ProviderRouter([router_module.RouteTarget("Fake", "fake-model", api_key="a"),
+                                           router_module.RouteTarget("Fake", "fake-model", api_key="b")])
+    translator.set_router(router)
+    for target in router.targets:
+        target.service = FlakyStreamingLLM(target.api_key)
+    translator.streaming_enabled = True
+    streamed = []
+
+    translated = translator.translate_line_list(["one\n", "two\n", "three\n"], "French", "fake-model",
+                                                segment_callback=lambda *segment: streamed.append(segment))
+
+    assert translated == ["ONE\n", "TWO\n", "THREE\n"]
+    assert len(attempts) == 2
+    assert streamed == [(1, 0, "ONE\n"), (1, 1, "TWO\n"), (1, 2, "THREE\n")]
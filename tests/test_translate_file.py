@@ -0,0 +1,22 @@
+import pytest
+
+
+def test_unreadable_file_raises_instead_of_returning_an_error_text(make_translator, tmp_path):
+    translator = make_translator()
+    translator.last_job_metrics = {'failed_chunks': [1]}
+
+    with pytest.raises(OSError):
+        translator.translate_file(str(tmp_path / "missing.txt"), "French", "fake-model")
+
+    assert translator.last_job_metrics == {}
+    assert translator.prompts == []
+
+
+def test_translate_file_replaces_the_metrics_of_the_previous_run(make_translator, tmp_path):
+    translator = make_translator()
+    translator.last_job_metrics = {'failed_chunks': [1]}
+    source = tmp_path / "empty.txt"
+    source.write_text("\n", encoding="utf-8")
+
+    assert translator.translate_file(str(source), "French", "fake-model") == ""
+    assert 'failed_chunks' not in translator.last_job_metrics
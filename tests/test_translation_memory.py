@@ -0,0 +1,44 @@
+from translation_core.translation_memory import FuzzyIndex, TranslationMemory, char_ngrams
+
+
+def test_char_ngrams_pads_short_texts():
+    assert char_ngrams("a") == {" a "}
+    assert char_ngrams("Ab  c") == char_ngrams("ab c")
+
+
+def test_fuzzy_index_finds_the_closest_entry_above_the_threshold():
+    index = FuzzyIndex()
+    index.add("The castle gate is open")
+    index.add("The castle gate is closed")
+    index.add("Something else entirely")
+
+    score, text = index.search("The castle gate is open!", 0.8)
+
+    assert text == "The castle gate is open"
+    assert 0.8 <= score < 1.0
+    assert index.search("Nothing like the others", 0.8) is None
+
+
+def test_fuzzy_index_uses_the_indexed_text():
+    index = FuzzyIndex()
+    index.add("Gold: 100", indexed_text="Gold: <k0/>")
+
+    assert index.search("Gold: <k0/>", 0.99) == (1.0, "Gold: 100")
+
+
+def test_translation_memory_lookups_and_stats():
+    memory = TranslationMemory()
+    memory.store("French", "Hello world", "Bonjour le monde")
+
+    assert memory.lookup("French", "Hello world") == "Bonjour le monde"
+    assert memory.lookup("German", "Hello world") is None
+    assert memory.fuzzy_lookup("French", "Hello world!", 0.8)[1:] == ("Hello world", "Bonjour le monde")
+    stats = memory.stats()
+    assert (stats['entries'], stats['hits'], stats['misses'], stats['fuzzy_hits']) == (1, 1, 1, 1)
+
+
+def test_translation_memory_normalizes_for_fuzzy_matching():
+    memory = TranslationMemory(normalize=lambda text: "".join("#" if c.isdigit() else c for c in text))
+    memory.store("French", "You have 3 coins", "Vous avez 3 pièces")
+
+    assert memory.fuzzy_lookup("French", "You have 7 coins", 0.99)[0] == 1.0
@@ -0,0 +1,40 @@
+def test_single_line_chunk_keeps_its_line_ending(make_translator):
+    translator = make_translator()
+    lines = ["Hello there. " * 120 + "\n", "tiny\n", "More words. " * 120 + "\n"]
+
+    translated = translator.translate_line_list(lines, "French", "fake-model")
+
+    assert len(translated) == 3
+    assert translated[1] == "TINY\n"
+    assert all(line.endswith("\n") for line in translated)
+
+
+def test_single_line_chunk_keeps_leading_space_and_crlf(make_translator):
+    translator = make_translator()
+
+    translated, failed = translator._translate_chunk_request(0, ["    indented\r\n"], "French", "fake-model")
+
+    assert not failed
+    assert translated == ["    INDENTED\r\n"]
+    assert "indented\r" not in translator.prompts[0]
+
+
+def test_one_item_micro_batch_keeps_its_line_ending(make_translator):
+    translator = make_translator()
+    translator.set_micro_batching(True, window=0)
+
+    translated = translator._translate_chunk(0, ["  tiny\n"], "French", "fake-model")
+
+    assert translated == (["  TINY\n"], False)
+    assert translator.micro_batcher.stats()["batches"] == 1
+
+
+def test_micro_batch_of_chunks_without_trailing_newlines(make_translator):
+    translator = make_translator()
+    translator.set_micro_batching(True, window=0)
+    items = [(0, ["first"], None), (1, ["second\n", "third"], None), (2, ["  fourth\r\n"], None)]
+
+    results = translator._send_micro_batch(("French", "fake-model"), items)
+
+    assert results == [(["FIRST"], False), (["SECOND\n", "THIRD"], False), (["  FOURTH\r\n"], False)]
+    assert len(translator.prompts) == 1
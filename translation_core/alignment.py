@@ -0,0 +1,101 @@
+import json
+import re
+
+ALIGNMENT_SUFFIX = ".align.json"  # Sidecar file of an output, next to it
+ALIGNMENT_VERSION = 1
+
+LINE_ENDING_PATTERN = re.compile(r'(\r?\n)?$')
+
+
+def line_ending(line):
+    return LINE_ENDING_PATTERN.search(line).group(0)
+
+
+def _normalized(text):
+    return text.replace('\r\n', '\n')
+
+
+class AlignmentMap:
+    """
+    Source line of every translated line of a job.
+
+    Translation keeps one translated line per source line, so entry n pairs source
+    line n with its translation. A translation may lack its line ending or hold
+    several lines, so the lines of the translated text are mapped back to the
+    entries that wrote them. Retranslation then sends the original source lines,
+    not the translated text.
+
+    Args:
+        source_lines (list): Source lines, with line endings
+        target_lines (list): Translated line of each source line
+        output_language (str, optional): Language of the translation
+        adapter (str, optional): Name of the format adapter the lines were translated
+            through; retranslation then sends them through it again
+    """
+
+    def __init__(self, source_lines, target_lines, output_language=None, adapter=None):
+        if len(source_lines) != len(target_lines):
+            raise ValueError(f"Alignment needs one translated line per source line, got {len(target_lines)} "
+                             f"for {len(source_lines)}")
+        self.source_lines = list(source_lines)
+        self.target_lines = list(target_lines)
+        self.output_language = output_language
+        self.adapter = adapter
+
+    def text(self):
+        """Return the translated text."""
+        return "".join(self.target_lines)
+
+    def matches(self, text):
+        """
+        Whether text is the translated text of this map, ignoring a trailing newline
+        added by a text widget and \\r\\n read as \\n. Edited text cannot be mapped back
+        to its source.
+        """
+        own = _normalized(self.text())
+        text = _normalized(text)
+        return text == own or text == own + "\n"
+
+    def trailing_newline(self, text):
+        """Return the newline a text widget added after the translated text, or an empty string."""
+        return "\n" if _normalized(text) == _normalized(self.text()) + "\n" else ""
+
+    def entries_of_text_lines(self):
+        """Return, for each line of text().split('\\n'), the indexes of the entries written on it."""
+        layout = [[]]
+        for index, target in enumerate(self.target_lines):
+            pieces = target.split('\n')
+            # The first piece continues the current text line, every other piece starts a new one
+            layout[-1].append(index)
+            for piece in pieces[1:]:
+                layout.append([index] if piece else [])
+        return layout
+
+    def update(self, index, translation):
+        """Replace the translation of entry index, keeping the line ending of its source line."""
+        self.target_lines[index] = translation.rstrip('\r\n') + line_ending(self.source_lines[index])
+
+    def save(self, path):
+        """Write the map to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': ALIGNMENT_VERSION,
+                'output_language': self.output_language,
+                'adapter': self.adapter,
+                'source_lines': self.source_lines,
+                'target_lines': self.target_lines,
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a map written by save().
+
+        Raises:
+            ValueError: If the file is not an alignment map
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get('version') != ALIGNMENT_VERSION:
+            raise ValueError(f"{path} is not an alignment map")
+        return cls(data['source_lines'], data['target_lines'], data.get('output_language'), data.get('adapter'))
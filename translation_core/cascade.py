@@ -0,0 +1,112 @@
+import threading
+from collections import deque
+
+from utils.config_manager import load_api_key
+from .router import _percentile
+
+# Cascade settings
+LATENCY_WINDOW = 200  # Number of recent request latencies kept per tier
+
+
+class CascadeTier:
+    """
+    A provider/model pair of a model cascade, with its prices and statistics.
+
+    Args:
+        provider (str): Provider name, as in SUPPORTED_LLM_SERVICES
+        model (str): Model name
+        api_key (str, optional): API key of the provider
+        input_cost (float): Price of one million input tokens
+        output_cost (float): Price of one million output tokens
+    """
+
+    def __init__(self, provider, model, api_key=None, input_cost=0.0, output_cost=0.0):
+        self.provider = provider
+        self.model = model
+        self.api_key = api_key
+        self.input_cost = float(input_cost)
+        self.output_cost = float(output_cost)
+        self.service = None  # Set by Translator.set_cascade()
+
+        # Statistics
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.failures = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.lines = 0  # Lines sent to this tier
+        self.escalated_lines = 0  # Lines passed on to the next tier
+
+    @property
+    def name(self):
+        return f"{self.provider}/{self.model}"
+
+    @property
+    def cost(self):
+        return (self.input_tokens * self.input_cost + self.output_tokens * self.output_cost) / 1_000_000
+
+
+class ModelCascade:
+    """
+    Tiers of models from cheapest to strongest.
+
+    Every chunk is first translated by the first tier. Lines whose translation
+    fails validation (lost markup, leftover placeholders, empty output, wrong
+    language) are sent again to the next tier, until the last tier, whose
+    translation is kept. Requests, latency, tokens and cost are counted per tier.
+    """
+
+    def __init__(self, tiers):
+        if not tiers:
+            raise ValueError("ModelCascade requires at least one tier")
+        self.tiers = list(tiers)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, entries):
+        """
+        Build a cascade from a list of dicts, cheapest first, such as
+        {"provider": "Google Gemini", "model": "gemini-1.5-flash", "input_cost": 0.075, "output_cost": 0.3}.
+        Costs are prices per million tokens. Tiers without an "api_key" use the key
+        saved for their provider.
+        """
+        tiers = []
+        for entry in entries:
+            api_key = entry.get('api_key') or load_api_key(entry['provider'])
+            tiers.append(CascadeTier(entry['provider'], entry['model'], api_key,
+                                     entry.get('input_cost', 0.0), entry.get('output_cost', 0.0)))
+        return cls(tiers)
+
+    def record_request(self, tier, latency, input_tokens, output_tokens=0, failed=False):
+        """Record a request sent to a tier, with its latency in seconds and estimated tokens."""
+        with self._lock:
+            tier.requests += 1
+            tier.input_tokens += input_tokens
+            tier.output_tokens += output_tokens
+            if failed:
+                tier.failures += 1
+            else:
+                tier.latencies.append(latency)
+
+    def record_lines(self, tier, lines, escalated):
+        """Record lines translated by a tier and how many of them were escalated."""
+        with self._lock:
+            tier.lines += lines
+            tier.escalated_lines += escalated
+
+    def snapshot(self):
+        """Return the statistics of every tier as a list of dicts."""
+        with self._lock:
+            return [{
+                'tier': t.name,
+                'requests': t.requests,
+                'failures': t.failures,
+                'lines': t.lines,
+                'escalated_lines': t.escalated_lines,
+                'escalation_rate': t.escalated_lines / t.lines if t.lines else 0.0,
+                'input_tokens': t.input_tokens,
+                'output_tokens': t.output_tokens,
+                'cost': t.cost,
+                'p50': _percentile(list(t.latencies), 0.5),
+                'p95': _percentile(list(t.latencies), 0.95),
+            } for t in self.tiers]
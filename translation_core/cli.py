@@ -0,0 +1,651 @@
+"""
+Headless command line interface for batch translation.
+
+Usage:
+    python -m translation_core translate mod/localisation --to Korean \\
+        --provider "Google Gemini" --model gemini-1.5-flash --concurrency 4 --output-dir out
+
+All input files and target languages are translated as one project: their
+chunks share a single queue and concurrency budget, and each output file is
+written as soon as its last chunk is done. With --pack, small files are packed
+together into shared requests; with --multilingual, each chunk is translated
+into all target languages by one structured request. With --previous-source,
+only lines added or changed since that revision are sent, and the rest is
+carried over from the existing translations at the output paths. With
+--save-alignment, the source line of every translated line is stored next to
+each output, and --retranslate later sends the source lines of the output lines
+that are not in the target language again. With --state-dir, the finished and
+quota-deferred chunks of every job are saved, so an interrupted run started again
+only sends the unfinished chunks.
+Files of a known format (see translation_core.formats) are sent through their
+format adapter, so only their translatable text goes into the prompts.
+
+The benchmark-placeholders command reports, per file, the tokens each placeholder
+scheme costs in the text sent, counted by the provider's tokenizer when --provider
+is given and approximated otherwise.
+
+Progress is written to stdout as one JSON object per line. Messages printed by
+the LLM services are sent to stderr so stdout stays machine readable. The exit
+code is 0 when everything was translated, 1 when any chunk or file failed and
+2 for invalid arguments or setup errors.
+"""
+import argparse
+import contextlib
+import fnmatch
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from utils.config_manager import load_api_keys, load_key_rate_limit
+from utils.file_handler import read_file, write_file
+from .translator import Translator, SUPPORTED_LLM_SERVICES
+from .router import ProviderRouter
+from .cascade import ModelCascade
+from .alignment import AlignmentMap, ALIGNMENT_SUFFIX
+from .project import TranslationProject
+from .deferred_queue import DEFAULT_MAX_DEFERRED_WAIT
+from .incremental import plan_incremental
+from .glossary import load_glossary
+from .markup import AUTO_PROFILE, PROFILE_NAMES
+from .placeholders import SCHEMES, DEFAULT_SCHEME, LEGACY_SCHEME, benchmark_placeholders
+from .formats import (get_adapter, segment_lines, segment_translations, pending_segments, expand_translations,
+                      AUTO_FORMAT, FORMAT_NAMES)
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED_CHUNKS = 1
+EXIT_USAGE = 2
+
+# File name patterns translated when a directory is given
+DEFAULT_INCLUDE_PATTERNS = ["*.yml", "*.yaml", "*.txt", "*.json", "*.csv", "*.tsv", "*.po", "*.pot"]
+
+# Environment variables checked for API keys before the saved config
+API_KEY_ENV_VARS = {
+    "OpenAI": "OPENAI_API_KEY",
+    "Anthropic": "ANTHROPIC_API_KEY",
+    "Google Gemini": "GOOGLE_API_KEY",
+}
+
+
+class ProgressReporter:
+    """Write progress events as JSON lines to a stream, safely from several threads."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {'event': event, 'time': round(time.time(), 3)}
+        record.update(fields)
+        with self._lock:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.stream.flush()
+
+
+def _has_magic(path):
+    return any(c in path for c in "*?[")
+
+
+def _glob_base(pattern):
+    """Return the leading directory of a glob pattern that contains no wildcards."""
+    parts = []
+    for part in re.split(r"[\\/]", pattern)[:-1]:
+        if _has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) if parts else "."
+
+
+def collect_input_files(inputs, include_patterns=None):
+    """
+    Expand files, glob patterns and directory trees into the files to translate.
+
+    Args:
+        inputs (list): Paths, glob patterns (e.g. "mod/**/*.yml") or directories
+        include_patterns (list, optional): File name patterns used inside directories
+
+    Returns:
+        list: (file path, path relative to its input root) tuples, without duplicates
+    """
+    include_patterns = include_patterns or DEFAULT_INCLUDE_PATTERNS
+    found = []
+    seen = set()
+
+    def add(path, root):
+        absolute = os.path.abspath(path)
+        if absolute not in seen:
+            seen.add(absolute)
+            found.append((path, os.path.relpath(path, root)))
+
+    for item in inputs:
+        if os.path.isdir(item):
+            for dirpath, dirnames, filenames in os.walk(item):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if any(fnmatch.fnmatch(filename, pattern) for pattern in include_patterns):
+                        add(os.path.join(dirpath, filename), item)
+        elif _has_magic(item):
+            base = _glob_base(item)
+            for path in sorted(glob.glob(item, recursive=True)):
+                if os.path.isfile(path):
+                    add(path, base)
+        elif os.path.isfile(item):
+            add(item, os.path.dirname(item) or ".")
+    return found
+
+
+def language_slug(language):
+    """Turn a language name such as "Korean (한국어)" into "korean" for file and directory names."""
+    name = language.split('(')[0].strip().lower()
+    return re.sub(r"[^\w]+", "_", name).strip("_") or "translated"
+
+
+def output_path_for(path, relative_path, language, output_dir=None, multiple_languages=False):
+    """
+    Return where the translation of a file is written.
+
+    With an output directory the input tree is mirrored inside it (under a
+    per-language subdirectory when several languages are requested). Without
+    one the translation is written next to the input as name_<language>.ext.
+    """
+    if output_dir:
+        if multiple_languages:
+            return os.path.join(output_dir, language_slug(language), relative_path)
+        return os.path.join(output_dir, relative_path)
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_{language_slug(language)}{ext}"
+
+
+def table_output_path(path, relative_path, output_dir=None):
+    """
+    Return where a table with one column per language (CSV) is written when several
+    languages fill it: a single file, at the mirrored path or next to the input as
+    name_translated.ext.
+    """
+    if output_dir:
+        return os.path.join(output_dir, relative_path)
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_translated{ext}"
+
+
+def resolve_api_key(provider, api_key=None):
+    """Return the API key(s) from the argument, the provider's environment variable or the saved config."""
+    if api_key:
+        return api_key
+    env_key = os.environ.get(API_KEY_ENV_VARS.get(provider, ""))
+    if env_key:
+        return env_key
+    return load_api_keys(provider)
+
+
+def incremental_plan_for(args, path, relative_path, language, lines, multiple_languages):
+    """
+    Diff a file against its previous source revision and existing translation.
+
+    Returns:
+        IncrementalPlan, or None when the previous source or translation is missing
+    """
+    if os.path.isdir(args.previous_source):
+        previous_path = os.path.join(args.previous_source, relative_path)
+    else:
+        previous_path = args.previous_source
+    output_path = output_path_for(path, relative_path, language, args.output_dir, multiple_languages)
+    if not (os.path.isfile(previous_path) and os.path.isfile(output_path)):
+        return None
+    old_source = read_file(previous_path)
+    old_translation = read_file(output_path)
+    if old_source is None or old_translation is None:
+        return None
+    return plan_incremental(old_source.splitlines(True), lines, old_translation.splitlines(True))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m translation_core",
+                                     description="Translate game text files with LLM APIs.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    translate = subparsers.add_parser("translate", help="Translate files, glob patterns or directory trees")
+    translate.add_argument("inputs", nargs="+", help="Files, glob patterns or directories to translate")
+    translate.add_argument("--to", dest="languages", action="append", required=True,
+                           help="Target language; repeat for several languages")
+    translate.add_argument("--provider", choices=sorted(SUPPORTED_LLM_SERVICES),
+                           help="LLM provider (defaults to the first --route target or --cascade tier)")
+    translate.add_argument("--model", help="Model name (defaults to the first --route target or --cascade tier)")
+    translate.add_argument("--api-key", help="API key, or several comma-separated keys; defaults to "
+                                             "the provider's environment variable or saved config")
+    translate.add_argument("--output-dir", help="Directory for the translated files; "
+                                                "defaults to name_<language>.ext next to each input")
+    translate.add_argument("--include", action="append",
+                           help=f"File name pattern used in directories (default: {' '.join(DEFAULT_INCLUDE_PATTERNS)})")
+    translate.add_argument("--chunk-size", type=int, help="Chunk size in characters")
+    translate.add_argument("--pack", action="store_true",
+                           help="Pack files that fit in one chunk into shared requests")
+    translate.add_argument("--pack-size", type=int,
+                           help="Characters per packed request (defaults to the chunk size)")
+    translate.add_argument("--multilingual", action="store_true",
+                           help="Ask for all target languages in one structured request per chunk")
+    translate.add_argument("--templates", action="store_true",
+                           help="Translate lines that differ only by numbers or variables once, as shared templates")
+    translate.add_argument("--format", default=AUTO_FORMAT, choices=FORMAT_NAMES,
+                           help="File format adapter: only the translatable text of the format is sent "
+                                "(default: detect from each file; plain: translate whole lines)")
+    translate.add_argument("--json-include", action="append", metavar="POINTER_PATTERN",
+                           help="Only translate JSON strings whose pointer matches this pattern, e.g. '/strings/*' "
+                                "(repeatable)")
+    translate.add_argument("--json-exclude", action="append", metavar="POINTER_PATTERN",
+                           help="Never translate JSON strings whose pointer matches this pattern; replaces the "
+                                "default exclusions such as '*/id' (repeatable)")
+    translate.add_argument("--po-force", action="store_true",
+                           help="Retranslate PO entries that already have a translation")
+    translate.add_argument("--markup", default=AUTO_PROFILE, choices=PROFILE_NAMES,
+                           help="Engine markup kept out of translation: paradox, unity, rpgmaker or renpy tokens, "
+                                "or generic identifier heuristics (default: detect from the input files)")
+    translate.add_argument("--placeholders", default=DEFAULT_SCHEME, choices=sorted(SCHEMES),
+                           help="How protected spans and line breaks are written in requests "
+                                f"(default: {DEFAULT_SCHEME}); see benchmark-placeholders")
+    translate.add_argument("--glossary",
+                           help="Glossary file (JSON, CSV or TSV of term, translation[, language]); the terms "
+                                "found in a chunk are added to its prompt")
+    translate.add_argument("--fuzzy-tm", action="store_true",
+                           help="Reuse earlier translations of lines that differ only in protected tokens and show "
+                                "the model those of similar lines; implies --templates, through which project "
+                                "translation reuses translations")
+    translate.add_argument("--previous-source",
+                           help="Previous revision of the input (file or directory); only lines changed since it "
+                                "are translated, the rest is carried over from the existing output files")
+    translate.add_argument("--save-alignment", action="store_true",
+                           help=f"Store the source line of every translated line next to each output "
+                                f"(<output>{ALIGNMENT_SUFFIX})")
+    translate.add_argument("--retranslate", action="store_true",
+                           help="For outputs with a stored alignment, only retranslate the lines that are not in the "
+                                "target language, from their source lines")
+    translate.add_argument("--concurrency", type=int, default=1, help="Chunks translated concurrently")
+    translate.add_argument("--key-rpm", type=int,
+                           help="Requests per minute allowed for each of several API keys (defaults to the "
+                                "provider's key_rate_limits entry in the saved config; 0 for unlimited)")
+    translate.add_argument("--route", help="JSON file with a list of provider/model route targets")
+    translate.add_argument("--cascade",
+                           help="JSON file with a list of provider/model tiers, cheapest first; lines rejected "
+                                "by a tier are escalated to the next one")
+    translate.add_argument("--hedge", action="store_true",
+                           help="Hedge slow requests with a duplicate; only streamed requests, which can be cancelled")
+    translate.add_argument("--whole-lines", action="store_true",
+                           help="Send lines longer than the chunk size whole instead of splitting them at sentence boundaries")
+    translate.add_argument("--micro-batch", action="store_true",
+                           help="Send small chunks (single lines, short files) together in one request")
+    translate.add_argument("--no-stream", action="store_true", help="Do not stream responses")
+    translate.add_argument("--max-quota-wait", type=float,
+                           help="Longest time in seconds to park a job until the API quota resets")
+    translate.add_argument("--state-dir",
+                           help="Save the finished and quota-deferred chunks of every job in this directory, so "
+                                "running the same translation again only sends the unfinished chunks")
+
+    benchmark = subparsers.add_parser("benchmark-placeholders",
+                                      help="Compare the tokens each placeholder scheme costs on files")
+    benchmark.add_argument("inputs", nargs="+", help="Files, glob patterns or directories")
+    benchmark.add_argument("--include", action="append",
+                           help=f"File name pattern used inside directories (default: {' '.join(DEFAULT_INCLUDE_PATTERNS)})")
+    benchmark.add_argument("--provider", choices=sorted(SUPPORTED_LLM_SERVICES),
+                           help="Count tokens with this provider's tokenizer (default: approximate counts)")
+    benchmark.add_argument("--model", help="Model whose tokenizer is used with --provider")
+    benchmark.add_argument("--api-key", help="API key of the provider")
+    benchmark.add_argument("--chunk-size", type=int, help="Chunk size in characters")
+    benchmark.add_argument("--format", default=AUTO_FORMAT, choices=FORMAT_NAMES, help="File format adapter")
+    benchmark.add_argument("--markup", default=AUTO_PROFILE, choices=PROFILE_NAMES, help="Engine markup profile")
+    return parser
+
+
+def create_translator(args, reporter):
+    """Create and configure the Translator for the parsed arguments, or return None on a setup error."""
+    route_entries = None
+    if args.route:
+        try:
+            with open(args.route, 'r', encoding='utf-8') as f:
+                route_entries = json.load(f)
+        except (IOError, ValueError) as e:
+            reporter.emit('error', message=f"Cannot read route file {args.route}: {e}")
+            return None
+        if not route_entries:
+            reporter.emit('error', message=f"Route file {args.route} has no targets")
+            return None
+        args.provider = args.provider or route_entries[0]['provider']
+        args.model = args.model or route_entries[0]['model']
+
+    cascade_entries = None
+    if args.cascade:
+        try:
+            with open(args.cascade, 'r', encoding='utf-8') as f:
+                cascade_entries = json.load(f)
+        except (IOError, ValueError) as e:
+            reporter.emit('error', message=f"Cannot read cascade file {args.cascade}: {e}")
+            return None
+        if not cascade_entries:
+            reporter.emit('error', message=f"Cascade file {args.cascade} has no tiers")
+            return None
+        args.provider = args.provider or cascade_entries[0]['provider']
+        args.model = args.model or cascade_entries[0]['model']
+
+    if not args.provider or not args.model:
+        reporter.emit('error', message="--provider and --model are required without --route or --cascade")
+        return None
+
+    translator = Translator(args.provider, resolve_api_key(args.provider, args.api_key))
+    if translator.llm_service is None:
+        reporter.emit('error', message=f"{args.provider} service could not be initialized; check the API key")
+        return None
+
+    if args.chunk_size:
+        reporter.emit('config', message=translator.set_chunk_size(args.chunk_size))
+    reporter.emit('config', message=translator.set_concurrency(args.concurrency))
+    key_rpm = args.key_rpm if args.key_rpm is not None else load_key_rate_limit(args.provider)
+    if key_rpm and translator.key_pool:
+        reporter.emit('config', message=translator.set_key_rate_limit(key_rpm))
+    if args.hedge:
+        reporter.emit('config', message=translator.set_hedging(True))
+    if args.whole_lines:
+        reporter.emit('config', message=translator.set_long_line_splitting(False))
+    if args.micro_batch:
+        reporter.emit('config', message=translator.set_micro_batching(True))
+    if args.templates or args.fuzzy_tm:
+        reporter.emit('config', message=translator.set_templating(True))
+    if args.markup != AUTO_PROFILE:
+        reporter.emit('config', message=translator.set_markup_profile(args.markup))
+    if args.placeholders != DEFAULT_SCHEME:
+        reporter.emit('config', message=translator.set_placeholder_scheme(args.placeholders))
+    if args.glossary:
+        try:
+            glossary = load_glossary(args.glossary)
+        except (IOError, ValueError) as e:
+            reporter.emit('error', message=f"Cannot read glossary {args.glossary}: {e}")
+            return None
+        reporter.emit('config', message=translator.set_glossary(glossary))
+    if args.fuzzy_tm:
+        reporter.emit('config', message=translator.set_fuzzy_matching(True))
+    if args.no_stream:
+        reporter.emit('config', message=translator.set_streaming(False))
+    if args.max_quota_wait is not None or args.state_dir:
+        max_wait = args.max_quota_wait if args.max_quota_wait is not None else DEFAULT_MAX_DEFERRED_WAIT
+        reporter.emit('config', message=translator.set_deferred_retry(True, max_wait=max_wait,
+                                                                      state_dir=args.state_dir))
+    if route_entries:
+        reporter.emit('config', message=translator.set_router(ProviderRouter.from_config(route_entries)))
+    if cascade_entries:
+        try:
+            cascade = ModelCascade.from_config(cascade_entries)
+        except (KeyError, ValueError) as e:
+            reporter.emit('error', message=f"Invalid cascade file {args.cascade}: {e}")
+            return None
+        reporter.emit('config', message=translator.set_cascade(cascade))
+    return translator
+
+
+def run_translate(args, reporter):
+    """Run the translate command and return the exit code."""
+    files = collect_input_files(args.inputs, args.include)
+    if not files:
+        reporter.emit('error', message="No input files found")
+        return EXIT_USAGE
+
+    translator = create_translator(args, reporter)
+    if translator is None:
+        return EXIT_USAGE
+
+    multiple_languages = len(args.languages) > 1
+    reporter.emit('start', files=len(files), languages=args.languages, provider=args.provider, model=args.model)
+    start_time = time.time()
+    failed_files = 0
+    failed_chunks_total = 0
+
+    contents = []
+    for path, relative_path in files:
+        content = read_file(path)
+        if content is None:
+            reporter.emit('file_error', file=path, error="Cannot read file")
+            failed_files += 1
+            continue
+        contents.append((path, relative_path, content))
+    # All files share the translator, so one markup profile is detected for the whole run
+    translator.detect_markup_profile("".join(content for _, _, content in contents),
+                                     progress_callback=lambda message: reporter.emit('config', message=message))
+
+    # All files and languages share one chunk queue and the translator's concurrency
+    project = TranslationProject(translator, args.languages, args.model, pack_small_files=args.pack,
+                                 pack_size=args.pack_size, multilingual_requests=args.multilingual)
+    plans = {}  # (path, language) -> IncrementalPlan of files translated incrementally
+    format_options = {
+        'json': {'include': args.json_include, 'exclude': args.json_exclude},
+        'po': {'force': args.po_force},
+    }
+    documents = {}  # (path, language) -> (adapter, document, pending segment indexes, segment count)
+    table_languages = {}  # Path -> languages still filling their column of a shared table
+    source_lines = {}  # Path -> lines of the file, for the alignments of its outputs
+    retranslations = []  # (path, language, output path) of outputs retranslated from their alignment
+
+    def add_lines(path, relative_path, adapter, lines, languages):
+        if adapter is None:
+            project.add_file(path, lines, relative_path, languages)
+            return
+        document, segments = adapter.extract(lines)
+        if adapter.fills_columns and multiple_languages:
+            table_languages[path] = set(languages)
+        # Languages that need the same segments share one entry, so its chunks are split once
+        groups = {}
+        for language in languages:
+            indexes = pending_segments(adapter, document, segments, language)
+            documents[(path, language)] = (adapter, document, indexes, len(segments))
+            groups.setdefault(tuple(indexes), []).append(language)
+        for indexes, group in groups.items():
+            project.add_file(path, segment_lines([segments[index] for index in indexes]), relative_path, group)
+
+    for path, relative_path, content in contents:
+        lines = content.splitlines(True)
+        source_lines[path] = lines
+        languages = args.languages
+        if args.retranslate:
+            # Outputs with a stored alignment are retranslated line by line instead
+            languages = []
+            for language in args.languages:
+                output_path = output_path_for(path, relative_path, language, args.output_dir, multiple_languages)
+                if os.path.exists(output_path + ALIGNMENT_SUFFIX):
+                    retranslations.append((path, language, output_path))
+                else:
+                    languages.append(language)
+            if not languages:
+                continue
+        adapter = get_adapter(args.format, path, lines, format_options)
+        if adapter is not None:
+            reporter.emit('format', file=path, format=adapter.name)
+        # Adapters that do not keep the lines of the file cannot be merged line by line
+        if not args.previous_source or (adapter is not None and not adapter.preserves_lines):
+            add_lines(path, relative_path, adapter, lines, languages)
+            continue
+        # Languages whose delta is the same share one entry, so its chunks are split once
+        deltas = {}
+        for language in languages:
+            plan = incremental_plan_for(args, path, relative_path, language, lines, multiple_languages)
+            if plan is None:
+                deltas.setdefault(None, (lines, []))[1].append(language)
+                continue
+            plans[(path, language)] = plan
+            delta_lines = plan.delta_lines
+            reporter.emit('incremental', file=path, language=language, message=plan.summary())
+            deltas.setdefault(tuple(delta_lines), (delta_lines, []))[1].append(language)
+        for delta_lines, languages in deltas.values():
+            add_lines(path, relative_path, adapter, delta_lines, languages)
+    write_errors = []
+
+    def on_progress(message):
+        reporter.emit('progress', message=message)
+
+    def on_file_done(project_file, translated):
+        key = (project_file.path, project_file.language)
+        translated_lines = project_file.translated_lines()
+        if key in documents:
+            adapter, document, indexes, segment_count = documents[key]
+            translations = expand_translations(indexes, segment_translations(translated_lines), segment_count)
+            translated_lines = list(adapter.reinject(document, translations, project_file.language))
+        plan = plans.get(key)
+        if plan is not None:
+            translated_lines = plan.merge(translated_lines)
+        translated = "".join(translated_lines)
+        output_path = output_path_for(project_file.path, project_file.relative_path, project_file.language,
+                                      args.output_dir, multiple_languages)
+        if project_file.path in table_languages:
+            # Every language fills its column of one table, written once the last one is done
+            remaining = table_languages[project_file.path]
+            remaining.discard(project_file.language)
+            if remaining:
+                return
+            output_path = table_output_path(project_file.path, project_file.relative_path, args.output_dir)
+        output_directory = os.path.dirname(output_path)
+        if output_directory:
+            os.makedirs(output_directory, exist_ok=True)
+        if not write_file(output_path, translated):
+            write_errors.append(project_file)
+            reporter.emit('file_error', file=project_file.path, language=project_file.language,
+                          error=f"Cannot write {output_path}")
+            return
+        # Adapters that rewrite the lines of a file have no line alignment with it
+        if (args.save_alignment and project_file.path not in table_languages
+                and (key not in documents or documents[key][0].preserves_lines)):
+            save_alignment(output_path, source_lines[project_file.path], translated_lines, project_file.language,
+                           documents[key][0].name if key in documents else None)
+        reporter.emit('file_done', file=project_file.path, language=project_file.language, output=output_path,
+                      total_chunks=len(project_file.chunks), failed_chunks=sorted(project_file.failed_chunks),
+                      seconds=round(time.time() - start_time, 2))
+
+    for path, language, output_path in retranslations:
+        if not retranslate_output(translator, args, reporter, path, language, output_path, on_progress, start_time):
+            failed_files += 1
+
+    try:
+        metrics = project.run(progress_callback=on_progress, file_callback=on_file_done)
+        failed_files += len(write_errors)
+        failed_chunks_total += len(metrics['failed_chunks'])
+    except Exception as e:
+        reporter.emit('error', message=str(e))
+        failed_files += len(contents) * len(args.languages)
+
+    reporter.emit('summary', files=len(files), languages=len(args.languages), failed_files=failed_files,
+                  failed_chunks=failed_chunks_total, seconds=round(time.time() - start_time, 2))
+    return EXIT_FAILED_CHUNKS if failed_files or failed_chunks_total else EXIT_OK
+
+
+def save_alignment(output_path, lines, translated_lines, language, adapter_name=None):
+    """Store the alignment of an output next to it, if its lines match the source lines."""
+    if len(translated_lines) != len(lines):
+        return
+    try:
+        AlignmentMap(lines, translated_lines, language, adapter_name).save(output_path + ALIGNMENT_SUFFIX)
+    except IOError as e:
+        print(f"Cannot write alignment of {output_path}: {e}", file=sys.stderr)
+
+
+def retranslate_output(translator, args, reporter, path, language, output_path, on_progress, start_time):
+    """
+    Retranslate the lines of an existing output that are not in the target language,
+    from the source lines stored in its alignment, and write it back.
+
+    Returns:
+        bool: Whether the output could be retranslated
+    """
+    try:
+        alignment = AlignmentMap.load(output_path + ALIGNMENT_SUFFIX)
+    except (IOError, ValueError, KeyError) as e:
+        reporter.emit('file_error', file=path, language=language, error=f"Cannot read alignment: {e}")
+        return False
+    text = read_file(output_path)
+    if text is None or not alignment.matches(text):
+        reporter.emit('file_error', file=path, language=language,
+                      error=f"{output_path} was changed after it was translated; translate it again without --retranslate")
+        return False
+    detection = translator.detect_untranslated_sections(alignment.text(), language)
+    flagged = [line_index for line_index, _ in detection['untranslated_lines']]
+    if flagged:
+        text = translator.retranslate_aligned_lines(alignment, flagged, language, args.model, on_progress)
+        if not write_file(output_path, text):
+            reporter.emit('file_error', file=path, language=language, error=f"Cannot write {output_path}")
+            return False
+        alignment.save(output_path + ALIGNMENT_SUFFIX)
+    reporter.emit('file_done', file=path, language=language, output=output_path, retranslated_lines=len(flagged),
+                  seconds=round(time.time() - start_time, 2))
+    return True
+
+
+def run_benchmark(args, reporter):
+    """
+    Run the benchmark-placeholders command and return the exit code.
+
+    The text of each file is chunked and protected like for translation, and the
+    tokens of the protected chunks are counted with every placeholder scheme. The
+    model repeats the placeholders and line breaks in its output, so output tokens
+    are saved about as much as the input tokens reported.
+    """
+    files = collect_input_files(args.inputs, args.include)
+    if not files:
+        reporter.emit('error', message="No input files found")
+        return EXIT_USAGE
+    if args.provider and not args.model:
+        reporter.emit('error', message="--model is required with --provider")
+        return EXIT_USAGE
+
+    translator = Translator(args.provider, resolve_api_key(args.provider, args.api_key) if args.provider else None)
+    count_tokens = None
+    if args.provider:
+        if translator.llm_service is None:
+            reporter.emit('error', message=f"{args.provider} service could not be initialized; check the API key")
+            return EXIT_USAGE
+        count_tokens = lambda text: translator.llm_service.count_tokens(text, args.model)
+    if args.chunk_size:
+        translator.set_chunk_size(args.chunk_size)
+    if args.markup != AUTO_PROFILE:
+        translator.set_markup_profile(args.markup)
+
+    contents = [(path, read_file(path)) for path, _ in files]
+    translator.detect_markup_profile("".join(content for _, content in contents if content))
+    totals = {name: 0 for name in SCHEMES}
+    measured = True
+    for path, content in contents:
+        if content is None:
+            reporter.emit('file_error', file=path, error="Cannot read file")
+            continue
+        lines = content.splitlines(True)
+        adapter = get_adapter(args.format, path, lines)
+        if adapter is not None:
+            _, segments = adapter.extract(lines)
+            lines = segment_lines(segments)
+        results = benchmark_placeholders(translator, lines, count_tokens)
+        legacy_tokens = results[LEGACY_SCHEME]['tokens']
+        for name, result in results.items():
+            totals[name] += result['tokens']
+            measured = measured and result['measured']
+        reporter.emit('benchmark', file=path, format=adapter.name if adapter else None,
+                      tokens={name: result['tokens'] for name, result in results.items()},
+                      saved={name: legacy_tokens - result['tokens'] for name, result in results.items()},
+                      placeholders=results[LEGACY_SCHEME]['placeholders'],
+                      line_breaks=results[LEGACY_SCHEME]['line_breaks'],
+                      counted_by=args.provider if all(r['measured'] for r in results.values()) else "approximation")
+
+    legacy_total = totals[LEGACY_SCHEME]
+    reporter.emit('summary', files=len(files), tokens=totals,
+                  saved_percent={name: round(100.0 * (legacy_total - tokens) / legacy_total, 1) if legacy_total else 0.0
+                                 for name, tokens in totals.items()},
+                  cheapest=min(totals, key=totals.get), counted_by=args.provider if measured else "approximation")
+    return EXIT_OK
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    reporter = ProgressReporter(sys.stdout)
+    # Service and translator messages are printed; keep them off the JSON progress stream
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.command == "translate":
+            return run_translate(args, reporter)
+        if args.command == "benchmark-placeholders":
+            return run_benchmark(args, reporter)
+    return EXIT_USAGE
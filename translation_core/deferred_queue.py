@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Deferred retry settings
+DEFAULT_STATE_DIR = None  # Directory for the state files of unfinished jobs; None keeps the state in memory
+DEFAULT_QUOTA_RESET_WAIT = 60  # Seconds to park when the provider gave no reset time
+DEFAULT_MAX_DEFERRED_WAIT = 900  # Longest time a job parks in-process; longer resets are left for a later run
+MAX_DEFERRED_ROUNDS = 3  # Passes over the deferred chunks before the job gives up on them
+
+
+def job_key(lines, output_language, model_name, chunk_size, settings=None):
+    """
+    Return a key identifying a translation job by its input and settings.
+
+    Args:
+        settings (optional): JSON-serializable settings that change the translation,
+            such as the provider, glossary and placeholder scheme
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([output_language, model_name, chunk_size, settings], ensure_ascii=False,
+                             sort_keys=True).encode('utf-8'))
+    for line in lines:
+        digest.update(line.encode('utf-8', errors='surrogatepass'))
+    return digest.hexdigest()
+
+
+class DeferredQueue:
+    """
+    Persistent state of a chunked translation job.
+
+    Keeps the translated lines of every completed chunk and the chunks deferred
+    because the provider's quota ran out, together with the time the quota is
+    expected to reset. With a path, the state is also saved to an append-only
+    JSON-lines file, so a job that is stopped and started again with the same input
+    and settings only sends the chunks that are not finished yet. Without a path the
+    state lives only as long as the job.
+
+    Args:
+        path (str): State file, or None to keep the state in memory
+        key (str): Key of the job, from job_key()
+        total_chunks (int): Number of chunks of the job
+    """
+
+    def __init__(self, path, key, total_chunks):
+        self.path = path
+        self.key = key
+        self.total_chunks = total_chunks
+        self.completed = {}  # Chunk index -> translated lines
+        self.deferred = set()  # Chunk indexes waiting for the quota to reset
+        self.resume_at = 0.0  # Time at which deferred chunks may be sent again
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_job(cls, state_dir, lines, output_language, model_name, chunk_size, total_chunks, settings=None):
+        """
+        Create the queue for a job, loading the saved state of an earlier run of the same job.
+
+        Args:
+            state_dir (str): Directory of the state files, or None to keep the state in memory
+            settings (optional): Settings that change the translation; see job_key()
+        """
+        key = job_key(lines, output_language, model_name, chunk_size, settings)
+        path = os.path.join(state_dir, f"{key[:16]}.jsonl") if state_dir else None
+        queue = cls(path, key, total_chunks)
+        queue.load()
+        return queue
+
+    def load(self):
+        """
+        Load the saved state if it belongs to this job.
+
+        Returns:
+            bool: True if an earlier run's state was loaded
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        except (IOError, ValueError) as e:
+            print(f"Ignoring unreadable job state {self.path}: {e}")
+            return False
+        if not records or records[0].get('job') != self.key or records[0].get('total_chunks') != self.total_chunks:
+            return False
+
+        for record in records[1:]:
+            if 'done' in record:
+                self.completed[record['done']] = record['lines']
+                self.deferred.discard(record['done'])
+            elif 'defer' in record:
+                self.deferred.add(record['defer'])
+                self.resume_at = max(self.resume_at, record.get('resume_at', 0.0))
+        return True
+
+    def _append(self, record):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            if is_new:
+                f.write(json.dumps({'job': self.key, 'total_chunks': self.total_chunks}) + "\n")
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def record_done(self, index, lines):
+        """Save the translated lines of a completed chunk."""
+        with self._lock:
+            self.completed[index] = list(lines)
+            self.deferred.discard(index)
+            self._append({'done': index, 'lines': list(lines)})
+
+    def defer(self, index, wait=None):
+        """
+        Park a chunk until the quota resets.
+
+        Args:
+            index (int): Chunk index
+            wait (float, optional): Seconds until the provider's quota resets, if known
+        """
+        with self._lock:
+            self.deferred.add(index)
+            if wait is not None:
+                self.resume_at = max(self.resume_at, time.time() + wait)
+            self._append({'defer': index, 'resume_at': self.resume_at})
+
+    def take_deferred(self):
+        """Return the deferred chunk indexes in order and empty the deferred set."""
+        with self._lock:
+            indexes = sorted(self.deferred)
+            self.deferred.clear()
+            return indexes
+
+    def wait_time(self):
+        """Return the seconds left until deferred chunks may be sent again."""
+        return max(0.0, self.resume_at - time.time())
+
+    def clear(self):
+        """Delete the saved state once the job has finished."""
+        with self._lock:
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
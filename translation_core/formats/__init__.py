@@ -0,0 +1,48 @@
+"""
+File format adapters.
+
+An adapter extracts the translatable text of a file as segments and reinjects
+the translations, keeping keys and structure out of the prompts. See
+FormatAdapter for the contract.
+"""
+from .base import (FormatAdapter, SEGMENT_NEWLINE, segment_lines, segment_translations, pending_segments,
+                   expand_translations)
+from .paradox_yaml import ParadoxYamlAdapter
+from .json_table import JsonAdapter
+from .csv_table import CsvAdapter
+from .po_catalog import PoAdapter
+
+ADAPTERS = {adapter.name: adapter for adapter in (ParadoxYamlAdapter, JsonAdapter, CsvAdapter, PoAdapter)}
+AUTO_FORMAT = "auto"  # Detect the adapter from the file
+PLAIN_FORMAT = "plain"  # Translate whole lines without an adapter
+FORMAT_NAMES = [AUTO_FORMAT, PLAIN_FORMAT] + list(ADAPTERS)
+DETECT_HEAD_LINES = 20  # Lines looked at to detect a format
+
+
+def get_adapter(format_name, path, lines, options=None):
+    """
+    Return the adapter for a file, or None to translate its lines as they are.
+
+    Args:
+        format_name (str): "auto", "plain" or the name of an adapter
+        path (str): Path of the file
+        lines (list): Lines of the file
+        options (dict, optional): Adapter name -> keyword arguments of that adapter,
+            e.g. {"json": {"include": ["/strings/*"]}}
+
+    Raises:
+        ValueError: If format_name is unknown
+    """
+    options = options or {}
+    if format_name == PLAIN_FORMAT:
+        return None
+    if format_name == AUTO_FORMAT:
+        head = lines[:DETECT_HEAD_LINES]
+        for name, adapter_class in ADAPTERS.items():
+            adapter = adapter_class(**options.get(name, {}))
+            if adapter.detect(path, head):
+                return adapter
+        return None
+    if format_name not in ADAPTERS:
+        raise ValueError(f"Unknown format '{format_name}', expected one of: {', '.join(FORMAT_NAMES)}")
+    return ADAPTERS[format_name](**options.get(format_name, {}))
@@ -0,0 +1,108 @@
+import os
+import re
+
+# Newlines inside a segment are sent as this tag, so every segment stays one line of
+# the chunked pipeline; tags are protected from translation like any other markup
+SEGMENT_NEWLINE = "<nl/>"
+
+# ISO codes of output languages, by words of their names
+LANGUAGE_CODES = {
+    'english': 'en', 'korean': 'ko', 'japanese': 'ja', 'french': 'fr', 'german': 'de', 'spanish': 'es',
+    'russian': 'ru', 'vietnamese': 'vi', 'thai': 'th', 'indonesian': 'id', 'portuguese': 'pt',
+    'italian': 'it', 'polish': 'pl', 'turkish': 'tr',
+}
+
+
+def language_code(output_language):
+    """
+    Return the language code of an output language name, e.g. "Korean (한국어)" -> "ko",
+    "Chinese Traditional" -> "zh_TW", or None if it is not known.
+    """
+    words = re.findall(r'\w+', output_language.lower())
+    if 'chinese' in words:
+        return 'zh_TW' if 'traditional' in words else 'zh_CN'
+    for word in words:
+        if word in LANGUAGE_CODES:
+            return LANGUAGE_CODES[word]
+    return None
+
+
+class FormatAdapter:
+    """
+    Base class of file format adapters.
+
+    An adapter reads a file in one pass and splits it into the text worth translating
+    and everything else (keys, structure, comments), then writes the file back with
+    the translations put in place and everything else unchanged:
+
+        document, segments = adapter.extract(lines)
+        output = "".join(adapter.reinject(document, translations, output_language))
+
+    Segments are (key, text) pairs; translations hold one string, or None to keep the
+    source text, for each segment.
+    """
+
+    name = None  # Name used to select the adapter, e.g. with --format
+    extensions = ()  # Lowercase file extensions the adapter may handle
+    preserves_lines = False  # True when reinject() yields exactly one line for each input line
+    fills_columns = False  # True when each language fills its own part of one shared output file
+
+    def detect(self, path, head):
+        """
+        Return whether the file looks like this format.
+
+        Args:
+            path (str): Path of the file
+            head (list): The first lines of the file
+        """
+        return os.path.splitext(path)[1].lower() in self.extensions
+
+    def extract(self, lines):
+        """
+        Parse the lines of a file.
+
+        Args:
+            lines (iterable): Lines of the file, each keeping its line ending; consumed once
+
+        Returns:
+            tuple: (document to pass to reinject(), list of (key, text) segments)
+        """
+        raise NotImplementedError
+
+    def needs_translation(self, document, index, output_language):
+        """Return whether segment index still needs a translation into output_language."""
+        return True
+
+    def reinject(self, document, translations, output_language):
+        """
+        Yield the text of the translated file, piece by piece.
+
+        Args:
+            document: Document returned by extract()
+            translations (list): One translation or None for each segment
+            output_language (str): Language translated into
+        """
+        raise NotImplementedError
+
+
+def pending_segments(adapter, document, segments, output_language):
+    """Return the indexes of the segments the adapter still needs translated into output_language."""
+    return [index for index in range(len(segments)) if adapter.needs_translation(document, index, output_language)]
+
+
+def expand_translations(indexes, translations, segment_count):
+    """Return a translation or None for every segment, given the translations of the segments at indexes."""
+    expanded = [None] * segment_count
+    for index, translation in zip(indexes, translations):
+        expanded[index] = translation
+    return expanded
+
+
+def segment_lines(segments):
+    """Return one line per segment, for sending segments through the line-based pipeline."""
+    return [text.replace('\r\n', '\n').replace('\n', SEGMENT_NEWLINE) + "\n" for _, text in segments]
+
+
+def segment_translations(translated_lines):
+    """Turn lines translated from segment_lines() back into segment texts."""
+    return [line.rstrip('\r\n').replace(SEGMENT_NEWLINE, '\n') for line in translated_lines]
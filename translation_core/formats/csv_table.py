@@ -0,0 +1,170 @@
+import csv
+import io
+import itertools
+import re
+
+from .base import FormatAdapter, language_code
+
+# Header names of the source text column, tried in order when none is configured
+SOURCE_COLUMN_NAMES = ('en', 'en_us', 'en-us', 'english', 'source', 'text', 'original')
+SIMPLIFIED_CHINESE_COLUMNS = ('zh', 'zh_cn', 'zh-cn', 'zh_hans', 'zh-hans', 'schinese')
+TRADITIONAL_CHINESE_COLUMNS = ('zh_tw', 'zh-tw', 'zh_hant', 'zh-hant', 'tchinese')
+
+
+def language_columns(output_language):
+    """
+    Return the header names a column of output_language may have, best first.
+
+    E.g. "Korean (한국어)" -> ["ko", "korean (한국어)", "korean", "한국어", ...]; codes also
+    match headers with a region suffix such as ko_KR.
+    """
+    lowered = output_language.strip().lower()
+    words = re.findall(r'\w+', lowered)
+    if 'chinese' in words:
+        names = list(TRADITIONAL_CHINESE_COLUMNS if 'traditional' in words else SIMPLIFIED_CHINESE_COLUMNS)
+    else:
+        code = language_code(output_language)
+        names = [code] if code else []
+    return names + [lowered] + words
+
+
+class CsvAdapter(FormatAdapter):
+    """
+    CSV and TSV string tables with one column per language (key,en,ko,ja,...).
+
+    The source column is sent and each output language fills its own column, found
+    by header name or code (ko, ko_KR, Korean) and appended when missing. Cells of the
+    target column that are already filled are not sent again. Rows that receive no
+    translation are written back exactly as they were read; translated rows are
+    written with the file's delimiter, quoting style and line ending, so quoted
+    fields with embedded newlines round-trip.
+
+    Args:
+        source_column (str): Header of the source column; detected by default
+        delimiter (str): Field delimiter; detected from the header line by default
+    """
+
+    name = "csv"
+    extensions = ('.csv', '.tsv')
+    fills_columns = True
+
+    def __init__(self, source_column=None, delimiter=None):
+        self.source_column = source_column
+        self.delimiter = delimiter
+
+    def _detect_delimiter(self, header_line):
+        if self.delimiter:
+            return self.delimiter
+        if '\t' in header_line:
+            return '\t'
+        return ';' if header_line.count(';') > header_line.count(',') else ','
+
+    def _source_index(self, header):
+        names = [name.strip().lower() for name in header]
+        if self.source_column:
+            if self.source_column.lower() not in names:
+                raise ValueError(f"Source column '{self.source_column}' not found in header: {', '.join(header)}")
+            return names.index(self.source_column.lower())
+        for candidate in SOURCE_COLUMN_NAMES:
+            if candidate in names:
+                return names.index(candidate)
+        return 1 if len(header) > 1 else 0
+
+    def extract(self, lines):
+        """
+        Returns:
+            tuple: (document, segments), where segments are (row key, source text) pairs
+                of the rows with source text
+        """
+        lines = iter(lines)
+        first_line = next(lines, "")
+        delimiter = self._detect_delimiter(first_line)
+        consumed = []  # Lines read by the csv reader for the current record
+
+        def record_lines():
+            for line in itertools.chain([first_line], lines):
+                consumed.append(line)
+                yield line
+
+        rows = []
+        raw_rows = []
+        for row in csv.reader(record_lines(), delimiter=delimiter):
+            rows.append(row)
+            raw_rows.append("".join(consumed))
+            consumed.clear()
+
+        document = {
+            'delimiter': delimiter,
+            'rows': rows,
+            'raw_rows': raw_rows,
+            'changed_rows': set(),
+            'segment_rows': [],  # Row index of each segment
+            'columns': {},  # Output language -> column index
+        }
+        segments = []
+        if not rows:
+            return document, segments
+        source = self._source_index(rows[0])
+        document['source'] = source
+        for row_index in range(1, len(rows)):
+            row = rows[row_index]
+            if source < len(row) and row[source].strip():
+                document['segment_rows'].append(row_index)
+                segments.append((row[0] if row else str(row_index), row[source]))
+        return document, segments
+
+    def _target_column(self, document, output_language):
+        """Return the column index of output_language, appending a column to the header if there is none."""
+        columns = document['columns']
+        if output_language in columns:
+            return columns[output_language]
+        header = document['rows'][0]
+        names = [name.strip().lower() for name in header]
+        candidates = language_columns(output_language)
+        for candidate in candidates:
+            for index, name in enumerate(names):
+                if name == candidate or (len(candidate) == 2 and re.match(rf'{candidate}[_-]\w+$', name)):
+                    columns[output_language] = index
+                    return index
+        header.append(candidates[0])
+        document['changed_rows'].add(0)
+        columns[output_language] = len(header) - 1
+        return columns[output_language]
+
+    def needs_translation(self, document, index, output_language):
+        column = self._target_column(document, output_language)
+        if column == document['source']:
+            return False
+        row = document['rows'][document['segment_rows'][index]]
+        return column >= len(row) or not row[column].strip()
+
+    def reinject(self, document, translations, output_language):
+        column = self._target_column(document, output_language)
+        rows = document['rows']
+        for index, translation in enumerate(translations):
+            if translation is None or not self.needs_translation(document, index, output_language):
+                continue
+            row_index = document['segment_rows'][index]
+            row = rows[row_index]
+            row.extend([""] * (column + 1 - len(row)))
+            row[column] = translation
+            document['changed_rows'].add(row_index)
+
+        for row_index, row in enumerate(rows):
+            raw = document['raw_rows'][row_index]
+            if row_index not in document['changed_rows']:
+                yield raw
+                continue
+            yield self._format_row(row, raw, document['delimiter'])
+
+    def _format_row(self, row, raw, delimiter):
+        """Write a row like its raw source row: same line ending, and every field quoted if they all were."""
+        ending = raw[len(raw.rstrip('\r\n')):]
+        stripped = raw.rstrip('\r\n')
+        quote_all = stripped.startswith('"') and stripped.endswith('"') and ('"' + delimiter + '"') in stripped
+        output = io.StringIO()
+        writer = csv.writer(output, delimiter=delimiter, lineterminator=ending or "\n",
+                            quoting=csv.QUOTE_ALL if quote_all else csv.QUOTE_MINIMAL)
+        writer.writerow(row)
+        text = output.getvalue()
+        return text if ending else text[:-1]
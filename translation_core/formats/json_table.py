@@ -0,0 +1,144 @@
+import fnmatch
+import json
+import re
+
+from .base import FormatAdapter
+
+# Strings and structural characters; everything between them (whitespace, numbers,
+# true/false/null) is copied as it is. JSON strings cannot hold raw newlines, so a
+# string never spans two lines of the file.
+TOKEN_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\],:]')
+
+# Leaves under these pointers are identifiers or file references rather than text
+DEFAULT_EXCLUDE_PATTERNS = ('*/id', '*/key', '*/icon', '*/image', '*/sound', '*/path', '*/url', '*/file')
+# Values without spaces made of identifier or path characters, like ui_ok or img/a.png
+IDENTIFIER_PATTERN = re.compile(r'^[\w./\\-]*(?:[_/\\]|\.\w)[\w./\\-]*$')
+
+
+def _compile_patterns(patterns):
+    """Compile fnmatch patterns into one regex, or None without patterns."""
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+
+def json_pointer(path):
+    """Return the JSON pointer (RFC 6901) of a path of keys and indexes, e.g. ("a", 0) -> "/a/0"."""
+    return "".join("/" + str(part).replace("~", "~0").replace("/", "~1") for part in path)
+
+
+class JsonAdapter(FormatAdapter):
+    """
+    JSON string tables (Unity, RPG Maker, i18next and similar).
+
+    The document is scanned line by line as a token stream, never built as a
+    dict: the translatable string values are collected by JSON pointer and the
+    text between them is kept as it is, so keys, key order, whitespace and the
+    escaping of untranslated strings are written back unchanged. Translated
+    strings are escaped the way their source string was (\\u escapes or not).
+
+    Only the parsing is incremental. The document keeps the raw text between the
+    strings, and Translator.translate_file() and the CLI read the whole file and
+    join the output before writing it, so a translation holds the file in memory a
+    few times over (source lines, document, segments and output). Files of a few
+    hundred MB need that much free memory.
+
+    Args:
+        include (list): fnmatch patterns of the pointers to translate; all by default
+        exclude (list): fnmatch patterns of pointers never translated, e.g. "*/id"
+    """
+
+    name = "json"
+    extensions = ('.json',)
+
+    def __init__(self, include=None, exclude=None):
+        self.include = list(include or [])
+        self.exclude = list(DEFAULT_EXCLUDE_PATTERNS if exclude is None else exclude)
+        self._include = _compile_patterns(self.include)
+        self._exclude = _compile_patterns(self.exclude)
+
+    def detect(self, path, head):
+        if not super().detect(path, head):
+            return False
+        text = "".join(head).lstrip('\ufeff').lstrip()
+        return text[:1] in ('{', '[')
+
+    def _is_translatable(self, pointer, value):
+        if self._include and not self._include.match(pointer):
+            return False
+        if self._exclude and self._exclude.match(pointer):
+            return False
+        if not any(char.isalpha() for char in value) or '://' in value:
+            return False
+        return not IDENTIFIER_PATTERN.match(value)
+
+    def extract(self, lines):
+        """
+        Returns:
+            tuple: (document, segments), where the document is a list of raw text pieces
+                and segment indexes, and segments are (JSON pointer, string value) pairs
+        """
+        parts = []  # Raw text, or the index of a translatable leaf
+        raw_leaves = []  # Source text of each translatable leaf, quotes and escapes included
+        segments = []
+        stack = []  # ['object', key, expecting_key] or ['array', index]
+        pending = []  # Raw text since the last translatable leaf
+
+        for line in lines:
+            position = 0
+            for match in TOKEN_PATTERN.finditer(line):
+                token = match.group(0)
+                if token[0] != '"':
+                    if token in '{[':
+                        stack.append(['object', None, True] if token == '{' else ['array', 0])
+                    elif token in '}]':
+                        if stack:
+                            stack.pop()
+                    elif token == ':':
+                        if stack and stack[-1][0] == 'object':
+                            stack[-1][2] = False
+                    elif stack:
+                        if stack[-1][0] == 'array':
+                            stack[-1][1] += 1
+                        else:
+                            stack[-1][2] = True
+                    continue
+
+                value = token[1:-1]
+                if '\\' in value:
+                    try:
+                        value = json.loads(token)
+                    except ValueError:
+                        pass
+                top = stack[-1] if stack else None
+                if top and top[0] == 'object' and top[2]:
+                    top[1] = value  # This string is a key
+                    continue
+                pointer = json_pointer(entry[1] for entry in stack)
+                if not self._is_translatable(pointer, value):
+                    continue
+                pending.append(line[position:match.start()])
+                parts.append("".join(pending))
+                pending = []
+                parts.append(len(segments))
+                raw_leaves.append(token)
+                segments.append((pointer, value))
+                position = match.end()
+            pending.append(line[position:])
+
+        parts.append("".join(pending))
+        return {'parts': parts, 'raw_leaves': raw_leaves}, segments
+
+    def reinject(self, document, translations, output_language):
+        raw_leaves = document['raw_leaves']
+        for part in document['parts']:
+            if isinstance(part, str):
+                yield part
+                continue
+            translation = translations[part]
+            raw = raw_leaves[part]
+            if translation is None:
+                yield raw
+            else:
+                # Keep \u escapes if the source string used them for non-ASCII text
+                yield json.dumps(translation, ensure_ascii='\\u' in raw)
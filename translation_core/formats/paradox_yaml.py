@@ -0,0 +1,100 @@
+import re
+
+from .base import FormatAdapter
+
+# Language header such as l_english:, optionally after a byte order mark
+HEADER_PATTERN = re.compile(r'^(\ufeff?\s*l_)([A-Za-z_]+)(:.*)$', re.DOTALL)
+# Entry such as  KEY:0 "value" # comment; the value runs to the last quote of the line
+ENTRY_PATTERN = re.compile(r'^(\s*[\w.\-\']+:\d*\s*")(.*)("[^"]*)$', re.DOTALL)
+
+# Names of the game languages, by words of output language names
+PARADOX_LANGUAGES = {
+    'english': 'english',
+    'french': 'french',
+    'german': 'german',
+    'spanish': 'spanish',
+    'russian': 'russian',
+    'polish': 'polish',
+    'turkish': 'turkish',
+    'korean': 'korean',
+    'japanese': 'japanese',
+    'portuguese': 'braz_por',
+    'brazilian': 'braz_por',
+}
+
+
+def paradox_language(output_language):
+    """Return the l_<language> name for an output language, e.g. "Korean (한국어)" -> "korean"."""
+    words = re.findall(r'[a-z]+', output_language.lower())
+    if 'chinese' in words:
+        return 'trad_chinese' if 'traditional' in words else 'simp_chinese'
+    for word in words:
+        if word in PARADOX_LANGUAGES:
+            return PARADOX_LANGUAGES[word]
+    return words[0] if words else output_language.lower()
+
+
+class ParadoxYamlAdapter(FormatAdapter):
+    """
+    Paradox localisation files (l_english: header, then KEY:0 "value" entries).
+
+    Only the quoted values are sent; keys, version numbers, indentation, comments and
+    the line endings are written back exactly as they were, and the header is renamed
+    to the output language.
+    """
+
+    name = "paradox_yaml"
+    extensions = ('.yml', '.yaml')
+    preserves_lines = True
+
+    def detect(self, path, head):
+        if not super().detect(path, head):
+            return False
+        for line in head:
+            stripped = line.lstrip('\ufeff').strip()
+            if stripped and not stripped.startswith('#'):
+                return bool(HEADER_PATTERN.match(line))
+        return False
+
+    def extract(self, lines):
+        """
+        Returns:
+            tuple: (document, segments), where the document is the list of lines and,
+                for each line, None or the (prefix, suffix) around its value
+        """
+        document = []
+        segments = []
+        for line in lines:
+            match = ENTRY_PATTERN.match(line)
+            if match and _is_translatable(match.group(2)):
+                key = match.group(1).strip().split(':', 1)[0]
+                document.append((line, (match.group(1), match.group(3))))
+                segments.append((key, match.group(2)))
+            else:
+                document.append((line, None))
+        return document, segments
+
+    def reinject(self, document, translations, output_language):
+        translations = iter(translations)
+        language = paradox_language(output_language)
+        header_done = False
+        for line, parts in document:
+            if parts is not None:
+                translation = next(translations)
+                yield line if translation is None else parts[0] + translation.replace('\n', '\\n') + parts[1]
+                continue
+            if not header_done:
+                match = HEADER_PATTERN.match(line)
+                if match:
+                    header_done = True
+                    yield match.group(1) + language + match.group(3)
+                    continue
+            yield line
+
+
+def _is_translatable(value):
+    """Return whether a value has text to translate, rather than nothing or a lone $reference$."""
+    stripped = value.strip()
+    if not any(char.isalpha() for char in stripped):
+        return False
+    return not re.fullmatch(r'\$[\w.|]+\$', stripped)
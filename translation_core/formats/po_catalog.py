@@ -0,0 +1,238 @@
+import re
+
+from .base import FormatAdapter, language_code
+
+KEYWORD_LINE_PATTERN = re.compile(r'^(msgctxt|msgid|msgid_plural|msgstr(?:\[(\d+)\])?)\s*(".*")\s*$')
+CONTINUATION_PATTERN = re.compile(r'^\s*(".*")\s*$')
+# printf and brace placeholders, which a translation must keep
+PLACEHOLDER_PATTERN = re.compile(r'%(?:\([^)]*\))?[-+ 0#]*\d*(?:\.\d+)?[sdifxXeEgGcru%]|\{[^{}]*\}')
+
+# Plural-Forms header of each language code
+PLURAL_FORMS = {
+    'ja': 'nplurals=1; plural=0;',
+    'ko': 'nplurals=1; plural=0;',
+    'zh_CN': 'nplurals=1; plural=0;',
+    'zh_TW': 'nplurals=1; plural=0;',
+    'vi': 'nplurals=1; plural=0;',
+    'th': 'nplurals=1; plural=0;',
+    'id': 'nplurals=1; plural=0;',
+    'en': 'nplurals=2; plural=(n != 1);',
+    'de': 'nplurals=2; plural=(n != 1);',
+    'es': 'nplurals=2; plural=(n != 1);',
+    'it': 'nplurals=2; plural=(n != 1);',
+    'pt': 'nplurals=2; plural=(n != 1);',
+    'tr': 'nplurals=2; plural=(n != 1);',
+    'fr': 'nplurals=2; plural=(n > 1);',
+    'ru': 'nplurals=3; plural=(n%10==1 && n%100!=11 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);',
+    'pl': 'nplurals=3; plural=(n==1 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);',
+}
+DEFAULT_NPLURALS = 2
+
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+
+
+def unquote(quoted):
+    """Return the text of a quoted PO string, e.g. '"a\\nb"' -> 'a<newline>b'."""
+    return re.sub(r'\\(.)', lambda m: _ESCAPES.get(m.group(1), '\\' + m.group(1)), quoted[1:-1])
+
+
+def quote(text):
+    """Return text as a quoted PO string."""
+    escaped = text.replace('\\', '\\\\').replace('"', '\\"').replace('\t', '\\t').replace('\r', '\\r')
+    return '"' + escaped.replace('\n', '\\n') + '"'
+
+
+def format_string(keyword, text, ending):
+    """Return the lines of a keyword and its string, split after each newline like msgmerge does."""
+    pieces = text.splitlines(True)
+    if len(pieces) <= 1:
+        return [f"{keyword} {quote(text)}{ending}"]
+    return [f'{keyword} ""{ending}'] + [quote(piece) + ending for piece in pieces]
+
+
+def nplurals(plural_forms):
+    match = re.search(r'nplurals\s*=\s*(\d+)', plural_forms or "")
+    return int(match.group(1)) if match else None
+
+
+class PoAdapter(FormatAdapter):
+    """
+    gettext PO and POT catalogs.
+
+    Each distinct msgid and msgid_plural text of the untranslated entries is sent
+    once, however many entries (contexts, references) share it. Entries that are
+    already translated and not fuzzy are kept unless forced. Translated entries get
+    msgstr, or msgstr[n] for every plural form of the output language, and are
+    flagged fuzzy when the translation is doubtful: placeholders differ from the
+    source, the text came back unchanged, or plural forms had to be guessed. The
+    header's Language and Plural-Forms are set for the output language; all other
+    lines are written back as they were.
+
+    Args:
+        force (bool): Also retranslate entries that already have a translation
+    """
+
+    name = "po"
+    extensions = ('.po', '.pot')
+
+    def __init__(self, force=False):
+        self.force = force
+
+    def extract(self, lines):
+        """
+        Returns:
+            tuple: (document, segments), where segments are the distinct source texts
+                of the entries to translate, keyed by their first msgid
+        """
+        entries = []
+        current = []
+        for line in lines:
+            if line.strip():
+                current.append(line)
+                continue
+            if current:
+                entries.append(self._parse_entry(current))
+                current = []
+            entries.append({'lines': [line], 'msgid': None})
+        if current:
+            entries.append(self._parse_entry(current))
+
+        segments = []
+        segment_index = {}  # Source text -> segment index
+        header = None
+        for entry in entries:
+            if entry['msgid'] is None:
+                continue
+            if entry['msgid'] == "" and entry['msgctxt'] is None:
+                header = entry
+                continue
+            translated = bool(entry['msgstr']) and all(entry['msgstr'].values())
+            if translated and not entry['fuzzy'] and not self.force:
+                continue
+            entry['pending'] = True
+            for field in ('msgid', 'msgid_plural'):
+                text = entry[field]
+                if text is None:
+                    continue
+                if text not in segment_index:
+                    segment_index[text] = len(segments)
+                    segments.append((entry['msgid'], text))
+                entry[field + '_segment'] = segment_index[text]
+
+        ending = next((line[len(line.rstrip('\r\n')):] for line in entries[0]['lines']), "\n") if entries else "\n"
+        return {'entries': entries, 'header': header, 'ending': ending or "\n"}, segments
+
+    def _parse_entry(self, lines):
+        entry = {'lines': lines, 'msgctxt': None, 'msgid': None, 'msgid_plural': None, 'msgstr': {},
+                 'msgstr_range': None, 'flags_line': None, 'fuzzy': False, 'pending': False}
+        field = None
+        for i, line in enumerate(lines):
+            text = line.rstrip('\r\n')
+            if text.startswith('#,'):
+                entry['flags_line'] = i
+                entry['fuzzy'] = 'fuzzy' in [flag.strip() for flag in text[2:].split(',')]
+                continue
+            if text.startswith('#'):
+                continue
+            match = KEYWORD_LINE_PATTERN.match(text)
+            if match:
+                keyword, plural_index, value = match.groups()
+                if keyword.startswith('msgstr'):
+                    field = ('msgstr', int(plural_index or 0))
+                    entry['msgstr'][field[1]] = unquote(value)
+                    start = entry['msgstr_range'][0] if entry['msgstr_range'] else i
+                    entry['msgstr_range'] = (start, i + 1)
+                else:
+                    field = keyword
+                    entry[keyword] = unquote(value)
+                continue
+            match = CONTINUATION_PATTERN.match(text)
+            if match and field:
+                if isinstance(field, tuple):
+                    entry['msgstr'][field[1]] += unquote(match.group(1))
+                    entry['msgstr_range'] = (entry['msgstr_range'][0], i + 1)
+                else:
+                    entry[field] += unquote(match.group(1))
+        return entry
+
+    def reinject(self, document, translations, output_language):
+        code = language_code(output_language)
+        plural_forms = PLURAL_FORMS.get(code)
+        header = document['header']
+        if header is not None and not plural_forms:
+            plural_forms = self._header_field(header, 'Plural-Forms')
+        plural_count = nplurals(plural_forms) or DEFAULT_NPLURALS
+        ending = document['ending']
+
+        for entry in document['entries']:
+            if entry is header and code:
+                yield from self._header_lines(entry, code, PLURAL_FORMS.get(code), ending)
+                continue
+            if not entry.get('pending'):
+                yield from entry['lines']
+                continue
+            singular = translations[entry['msgid_segment']]
+            plural = translations[entry['msgid_plural_segment']] if entry['msgid_plural'] is not None else None
+            if singular is None or (entry['msgid_plural'] is not None and plural is None):
+                yield from entry['lines']
+                continue
+
+            doubtful = not self._is_confident(entry['msgid'], singular)
+            if entry['msgid_plural'] is None:
+                msgstr_lines = format_string("msgstr", singular, ending)
+            else:
+                doubtful = doubtful or not self._is_confident(entry['msgid_plural'], plural) or plural_count > 2
+                # Languages without plural distinctions use the plural text for their only form
+                forms = [plural] if plural_count == 1 else [singular] + [plural] * (plural_count - 1)
+                msgstr_lines = []
+                for n, form in enumerate(forms):
+                    msgstr_lines.extend(format_string(f"msgstr[{n}]", form, ending))
+            yield from self._entry_lines(entry, msgstr_lines, doubtful, ending)
+
+    def _is_confident(self, source, translation):
+        """Whether a translation keeps the source's placeholders and actually changed the text."""
+        if sorted(PLACEHOLDER_PATTERN.findall(source)) != sorted(PLACEHOLDER_PATTERN.findall(translation)):
+            return False
+        return translation.strip() != source.strip() or not any(char.isalpha() for char in source)
+
+    def _entry_lines(self, entry, msgstr_lines, fuzzy, ending):
+        """Return the lines of an entry with new msgstr lines and its fuzzy flag set or cleared."""
+        lines = list(entry['lines'])
+        start, end = entry['msgstr_range'] or (len(lines), len(lines))
+        lines[start:end] = msgstr_lines
+
+        flags_line = entry['flags_line']
+        if flags_line is not None:
+            flags = [flag.strip() for flag in lines[flags_line].rstrip('\r\n')[2:].split(',') if flag.strip()]
+            flags = [flag for flag in flags if flag != 'fuzzy'] + (['fuzzy'] if fuzzy else [])
+            line_ending = lines[flags_line][len(lines[flags_line].rstrip('\r\n')):]
+            if flags:
+                lines[flags_line] = "#, " + ", ".join(flags) + line_ending
+            else:
+                del lines[flags_line]
+        elif fuzzy:
+            # Flags go after the other comments and before the previous msgid (#|) and the keywords
+            position = next((i for i, line in enumerate(lines) if not line.startswith('#') or line.startswith('#|')),
+                            len(lines))
+            lines.insert(position, "#, fuzzy" + ending)
+        if lines and not lines[-1].endswith(('\n', '\r')):
+            lines[-1] += ending
+        return lines
+
+    def _header_field(self, header, name):
+        match = re.search(rf'^{name}:\s*(.*)$', header['msgstr'].get(0, ""), re.MULTILINE)
+        return match.group(1).strip() if match else None
+
+    def _header_lines(self, header, code, plural_forms, ending):
+        """Return the header entry with its Language and Plural-Forms fields set."""
+        text = header['msgstr'].get(0, "")
+        fields = [('Language', code)] + ([('Plural-Forms', plural_forms)] if plural_forms else [])
+        for name, value in fields:
+            pattern = re.compile(rf'^{name}:.*$', re.MULTILINE)
+            if pattern.search(text):
+                text = pattern.sub(f"{name}: {value}", text, count=1)
+            else:
+                text += ("" if not text or text.endswith("\n") else "\n") + f"{name}: {value}\n"
+        if text == header['msgstr'].get(0, ""):
+            return header['lines']
+        return self._entry_lines(header, format_string("msgstr", text, ending), header['fuzzy'], ending)
@@ -0,0 +1,199 @@
+import csv
+import json
+import os
+import threading
+from collections import deque
+
+MAX_PROMPT_TERMS = 60  # Glossary terms added to one prompt; the first ones found in the text win
+
+
+def _fold(char):
+    """Lowercase a character, keeping it one character long so match positions stay valid."""
+    lowered = char.lower()
+    return lowered if len(lowered) == 1 else char
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+class Glossary:
+    """
+    Terminology list matched against chunks with an Aho-Corasick automaton.
+
+    All terms are compiled into one automaton, so finding which of thousands of
+    terms occur in a chunk takes a single pass over its text. Matching ignores case
+    and only accepts whole words: "Iron" matches "iron sword" but not "Ironclad".
+    Only the matched terms are added to the chunk's prompt.
+
+    Args:
+        terms (dict): Term -> translation, where a translation is either a string used
+            for every language or a dict of language -> string
+    """
+
+    def __init__(self, terms):
+        self.terms = []  # (term, translation or language dict)
+        self._goto = [{}]  # Node -> {character: child node}
+        self._fail = [0]  # Node -> failure link
+        self._output = [[]]  # Node -> indexes of the terms ending at that node
+        self._lock = threading.Lock()
+        self._chunk_terms = {}  # Chunk key -> terms added to its prompt, for stats()
+
+        for term, translation in terms.items():
+            term = term.strip()
+            if not term or not translation:
+                continue
+            self._insert(term, len(self.terms))
+            self.terms.append((term, translation))
+        self._build_failure_links()
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _insert(self, term, index):
+        node = 0
+        for char in term:
+            char = _fold(char)
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][char] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = child
+        self._output[node].append(index)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text):
+        """
+        Return the indexes of the terms occurring in text as whole words, in order of first occurrence.
+        """
+        found = []
+        seen = set()
+        node = 0
+        for position, char in enumerate(text):
+            char = _fold(char)
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for index in self._output[node]:
+                if index in seen:
+                    continue
+                term = self.terms[index][0]
+                start, end = position + 1 - len(term), position + 1
+                if _is_word_char(term[0]) and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if _is_word_char(term[-1]) and end < len(text) and _is_word_char(text[end]):
+                    continue
+                seen.add(index)
+                found.append(index)
+        return found
+
+    def prompt_section(self, text, output_language, chunk=None):
+        """
+        Return the prompt section listing the glossary terms that occur in text.
+
+        Args:
+            text (str): Text of the chunk
+            output_language (str): Language whose translations are listed
+            chunk (hashable, optional): Key of the chunk; retries and the other language
+                prompts of a chunk with the same key are counted once by stats()
+
+        Returns:
+            tuple: (section followed by a blank line or "" when no term matched,
+                number of terms matched, number of terms added to the section)
+        """
+        matched = self.find(text)
+        entries = []
+        for index in matched:
+            term, translation = self.terms[index]
+            if isinstance(translation, dict):
+                translation = translation.get(output_language)
+                if not translation:
+                    continue
+            entries.append(f"- {term} => {translation}")
+            if len(entries) >= MAX_PROMPT_TERMS:
+                break
+
+        key = (chunk, text)
+        with self._lock:
+            self._chunk_terms[key] = max(self._chunk_terms.get(key, 0), len(entries))
+        if not entries:
+            return "", len(matched), 0
+        section = f"GLOSSARY for {output_language} (always translate these terms as given):\n" + "\n".join(entries) + "\n\n"
+        return section, len(matched), len(entries)
+
+    def reset_stats(self):
+        """Forget the chunks counted so far, at the start of a job."""
+        with self._lock:
+            self._chunk_terms = {}
+
+    def stats(self):
+        with self._lock:
+            counts = list(self._chunk_terms.values())
+        terms_injected = sum(counts)
+        return {
+            'terms': len(self.terms),
+            'chunks': len(counts),
+            'chunks_with_terms': sum(1 for count in counts if count),
+            'terms_injected': terms_injected,
+            'average_terms': terms_injected / len(counts) if counts else 0.0,
+        }
+
+
+def load_glossary(path):
+    """
+    Load a glossary file.
+
+    JSON files hold an object of term -> translation, where a translation may also
+    be an object of language -> translation. Other files are CSV, or TSV when the
+    first line has a tab, with rows of term, translation and an optional language;
+    a first row starting with "term" is skipped as a header.
+
+    Returns:
+        Glossary
+
+    Raises:
+        IOError: If the file cannot be read
+        ValueError: If the file is not a valid glossary
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        content = f.read()
+
+    if os.path.splitext(path)[1].lower() == '.json':
+        terms = json.loads(content)
+        if not isinstance(terms, dict):
+            raise ValueError("A JSON glossary must be an object of term -> translation")
+        return Glossary(terms)
+
+    first_line = content.split('\n', 1)[0]
+    rows = csv.reader(content.splitlines(), delimiter='\t' if '\t' in first_line else ',')
+    terms = {}
+    for number, row in enumerate(rows):
+        if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+            continue
+        if number == 0 and row[0].strip().lower() == 'term':
+            continue
+        if len(row) < 2:
+            raise ValueError(f"Line {number + 1} has no translation")
+        term, translation = row[0].strip(), row[1].strip()
+        if len(row) > 2 and row[2].strip():
+            existing = terms.get(term)
+            if not isinstance(existing, dict):
+                existing = terms[term] = {}
+            existing[row[2].strip()] = translation
+        else:
+            terms[term] = translation
+    return Glossary(terms)
@@ -0,0 +1,153 @@
+import hashlib
+import re
+
+# Keyed lines of localisation formats: KEY:0 "value", KEY: "value" or key = value
+KEYED_LINE_PATTERN = re.compile(r'^\s*([\w.\-]+)\s*(?::\d*|=)\s*\S')
+
+
+def line_key(line):
+    """Return the key of a key:value line, or None for other lines."""
+    match = KEYED_LINE_PATTERN.match(line)
+    return match.group(1) if match else None
+
+
+def line_hash(line):
+    """Return a hash of a line's content, ignoring surrounding whitespace and the line ending."""
+    return hashlib.sha1(line.strip().encode('utf-8', errors='surrogatepass')).hexdigest()
+
+
+def _line_ending(line):
+    return line[len(line.rstrip('\r\n')):]
+
+
+def _with_ending(line, ending):
+    return line.rstrip('\r\n') + ending
+
+
+class IncrementalPlan:
+    """
+    Which lines of a new source revision need translating, and the carried translations of the others.
+
+    entries holds one (source line, carried translation or None) pair per new source line.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.added = 0  # Lines whose key or content is not in the old source
+        self.changed = 0  # Keyed lines whose value changed
+        self.unchanged = 0  # Lines carried over from the old translation
+        self.removed = 0  # Keys of the old source missing from the new source
+
+    @property
+    def delta_lines(self):
+        """Return the source lines that need translating, in file order."""
+        return [source for source, carried in self.entries if carried is None]
+
+    def merge(self, translated_delta_lines):
+        """
+        Combine the carried translations with the translations of the delta lines.
+
+        Args:
+            translated_delta_lines (list): One translated line for each line of delta_lines
+
+        Returns:
+            list: The translated lines of the new source revision
+        """
+        if len(translated_delta_lines) != len(self.delta_lines):
+            raise ValueError(f"Expected {len(self.delta_lines)} translated lines, got {len(translated_delta_lines)}")
+        translated = iter(translated_delta_lines)
+        merged = []
+        for source, carried in self.entries:
+            line = carried if carried is not None else next(translated)
+            merged.append(_with_ending(line, _line_ending(source)))
+        return merged
+
+    def summary(self):
+        return (f"{len(self.delta_lines)} of {len(self.entries)} line(s) to translate: {self.added} added, "
+                f"{self.changed} changed, {self.unchanged} unchanged, {self.removed} removed")
+
+
+def plan_incremental(old_source_lines, new_source_lines, old_translation_lines):
+    """
+    Diff two source revisions and find which lines of the new one need translating.
+
+    Keyed lines (KEY:0 "value", key = value) are matched by key: a line whose key
+    exists in the old source with the same content reuses the old translation of
+    that key. Other lines are matched by a hash of their content and reuse the
+    translation at the same position of the old translation, which is only possible
+    when the old source and its translation have the same number of lines. Blank
+    lines are always carried as they are.
+
+    Args:
+        old_source_lines (list): Lines of the previous source revision
+        new_source_lines (list): Lines of the new source revision
+        old_translation_lines (list): Lines of the translation of the previous revision
+
+    Returns:
+        IncrementalPlan
+    """
+    old_by_key = {}
+    for line in old_source_lines:
+        key = line_key(line)
+        if key is not None:
+            old_by_key.setdefault(key, line.strip())
+
+    translation_by_key = {}
+    for line in old_translation_lines:
+        key = line_key(line)
+        if key is not None:
+            translation_by_key.setdefault(key, line)
+
+    translation_by_hash = {}
+    if len(old_source_lines) == len(old_translation_lines):
+        for source, translation in zip(old_source_lines, old_translation_lines):
+            if line_key(source) is None and source.strip():
+                translation_by_hash.setdefault(line_hash(source), translation)
+
+    plan = IncrementalPlan()
+    new_keys = set()
+    for line in new_source_lines:
+        if not line.strip():
+            plan.entries.append((line, line))
+            continue
+        key = line_key(line)
+        if key is not None:
+            new_keys.add(key)
+            if old_by_key.get(key) == line.strip() and key in translation_by_key:
+                plan.entries.append((line, translation_by_key[key]))
+                plan.unchanged += 1
+            else:
+                plan.entries.append((line, None))
+                if key in old_by_key:
+                    plan.changed += 1
+                else:
+                    plan.added += 1
+        else:
+            carried = translation_by_hash.get(line_hash(line))
+            plan.entries.append((line, carried))
+            if carried is None:
+                plan.added += 1
+            else:
+                plan.unchanged += 1
+    plan.removed = len(set(old_by_key) - new_keys)
+    return plan
+
+
+def translate_incremental(translator, old_source_lines, new_source_lines, old_translation_lines,
+                          output_language, selected_model, progress_callback=None):
+    """
+    Translate a new source revision, sending only the lines that changed since the old one.
+
+    Progress and job metrics of the translator cover only the translated delta.
+
+    Returns:
+        str: The translated text of the new source revision
+    """
+    plan = plan_incremental(old_source_lines, new_source_lines, old_translation_lines)
+    if progress_callback:
+        progress_callback(f"Incremental translation: {plan.summary()}")
+    delta_lines = plan.delta_lines
+    translated_delta = []
+    if delta_lines:
+        translated_delta = translator.translate_line_list(delta_lines, output_language, selected_model, progress_callback)
+    return "".join(plan.merge(translated_delta))
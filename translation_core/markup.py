@@ -0,0 +1,118 @@
+import re
+
+# Default placeholder of a protected span (the translator uses its PlaceholderScheme instead)
+PLACEHOLDER = "⟦{}⟧"
+PLACEHOLDER_PATTERN = re.compile(r'⟦\s*(\d+)\s*⟧')
+
+GENERIC_PROFILE = "generic"  # The KEYWORD_PATTERNS heuristics of the translator
+AUTO_PROFILE = "auto"  # Detect the profile from the text
+
+# Spans protected by every engine profile
+COMMON_PATTERNS = [
+    r'^[ \t]*[\w.\-]+:\d*(?=[ \t]*")',  # Keys at the start of KEY:0 "value" lines
+    r'__SLOT_\d+__',  # Template slots (see templating.py)
+    r'<nl/>',  # Newlines inside format adapter segments
+    r'\\[nrt"]',  # Escape sequences written out in the file
+    r'%(?:\d+\$)?[-+ 0#]*\d*(?:\.\d+)?[sdif]',  # printf specifiers
+    r'https?://\S+',  # URLs
+]
+
+# Engine markup, per profile. Color and style codes are protected on their own, so the
+# text they wrap is still translated.
+PROFILE_PATTERNS = {
+    'paradox': [
+        r'§[A-Za-z0-9!]',  # Color codes: §Y ... §!
+        r'\$[\w.|]+\$',  # Variables: $NAME$, $VALUE|Y$
+        r'\[[^\[\]\n]+\]',  # Scripted localisation and concepts: [Root.GetName], [Concept|E]
+        r'£[\w|]+£',  # Icons: £gold£
+        r'@\w+!',  # Text icons: @prestige!
+        r'#(?:[A-Za-z_][\w;]*[ \t]|!)',  # Text formatting: #bold ... #!
+    ],
+    'unity': [
+        r'</?[A-Za-z][\w-]*(?:=[^<>]*)?(?:\s[^<>]*)?/?>',  # Rich text tags: <color=#fff>, <b>, </size>
+        r'\{\d+(?::[^{}]*)?\}',  # Composite format items: {0}, {1:N2}
+        r'\{\{?[\w.]+\}?\}',  # Named fields: {player}, {{count}}
+    ],
+    'rpgmaker': [
+        r'\\[A-Za-z]+\[[^\]]*\]',  # Escapes with an argument: \C[2], \V[1], \N[3], \I[64]
+        r'\\[A-Za-z{}$.|!<>^\\]',  # Other escapes: \G, \{, \$, \., \|, \!, \>, \<, \^
+    ],
+    'renpy': [
+        r'\{/?[a-z]+(?:=[^{}]*)?\}',  # Text tags: {b}, {/b}, {color=#f00}, {w}, {p}
+        r'\[[\w.!:]+\]',  # Interpolation: [player], [count!t]
+        r'%\([\w]+\)[sd]',  # Old style interpolation: %(name)s
+    ],
+}
+
+# Markup typical of each engine, used to pick a profile for a text
+PROFILE_SIGNATURES = {
+    'paradox': re.compile(r'§[A-Z!]|\$\w+\$|£\w+£|\[\w+\.\w+|\[\w+\|E\]|^\s*l_\w+:', re.MULTILINE),
+    'unity': re.compile(r'<(?:color|size|material|sprite|link|align|mark)=|<(?:b|i|u)>'),
+    'rpgmaker': re.compile(r'\\[CVNIP]\[\d+\]|\\[G{}$.|!<>^]'),
+    'renpy': re.compile(r'\{/?(?:b|i|u|s|w|p|nw|fast|color|size)(?:=[^{}]*)?\}'),
+}
+PROFILE_NAMES = [AUTO_PROFILE, GENERIC_PROFILE] + list(PROFILE_PATTERNS)
+
+
+class MarkupLexer:
+    """
+    Single-pass tokenizer of an engine's markup.
+
+    All patterns of the profile are compiled into one alternation, so a text is
+    scanned once from left to right; each protected span is replaced by a compact
+    numbered placeholder and restored verbatim afterwards. Unlike the generic
+    heuristics, ordinary words (ALL-CAPS words, dotted abbreviations) are left
+    for translation.
+    """
+
+    def __init__(self, profile, extra_patterns=()):
+        """
+        Args:
+            profile (str): Name of an engine profile in PROFILE_PATTERNS
+            extra_patterns (iterable): More regexes of spans to protect, matched first
+        """
+        if profile not in PROFILE_PATTERNS:
+            raise ValueError(f"Unknown markup profile '{profile}', expected one of: {', '.join(PROFILE_PATTERNS)}")
+        self.profile = profile
+        patterns = list(extra_patterns) + PROFILE_PATTERNS[profile] + COMMON_PATTERNS
+        self.pattern = re.compile('|'.join(patterns), re.MULTILINE)
+
+    def protect(self, text, placeholder=PLACEHOLDER.format, spans=None):
+        """
+        Replace the markup in text with placeholders.
+
+        Args:
+            text (str): Text to protect
+            placeholder (function, optional): Returns the placeholder of span number n
+            spans (dict, optional): Spans of earlier lines of the same chunk; new spans
+                are added to it and numbered after them
+
+        Returns:
+            tuple: (protected text, dict of placeholder -> original span)
+        """
+        spans = {} if spans is None else spans
+
+        def replace(match):
+            key = placeholder(len(spans))
+            spans[key] = match.group(0)
+            return key
+
+        return self.pattern.sub(replace, text), spans
+
+
+def restore_placeholders(text, spans):
+    """Put the original spans back in place of their placeholders, tolerating spaces inside them."""
+    return PLACEHOLDER_PATTERN.sub(lambda m: spans.get(PLACEHOLDER.format(m.group(1)), m.group(0)), text)
+
+
+def detect_profile(text):
+    """
+    Return the engine profile whose markup occurs most often in text, or "generic"
+    when none of them does.
+    """
+    best, best_count = GENERIC_PROFILE, 0
+    for profile, signature in PROFILE_SIGNATURES.items():
+        count = len(signature.findall(text))
+        if count > best_count:
+            best, best_count = profile, count
+    return best
@@ -0,0 +1,117 @@
+import re
+
+# Pre-tokenization close to that of the BPE tokenizers used by the providers: letter
+# runs, digit groups of up to three, punctuation runs and whitespace
+_PRETOKEN_PATTERN = re.compile(r" ?[^\W\d_]+| ?\d{1,3}| ?[^\w\s]+|_+|\s+")
+
+
+class PlaceholderScheme:
+    """
+    How protected spans and line breaks are written in the text sent to a model.
+
+    A protected span is replaced by a numbered placeholder and the lines of a chunk
+    are joined by a line break token. Both come back in the model's output, so
+    they are paid for twice; the schemes differ in how many tokens they cost.
+    Placeholders and line breaks are recognized in responses even when the model
+    added spaces inside them or changed their case.
+
+    Args:
+        name (str): Name of the scheme
+        keyword_format (str): Placeholder of span n, formatted with n
+        keyword_pattern (str): Regex matching a placeholder in a response, capturing n
+        line_break (str): Token joining the lines of a chunk
+        line_break_pattern (str): Regex matching a line break token in a response
+    """
+
+    def __init__(self, name, keyword_format, keyword_pattern, line_break, line_break_pattern):
+        self.name = name
+        self.keyword_format = keyword_format
+        self.keyword_pattern = re.compile(keyword_pattern, re.IGNORECASE)
+        self.line_break = line_break
+        self.line_break_pattern = re.compile(line_break_pattern, re.IGNORECASE)
+
+    def keyword(self, n):
+        """Return the placeholder of protected span n."""
+        return self.keyword_format.format(n)
+
+    def restore(self, text, keywords):
+        """Replace the placeholders in text with their spans in one pass; unknown placeholders are kept."""
+        return self.keyword_pattern.sub(lambda m: keywords.get(self.keyword(int(m.group(1))), m.group(0)), text)
+
+    def split_lines(self, text):
+        """Split a response at its line break tokens."""
+        return self.line_break_pattern.split(text)
+
+
+LEGACY_SCHEME = "legacy"
+SCHEMES = {scheme.name: scheme for scheme in (
+    # __KEYWORD_12__ and __LINE_BREAK_TOKEN_7f8a31c2__: about 5 and 13 tokens
+    PlaceholderScheme(LEGACY_SCHEME, "__KEYWORD_{}__", r'__\s*KEYWORD_\s*(\d+)\s*__',
+                      "__LINE_BREAK_TOKEN_7f8a31c2__", r'[ \t]*__\s*LINE_BREAK_TOKEN_7f8a31c2\s*__[ \t]*'),
+    # ⟦12⟧ and ⟦¶⟧: the brackets are rare characters, one or two tokens each
+    PlaceholderScheme("bracket", "⟦{}⟧", r'⟦\s*(\d+)\s*⟧', "⟦¶⟧", r'\s*⟦\s*¶\s*⟧\s*'),
+    # <k12/> and <lb/>: about 3 to 4 tokens
+    PlaceholderScheme("tag", "<k{}/>", r'<\s*k\s*(\d+)\s*/?\s*>', "<lb/>", r'\s*<\s*lb\s*/?\s*>\s*'),
+)}
+DEFAULT_SCHEME = LEGACY_SCHEME  # The compact schemes are opt-in, see benchmark_placeholders()
+
+
+def approximate_tokens(text):
+    """
+    Approximate the number of tokens of a text as a BPE tokenizer would count them.
+
+    Unlike estimate_tokens() in the scheduler, which only looks at the length, this
+    counts the pieces a tokenizer splits identifiers and markup into, so it shows
+    the cost of sentinels like __LINE_BREAK_TOKEN_7f8a31c2__. Used when the provider
+    cannot count tokens.
+    """
+    count = 0
+    for piece in _PRETOKEN_PATTERN.findall(text):
+        stripped = piece.strip()
+        if piece.isascii():
+            count += 1 + len(stripped) // 8  # Long words are split into several tokens
+        elif stripped.isalpha():
+            count += len(stripped)  # CJK and other non-Latin letters: about one token each
+        else:
+            count += 2 * len(stripped) or 1  # Rare symbols take a token per byte pair
+    return count
+
+
+def benchmark_placeholders(translator, lines, count_tokens=None, scheme_names=None):
+    """
+    Count the tokens of the protected text the translator would send for lines
+    with each placeholder scheme.
+
+    Args:
+        translator (Translator): Translator whose chunking and protection are used;
+            its placeholder scheme is restored afterwards
+        lines (list): Lines to translate, with line endings
+        count_tokens (function, optional): count_tokens(text) -> int or None, e.g. a
+            provider's token counter; approximate_tokens() is used when it returns None
+        scheme_names (list, optional): Schemes to compare; all by default
+
+    Returns:
+        dict: Scheme name -> {'tokens': tokens sent, 'placeholders': placeholders sent,
+            'line_breaks': line break tokens sent, 'measured': whether every count came
+            from count_tokens}
+    """
+    previous = translator.placeholder_scheme.name
+    results = {}
+    try:
+        for name in scheme_names or list(SCHEMES):
+            translator.set_placeholder_scheme(name)
+            scheme = translator.placeholder_scheme
+            result = {'tokens': 0, 'placeholders': 0, 'line_breaks': 0, 'measured': True}
+            for chunk in translator.split_into_chunks(lines):
+                text, keywords = translator.protect_chunk(chunk)
+                tokens = count_tokens(text) if count_tokens else None
+                if tokens is None:
+                    tokens = approximate_tokens(text)
+                    result['measured'] = False
+                result['tokens'] += tokens
+                result['placeholders'] += len(keywords)
+                result['line_breaks'] += text.count(scheme.line_break)
+            results[name] = result
+    finally:
+        translator.set_placeholder_scheme(previous)
+    return results
@@ -0,0 +1,519 @@
+import threading
+import time
+
+from .scheduler import ChunkScheduler, estimate_tokens
+from .deferred_queue import DeferredQueue, MAX_DEFERRED_ROUNDS
+from .templating import TemplateTable
+
+# Packing settings
+MAX_PACKED_LINES = 150  # Most lines sent in one packed request, to keep line alignment reliable
+
+
+class ProjectFile:
+    """One output of a TranslationProject: a source file in one target language, and the state of its chunks."""
+
+    def __init__(self, path, lines, language, relative_path=None):
+        self.path = path
+        self.relative_path = relative_path or path
+        self.source_lines = lines
+        self.lines = lines  # Lines sent for translation; the templates this output owns when templating
+        self.language = language
+        self.chunks = []
+        self.results = {}  # Chunk index -> translated lines
+        self.failed_chunks = set()  # Chunk numbers (1-based) of failed chunks
+        self.remaining = 0  # Chunks without a final result yet
+        self.queue = None  # DeferredQueue when deferred retry is enabled
+        self.finished = False
+
+        # Templating state, see TranslationProject._apply_templates()
+        self.template_table = None
+        self.template_entries = None  # TemplateTable entries of the source lines
+        self.template_indexes = []  # Template index of each line in lines
+        self.template_translations = None  # Template index -> translation, shared by the outputs of a language
+
+    @property
+    def size(self):
+        return sum(len(line) for line in self.lines)
+
+    def translated_lines(self):
+        """Return the translated lines, keeping the original lines of chunks without a result."""
+        if self.template_entries is not None:
+            return self.template_table.render(self.template_entries, self.template_translations)
+        return [line for k in range(len(self.chunks)) for line in self.results.get(k, self.chunks[k])]
+
+    def record_template_translations(self):
+        """Add the translations of the templates this output sent to its language's translations."""
+        offset = 0
+        for k, chunk in enumerate(self.chunks):
+            if k in self.results and k + 1 not in self.failed_chunks:
+                for index, line in zip(self.template_indexes[offset:offset + len(chunk)], self.results[k]):
+                    self.template_translations[index] = line.strip()
+            offset += len(chunk)
+
+    def translated_text(self):
+        return "".join(self.translated_lines())
+
+
+class TranslationProject:
+    """
+    Translate many files into one or more languages through one global chunk queue.
+
+    The chunks of all files and languages go into a single ChunkScheduler, so they
+    share the translator's concurrency, request spacing, router and key pool instead
+    of each file paying its own startup and tail latency. Each source file is split
+    into chunks once for all languages, and each output is finished (and passed to
+    file_callback) as soon as its last chunk completes. Chunks deferred on API quota
+    are parked per output in a DeferredQueue, like in Translator.translate_lines().
+
+    With packing enabled, files that fit in one chunk are packed together into
+    requests of up to pack_size characters. Each packed request keeps the
+    (file, line range) of its parts and the translated lines are routed back to
+    their files, so a mod with many tiny files needs far fewer requests. A packed
+    response without exactly one line per source line is not used; its files are
+    then translated with one request each.
+
+    With multilingual requests enabled, each chunk is sent once for all languages
+    as a structured JSON request, falling back to one request per language when
+    the response cannot be used.
+    """
+
+    def __init__(self, translator, output_languages, selected_model, pack_small_files=False, pack_size=None,
+                 multilingual_requests=False):
+        """
+        Args:
+            translator (Translator): Configured translator whose settings and services are used
+            output_languages (str or list): Target language, or a list of target languages
+            selected_model (str): Model name
+            pack_small_files (bool): Pack files that fit in one chunk into shared requests
+            pack_size (int, optional): Characters per packed request; defaults to the translator's chunk size
+            multilingual_requests (bool): Ask for all languages in a single request per chunk
+        """
+        if isinstance(output_languages, str):
+            output_languages = [output_languages]
+        self.translator = translator
+        self.output_languages = list(output_languages)
+        self.selected_model = selected_model
+        self.pack_small_files = pack_small_files
+        self.pack_size = pack_size or translator.chunk_size
+        self.multilingual_requests = multilingual_requests
+        self.files = []
+
+    def add_file(self, path, lines, relative_path=None, languages=None):
+        """
+        Add a file given as a list of lines (each keeping its line ending).
+
+        Args:
+            languages (list, optional): Target languages of this file; defaults to all project languages
+
+        Returns:
+            list: The ProjectFile of each target language
+        """
+        languages = languages or self.output_languages
+        project_files = [ProjectFile(path, lines, language, relative_path) for language in languages]
+        self.files.extend(project_files)
+        return project_files
+
+    def _pack(self, parts):
+        """
+        Group (project file, chunk index) parts into request tasks.
+
+        Whole small files are packed greedily per language, in project order, up to
+        pack_size characters and MAX_PACKED_LINES lines per request; every other part
+        is a task of its own. With multilingual requests, tasks of different languages
+        that hold the same source lines are merged into one task.
+
+        Returns:
+            list: Tasks, each a tuple of (project file, chunk index) parts
+        """
+        tasks = []
+        for language in self.output_languages:
+            packed = []
+            packed_size = packed_lines = 0
+            for project_file, k in parts:
+                if project_file.language != language:
+                    continue
+                chunk = project_file.chunks[k]
+                if not (self.pack_small_files and len(project_file.chunks) == 1 and project_file.size <= self.pack_size):
+                    tasks.append(((project_file, k),))
+                    continue
+                if packed and (packed_size + project_file.size > self.pack_size or packed_lines + len(chunk) > MAX_PACKED_LINES):
+                    tasks.append(tuple(packed))
+                    packed = []
+                    packed_size = packed_lines = 0
+                packed.append((project_file, k))
+                packed_size += project_file.size
+                packed_lines += len(chunk)
+            if packed:
+                tasks.append(tuple(packed))
+
+        # Cascaded chunks are validated and escalated per language
+        if not self.multilingual_requests or len(self.output_languages) < 2 or self.translator.cascade:
+            return tasks
+        merged = {}  # Source layout -> merged task parts
+        for task in tasks:
+            layout = tuple((id(project_file.lines), k) for project_file, k in task)
+            merged.setdefault(layout, []).extend(task)
+        return [tuple(parts) for parts in merged.values()]
+
+    def _translate_task(self, task, progress_callback=None):
+        """
+        Translate the source lines of a task into each language of its parts.
+
+        Returns:
+            dict: Language -> (translated lines, whether they failed, deferral error or None); when a
+                packed request fell back to one request per file, whether they failed is a list
+                with one flag per part
+        """
+        translator = self.translator
+        languages = list(dict.fromkeys(project_file.language for project_file, _ in task))
+        source_parts = [(f, k) for f, k in task if f.language == languages[0]]
+        first_file = source_parts[0][0]
+        label = first_file.relative_path if len(source_parts) == 1 else f"{first_file.relative_path} +{len(source_parts) - 1} file(s)"
+        if len(self.output_languages) > 1:
+            label += f" -> {', '.join(languages)}"
+
+        def task_progress(message):
+            if progress_callback:
+                progress_callback(f"[{label}] {message}")
+
+        packed = len(source_parts) > 1
+        if not packed:
+            k = source_parts[0][1]
+            chunk_lines, chunk_number, chunk_count = first_file.chunks[k], k, len(first_file.chunks)
+        else:
+            # The parts are routed back by line offset, so a packed request must return
+            # exactly one line per source line (strict_line_count below)
+            chunk_lines = [line for f, k in source_parts for line in f.chunks[k]]
+            chunk_number, chunk_count = 0, 1
+
+        if len(languages) > 1:
+            try:
+                translations = translator.translate_chunk_multilingual(
+                    chunk_number, chunk_lines, languages, self.selected_model, task_progress
+                )
+                return {language: (translations[language], False, None) for language in languages}
+            except Exception as e:
+                task_progress(f"Multi-language request failed, translating each language separately: {e}")
+
+        outcomes = {}
+        for language in languages:
+            outcome = translator.translate_chunk(
+                chunk_number, chunk_lines, chunk_count, language, self.selected_model, task_progress,
+                strict_line_count=packed
+            )
+            if packed and outcome[1] and not outcome[2]:
+                task_progress(f"Packed request failed for {language}, translating its {len(source_parts)} file(s) separately")
+                outcome = self._translate_parts_separately(source_parts, language, task_progress)
+            outcomes[language] = outcome
+        return outcomes
+
+    def _translate_parts_separately(self, source_parts, language, progress_callback=None):
+        """
+        Translate the (project file, chunk index) parts of a packed task with one request each.
+
+        Returns:
+            tuple: (translated lines of all parts in order, list of whether each part failed,
+                the deferral error of a part, else None)
+        """
+        translated_lines = []
+        failed = []
+        for project_file, k in source_parts:
+            part_lines, part_failed, deferral_error = self.translator.translate_chunk(
+                k, project_file.chunks[k], len(project_file.chunks), language, self.selected_model, progress_callback
+            )
+            if deferral_error:
+                # The whole task is deferred and sent again
+                return [line for f, j in source_parts for line in f.chunks[j]], True, deferral_error
+            translated_lines.extend(part_lines)
+            failed.append(part_failed)
+        return translated_lines, failed, None
+
+    def _apply_templates(self):
+        """
+        Collapse the lines of all source files into templates shared across the project.
+
+        Each template is sent by the first output of its language that uses it and
+        only if the translation memory does not have it yet; the other outputs wait
+        for it. Each output's lines become the templates it sends.
+
+        Returns:
+            tuple: (TemplateTable, dict of language -> set of template indexes that are
+                final, whether translated or not)
+        """
+        translator = self.translator
+        table = TemplateTable()
+        source_entries = {}  # id(source lines) -> entries
+        owners = {}  # Template index -> id(source lines) of the first file using it
+        for project_file in self.files:
+            source_key = id(project_file.source_lines)
+            if source_key not in source_entries:
+                source_entries[source_key] = table.add_lines(project_file.source_lines)
+                for _, index, _, _ in source_entries[source_key]:
+                    if index is not None:
+                        owners.setdefault(index, source_key)
+
+        translations = {language: {} for language in self.output_languages}
+        settled = {language: set() for language in self.output_languages}
+        sent_lines = {}  # Outputs sending the same templates share one list, so it is chunked once
+        for project_file in self.files:
+            source_key = id(project_file.source_lines)
+            language_translations = translations[project_file.language]
+            entries = source_entries[source_key]
+            owned = sorted({index for _, index, _, _ in entries if index is not None and owners[index] == source_key})
+            to_send = []
+            for index in owned:
+                if index not in language_translations:
+                    translation = translator.memory_translation(project_file.language, table.templates[index])
+                    if translation is None:
+                        to_send.append(index)
+                        continue
+                    language_translations[index] = translation
+                settled[project_file.language].add(index)
+            shared = sent_lines.setdefault((source_key, tuple(to_send)), [table.templates[index] + "\n" for index in to_send])
+            project_file.template_table = table
+            project_file.template_entries = entries
+            project_file.template_indexes = to_send
+            project_file.template_translations = language_translations
+            project_file.lines = shared
+        return table, settled
+
+    def run(self, progress_callback=None, file_callback=None):
+        """
+        Translate all files.
+
+        Args:
+            progress_callback (function, optional): Called with progress messages
+            file_callback (function, optional): Called as file_callback(project_file, translated_text)
+                when an output is finished, from the worker thread that finished it
+
+        Returns:
+            dict: Project metrics; failed_chunks lists (relative path, language, chunk number) tuples
+        """
+        # Imported here because translator.py imports this module's siblings at load time
+        from .translator import BASE_DELAY
+
+        translator = self.translator
+        translator.begin_job(self.selected_model, progress_callback)
+
+        start_time = time.time()
+        state_lock = threading.Lock()
+        project_state = {'deferring': False, 'completed': 0}
+        finished_files = []
+        chunk_cache = {}  # Source lines are split once for all languages
+
+        table = None
+        if translator.templating_enabled:
+            table, settled = self._apply_templates()
+            sources = {id(f.source_lines): f.source_lines for f in self.files}
+            source_line_count = sum(len(lines) for lines in sources.values())
+            if progress_callback:
+                progress_callback(f"Templating: {source_line_count} line(s) in {len(sources)} file(s) collapsed into "
+                                  f"{len(table.templates)} template(s)")
+        else:
+            for project_file in self.files:
+                project_file.lines = project_file.source_lines
+                project_file.template_entries = None
+
+        def is_ready(project_file):
+            """Whether an output has all its chunks and all the templates it uses."""
+            if project_file.remaining or project_file.finished:
+                return False
+            if project_file.template_entries is None:
+                return True
+            needed = {index for _, index, _, _ in project_file.template_entries if index is not None}
+            return needed <= settled[project_file.language]
+
+        def settle(project_file):
+            """Record a finished output's template translations; return the outputs that became ready."""
+            project_file.record_template_translations()
+            settled[project_file.language].update(project_file.template_indexes)
+            for index in project_file.template_indexes:
+                if index in project_file.template_translations:
+                    translator.translation_memory.store(project_file.language, table.templates[index],
+                                                        project_file.template_translations[index])
+            return [f for f in self.files if f.language == project_file.language and is_ready(f)]
+
+        def take_ready(project_file):
+            """Return the outputs that can be finished now that project_file has all its chunks."""
+            ready = settle(project_file) if table is not None else [project_file]
+            for f in ready:
+                f.finished = True
+            return ready
+
+        parts = []  # (project file, chunk index) of every chunk still to translate
+        for project_file in self.files:
+            source_key = id(project_file.lines)
+            if source_key not in chunk_cache:
+                chunk_cache[source_key] = translator.split_into_chunks(project_file.lines)
+            project_file.chunks = chunk_cache[source_key]
+            if translator.deferred_retry_enabled:
+                project_file.queue = DeferredQueue.for_job(
+                    translator.deferred_state_dir, project_file.lines, project_file.language,
+                    self.selected_model, translator.chunk_size, len(project_file.chunks),
+                    translator.job_settings()
+                )
+                project_file.results.update(project_file.queue.completed)
+            pending_chunks = [k for k in range(len(project_file.chunks)) if k not in project_file.results]
+            project_file.remaining = len(pending_chunks)
+            parts.extend((project_file, k) for k in pending_chunks)
+
+        total_chunks = sum(len(f.chunks) for f in self.files)
+        total_parts = len(parts)
+        tasks = self._pack(parts)
+        requests_sent = 0
+        if progress_callback:
+            progress_callback(f"Starting project translation of {len({f.path for f in self.files})} file(s) "
+                              f"into {len(self.output_languages)} language(s), {total_chunks} chunk(s) "
+                              f"using {translator.llm_provider_name} ({self.selected_model})")
+            if len(parts) < total_chunks:
+                progress_callback(f"Resuming saved jobs: {total_chunks - len(parts)} chunk(s) already translated")
+            if len(tasks) < len(parts):
+                progress_callback(f"Combined {len(parts)} chunk(s) into {len(tasks)} request(s)")
+
+        def finish_file(project_file):
+            project_file.finished = True
+            if project_file.queue is not None and not project_file.failed_chunks:
+                project_file.queue.clear()
+            finished_files.append(project_file)
+            if file_callback:
+                file_callback(project_file, project_file.translated_text())
+
+        # Outputs with nothing to send (empty or fully resumed) are finished right away,
+        # unless they wait for templates sent by other outputs
+        for project_file in self.files:
+            if project_file.remaining == 0 and not project_file.finished:
+                for ready_file in take_ready(project_file):
+                    finish_file(ready_file)
+
+        def run_task(j, task):
+            outcomes = self._translate_task(task, progress_callback)
+
+            finished = []
+            done_parts = []
+            deferred_parts = []
+            with state_lock:
+                nonlocal requests_sent
+                requests_sent += 1
+                for language, (translated_lines, failed, deferral_error) in outcomes.items():
+                    offset = 0
+                    language_parts = [(f, k) for f, k in task if f.language == language]
+                    for n, (project_file, k) in enumerate(language_parts):
+                        part_failed = failed[n] if isinstance(failed, list) else failed
+                        count = len(project_file.chunks[k])
+                        part_lines = translated_lines[offset:offset + count]
+                        offset += count
+                        if deferral_error:
+                            project_state['deferring'] = True
+                            # Without a queue a quota failure is final, like in translate_lines()
+                            if project_file.queue is not None:
+                                deferred_parts.append((project_file, k, translator.deferral_wait(deferral_error)))
+                                continue
+                        project_file.results[k] = part_lines
+                        if part_failed:
+                            project_file.failed_chunks.add(k + 1)
+                        project_file.remaining -= 1
+                        project_state['completed'] += 1
+                        if project_file.remaining == 0:
+                            finished.extend(take_ready(project_file))
+                        if project_file.queue is not None and not part_failed:
+                            done_parts.append((project_file, k, part_lines))
+                completed = project_state['completed']
+
+            for project_file, k, part_lines in done_parts:
+                project_file.queue.record_done(k, part_lines)
+            for project_file, k, wait in deferred_parts:
+                project_file.queue.defer(k, wait)
+
+            for project_file in finished:
+                finish_file(project_file)
+                if progress_callback:
+                    name = project_file.relative_path
+                    if len(self.output_languages) > 1:
+                        name += f" ({project_file.language})"
+                    progress_callback(f"Finished {name} ({len(finished_files)}/{len(self.files)} outputs)")
+            if progress_callback:
+                progress_callback(f"Progress: {completed}/{total_parts} chunk(s)")
+
+        # One shared budget for all files: the translator's workers and request spacing
+        scheduler = ChunkScheduler(translator.max_workers, dispatch_interval=BASE_DELAY / translator.max_workers)
+        deferred_rounds = 0
+        pending = tasks
+
+        while pending:
+            pending_count = sum(len(task) for task in pending)
+            wait_time = max((f.queue.wait_time() for task in pending for f, _ in task if f.queue is not None), default=0.0)
+            if wait_time > translator.deferred_max_wait:
+                if progress_callback:
+                    progress_callback(f"API quota resets in {wait_time:.0f}s, longer than the {translator.deferred_max_wait:.0f}s wait limit. "
+                                      f"{pending_count} deferred chunk(s) are saved; run the same project again after the reset to finish them.")
+                break
+            if wait_time > 0:
+                if progress_callback:
+                    progress_callback(f"API quota exhausted: parking project for {wait_time:.0f}s until the quota resets ({pending_count} chunk(s) deferred)")
+                time.sleep(wait_time)
+
+            project_state['deferring'] = False
+            # Small single-file, single-language tasks can share a micro-batched request;
+            # packed tasks are already combined and are sent on their own
+            batchable = [len(task) == 1
+                         and translator.is_micro_batchable([line for f, k in task for line in f.chunks[k]])
+                         for task in pending]
+            _, skipped = scheduler.run(
+                pending, [sum(estimate_tokens("".join(f.chunks[k])) for f, k in task) for task in pending], run_task,
+                should_stop=lambda: project_state['deferring'], batchable=batchable
+            )
+            skipped_parts = [part for j in skipped for part in pending[j]]
+            if skipped_parts and progress_callback:
+                progress_callback(f"Deferring {len(skipped_parts)} remaining chunk(s) due to API quota limits. Will retry later.")
+            if not translator.deferred_retry_enabled:
+                pending = [(part,) for part in skipped_parts]
+                break
+            for project_file, k in skipped_parts:
+                project_file.queue.defer(k)
+            deferred_parts = []
+            for project_file in self.files:
+                if project_file.queue is not None:
+                    deferred_parts.extend((project_file, k) for k in project_file.queue.take_deferred())
+            pending = self._pack(deferred_parts)
+            if pending:
+                deferred_rounds += 1
+                if deferred_rounds > MAX_DEFERRED_ROUNDS:
+                    if progress_callback:
+                        progress_callback(f"Giving up on {len(deferred_parts)} deferred chunk(s) after {MAX_DEFERRED_ROUNDS} deferred retries.")
+                    break
+
+        # Chunks still deferred keep their original text
+        pending = [part for task in pending for part in task]
+        for project_file, k in pending:
+            project_file.failed_chunks.add(k + 1)
+        for project_file in self.files:
+            if not project_file.finished and project_file.template_entries is not None:
+                project_file.record_template_translations()
+        for project_file in self.files:
+            if not project_file.finished:
+                finish_file(project_file)
+
+        failed_files = [f for f in self.files if f.failed_chunks]
+        metrics = {
+            'files': len(self.files),
+            'languages': len(self.output_languages),
+            'total_chunks': total_chunks,
+            'failed_files': len(failed_files),
+            'failed_chunks': [(f.relative_path, f.language, n) for f in self.files for n in sorted(f.failed_chunks)],
+            'deferred_chunks': len(pending),
+            'deferred_rounds': deferred_rounds,
+            'requests': requests_sent,
+            'seconds': time.time() - start_time,
+        }
+        if table is not None:
+            metrics['templating'] = table.stats(source_line_count)
+            metrics['translation_memory'] = translator.translation_memory.stats()
+        translator.last_job_metrics.update(metrics)
+        if progress_callback:
+            if failed_files:
+                progress_callback(f"Project completed with failed chunks in {len(failed_files)} output(s): "
+                                  f"{', '.join(f'{f.relative_path} ({f.language})' for f in failed_files)}")
+            else:
+                progress_callback(f"Project completed successfully: {len(self.files)} output(s) in {metrics['seconds']:.1f}s")
+        translator.report_job_metrics(progress_callback)
+        return metrics
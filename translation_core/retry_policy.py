@@ -0,0 +1,120 @@
+import random
+
+from llm_services.errors import RateLimited, TransientError, AuthError, ContentBlocked, ContextTooLong, InvalidRequest
+
+# Actions a retry policy can take for a failed request
+RETRY = "retry"  # Send the same request again after a delay
+SPLIT = "split"  # Send the request again in smaller pieces
+REROUTE = "reroute"  # Only another provider can help; give up when none is left
+GIVE_UP = "give_up"  # Keep the original text and report the failure
+
+MAX_RETRY_AFTER = 300  # Longest server retry-after hint honored, in seconds; longer waits give up
+DEFAULT_JITTER = 2.0  # Maximum random seconds added to every delay
+
+
+class RetryRule:
+    """
+    How to handle one class of errors.
+
+    Args:
+        action (str): RETRY, SPLIT, REROUTE or GIVE_UP
+        label (str): Short description used in progress messages
+        max_attempts (int, optional): Attempts before giving up on RETRY; defaults to the policy's
+        delay_multiplier (float): Scales the backoff delay when the server gave no retry-after hint
+    """
+
+    def __init__(self, action, label, max_attempts=None, delay_multiplier=1):
+        self.action = action
+        self.label = label
+        self.max_attempts = max_attempts
+        self.delay_multiplier = delay_multiplier
+
+
+# Rules are matched in order against the error class; the first match wins
+DEFAULT_RULES = [
+    (RateLimited, RetryRule(RETRY, "API quota exceeded", delay_multiplier=2)),
+    (TransientError, RetryRule(RETRY, "Temporary API error")),
+    (ContextTooLong, RetryRule(SPLIT, "Request too long for the model")),
+    (ContentBlocked, RetryRule(SPLIT, "Content blocked by the provider")),
+    (AuthError, RetryRule(REROUTE, "API key rejected")),
+    (InvalidRequest, RetryRule(GIVE_UP, "Request rejected by the provider")),
+    # Errors raised outside the services (e.g. while processing the response)
+    (Exception, RetryRule(RETRY, "Translation error", max_attempts=3)),
+]
+
+
+class RetryDecision:
+    """The outcome of RetryPolicy.decide()."""
+
+    def __init__(self, action, delay=0.0, reason=""):
+        self.action = action
+        self.delay = delay
+        self.reason = reason
+
+
+class RetryPolicy:
+    """
+    Decide what to do with a failed translation request based on the type of the error.
+
+    Rate limits and transient errors are retried with exponential backoff. When the
+    server sends a retry-after hint it is used instead of the backoff, even beyond
+    max_delay, up to max_retry_after. Requests that are too long or blocked are split,
+    and errors that another attempt cannot fix are given up immediately.
+    """
+
+    def __init__(self, rules=None, max_attempts=5, base_delay=3, max_delay=10,
+                 max_retry_after=MAX_RETRY_AFTER, jitter=DEFAULT_JITTER):
+        self.rules = list(rules) if rules is not None else list(DEFAULT_RULES)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.jitter = jitter
+
+    def rule_for(self, error):
+        for error_class, rule in self.rules:
+            if isinstance(error, error_class):
+                return rule
+        return RetryRule(GIVE_UP, "Unexpected error")
+
+    def get_delay(self, attempt, rule, retry_after=None):
+        """Return the seconds to wait before the given retry attempt (1-based)."""
+        if retry_after is not None:
+            delay = min(retry_after, self.max_retry_after)
+        else:
+            delay = min(self.max_delay, self.base_delay * (2 ** attempt)) * rule.delay_multiplier
+        if self.jitter:
+            delay += random.uniform(0, self.jitter)
+        return delay
+
+    def decide(self, error, attempt, can_split=False):
+        """
+        Decide how to handle a failed request.
+
+        Args:
+            error (Exception): The error of the failed attempt
+            attempt (int): Number of attempts made so far, including the failed one
+            can_split (bool): Whether the request can be split into smaller ones
+
+        Returns:
+            RetryDecision: RETRY with a delay, SPLIT or GIVE_UP
+        """
+        rule = self.rule_for(error)
+        retry_after = getattr(error, 'retry_after', None)
+
+        if rule.action == SPLIT:
+            if can_split:
+                return RetryDecision(SPLIT, reason=rule.label)
+            return RetryDecision(GIVE_UP, reason=f"{rule.label}, cannot split further")
+        if rule.action == REROUTE:
+            # The router already failed over inside the request, so no provider is left
+            return RetryDecision(GIVE_UP, reason=f"{rule.label}, no other provider available")
+        if rule.action == GIVE_UP:
+            return RetryDecision(GIVE_UP, reason=rule.label)
+
+        max_attempts = rule.max_attempts or self.max_attempts
+        if attempt >= max_attempts:
+            return RetryDecision(GIVE_UP, reason=f"{rule.label}, giving up after {attempt} attempts")
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return RetryDecision(GIVE_UP, reason=f"{rule.label}, retry allowed only in {retry_after:.0f}s")
+        return RetryDecision(RETRY, self.get_delay(attempt, rule, retry_after), rule.label)
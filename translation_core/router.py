@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import deque
+
+from llm_services.errors import RateLimited
+from utils.config_manager import load_api_key
+
+# Routing settings
+LATENCY_WINDOW = 50  # Number of recent latencies kept per target
+ERROR_WINDOW = 20  # Number of recent outcomes used for the error rate
+DEGRADED_FAILURE_THRESHOLD = 3  # Consecutive failures before a target is cooled down
+DEGRADED_COOLDOWN = 30  # Seconds a degraded target is skipped (doubles on repeated degradation)
+MAX_DEGRADED_COOLDOWN = 300  # Upper bound for the degraded cooldown
+RATE_LIMIT_COOLDOWN = 60  # Seconds a throttled target is skipped when no retry delay is known
+DEFAULT_EXPECTED_LATENCY = 5.0  # Latency assumed for targets without samples yet
+
+
+def _percentile(values, fraction):
+    """Return the given percentile (0.0-1.0) of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class RouteTarget:
+    """A provider/model pair the router can send requests to."""
+
+    def __init__(self, provider, model, weight=1.0, api_key=None):
+        self.provider = provider
+        self.model = model
+        self.weight = float(weight)
+        self.api_key = api_key
+        self.service = None  # Set by Translator.set_router()
+
+        # Live statistics
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.outcomes = deque(maxlen=ERROR_WINDOW)  # True for success, False for failure
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.degraded_count = 0
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.remaining_requests = None  # From provider rate limit headers, if reported
+
+    @property
+    def name(self):
+        return f"{self.provider}/{self.model}"
+
+    @property
+    def p50(self):
+        return _percentile(list(self.latencies), 0.5)
+
+    @property
+    def p95(self):
+        return _percentile(list(self.latencies), 0.95)
+
+    @property
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for ok in self.outcomes if not ok) / len(self.outcomes)
+
+    def is_available(self, now=None):
+        now = now if now is not None else time.time()
+        if self.service is None:
+            return False
+        return now >= self.cooldown_until
+
+
+class ProviderRouter:
+    """
+    Route translation requests across a weighted list of provider/model targets.
+
+    Each request goes to the available target with the best score, based on its
+    weight, recent p95 latency, error rate and current load. Targets that fail
+    repeatedly or report exhausted quota are cooled down, so requests fail over
+    to the remaining targets.
+    """
+
+    def __init__(self, targets):
+        if not targets:
+            raise ValueError("ProviderRouter requires at least one target")
+        self.targets = list(targets)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, entries):
+        """
+        Build a router from a list of dicts such as
+        {"provider": "Google Gemini", "model": "gemini-1.5-flash", "weight": 10}.
+        Targets without an "api_key" use the key saved for their provider.
+        """
+        targets = []
+        for entry in entries:
+            api_key = entry.get('api_key') or load_api_key(entry['provider'])
+            targets.append(RouteTarget(entry['provider'], entry['model'], entry.get('weight', 1.0), api_key))
+        return cls(targets)
+
+    def _score(self, target):
+        expected_latency = target.p95 or DEFAULT_EXPECTED_LATENCY
+        health = (1.0 - target.error_rate) ** 2
+        return target.weight * health / (expected_latency * (1 + target.in_flight))
+
+    def select(self, exclude=()):
+        """
+        Pick the best available target and mark a request as in flight on it.
+
+        Args:
+            exclude: Targets that must not be chosen (e.g. ones that already failed for this request)
+
+        Returns:
+            RouteTarget or None if no target is available
+        """
+        with self._lock:
+            now = time.time()
+            candidates = [t for t in self.targets if t not in exclude and t.is_available(now)]
+            if not candidates:
+                return None
+            best = max(candidates, key=self._score)
+            best.in_flight += 1
+            best.requests += 1
+            return best
+
+    def record_success(self, target, latency, rate_limit_info=None):
+        """Record a successful request and its latency in seconds."""
+        with self._lock:
+            target.in_flight = max(0, target.in_flight - 1)
+            target.latencies.append(latency)
+            target.outcomes.append(True)
+            target.consecutive_failures = 0
+            target.degraded_count = 0
+            if rate_limit_info and rate_limit_info.get('remaining_requests') is not None:
+                target.remaining_requests = rate_limit_info['remaining_requests']
+                if target.remaining_requests == 0:
+                    # Quota used up: skip this target until it has had time to reset
+                    target.cooldown_until = time.time() + RATE_LIMIT_COOLDOWN
+
+    def release(self, target):
+        """Release a request that was cancelled without an outcome (e.g. a lost hedge)."""
+        with self._lock:
+            target.in_flight = max(0, target.in_flight - 1)
+
+    def record_failure(self, target, error, retry_after=None):
+        """Record a failed request. Throttled or repeatedly failing targets are cooled down."""
+        with self._lock:
+            target.in_flight = max(0, target.in_flight - 1)
+            target.outcomes.append(False)
+            target.failures += 1
+            target.consecutive_failures += 1
+            now = time.time()
+            if isinstance(error, RateLimited):
+                target.cooldown_until = now + (retry_after or RATE_LIMIT_COOLDOWN)
+            elif target.consecutive_failures >= DEGRADED_FAILURE_THRESHOLD:
+                cooldown = min(MAX_DEGRADED_COOLDOWN, DEGRADED_COOLDOWN * (2 ** target.degraded_count))
+                target.degraded_count += 1
+                target.consecutive_failures = 0
+                target.cooldown_until = now + cooldown
+
+    def snapshot(self):
+        """Return the current statistics of every target as a list of dicts."""
+        with self._lock:
+            now = time.time()
+            return [{
+                'target': t.name,
+                'weight': t.weight,
+                'requests': t.requests,
+                'failures': t.failures,
+                'error_rate': t.error_rate,
+                'p50': t.p50,
+                'p95': t.p95,
+                'remaining_requests': t.remaining_requests,
+                'available': t.is_available(now),
+                'cooldown_remaining': max(0.0, t.cooldown_until - now),
+            } for t in self.targets]
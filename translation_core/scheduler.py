@@ -0,0 +1,336 @@
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Scheduling and hedging settings
+DEFAULT_HEDGE_BUDGET = 0.1  # Extra tokens hedges may spend, as a fraction of tokens sent by primary requests
+HEDGE_MIN_SAMPLES = 5  # Latency samples needed in a size class before hedging it
+LATENCY_SAMPLES_PER_CLASS = 50  # Recent latencies kept per size class
+
+# Micro-batching settings
+DEFAULT_BATCH_WINDOW = 0.05  # Seconds a micro-batch waits for more small chunks before it is sent
+MAX_BATCH_TASKS = 20  # Most small chunks dispatched together and sent in one micro-batch
+
+
+def estimate_tokens(text):
+    """
+    Roughly estimate the number of tokens in a text without a tokenizer.
+
+    Latin text averages about 4 characters per token, while CJK and other
+    non-Latin characters are usually one token or more each.
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for c in text if ord(c) > 127)
+    ascii_chars = len(text) - non_ascii
+    return max(1, int(math.ceil(ascii_chars / 4 + non_ascii)))
+
+
+def size_class(tokens):
+    """Bucket a token count into a power-of-two size class."""
+    return int(math.log2(max(1, tokens)))
+
+
+class RequestCancelled(Exception):
+    """Raised inside a request that lost a hedge race and was cancelled."""
+    pass
+
+
+class ChunkScheduler:
+    """
+    Run chunk translations on a thread pool.
+
+    Chunks are dispatched largest-first (by estimated tokens) when more than one
+    worker is used, so the longest requests do not start last and dominate the
+    end of the job. With a single worker chunks keep their file order.
+
+    Tasks marked batchable are dispatched in groups of up to MAX_BATCH_TASKS that
+    share one worker slot and one request slot, so a MicroBatcher can send each
+    group as a single request. The tasks of a group run on a pool of the group's
+    size, created when the group is dispatched.
+    """
+
+    def __init__(self, max_workers=1, dispatch_interval=0.0):
+        self.max_workers = max(1, int(max_workers))
+        self.dispatch_interval = dispatch_interval
+
+    def order(self, sizes):
+        """Return task indexes in dispatch order for the given task sizes."""
+        indexes = list(range(len(sizes)))
+        if self.max_workers > 1:
+            indexes.sort(key=lambda i: sizes[i], reverse=True)
+        return indexes
+
+    def run(self, tasks, sizes, worker, should_stop=None, batchable=None):
+        """
+        Run worker(index, task) for every task.
+
+        Args:
+            tasks (list): Task payloads
+            sizes (list): Estimated size of each task, used for ordering
+            worker (function): Called as worker(index, task); its return value is collected
+            should_stop (function, optional): Checked before each dispatch; when it returns
+                True the remaining tasks are not started
+            batchable (list, optional): Whether each task may be dispatched in a group
+                with other batchable tasks
+
+        Returns:
+            tuple: (results dict of index -> worker result, list of skipped indexes)
+        """
+        results = {}
+        skipped = []
+        pending = deque(self.order(sizes))
+        last_dispatch = None
+        group_size = MAX_BATCH_TASKS if batchable and any(batchable) else 1
+
+        def run_group(group):
+            """Run the tasks of a group, each on a thread of the group's own pool so they reach the batcher together."""
+            if len(group) == 1:
+                return {group[0]: worker(group[0], tasks[group[0]])}
+            with ThreadPoolExecutor(max_workers=len(group)) as group_executor:
+                futures = {k: group_executor.submit(worker, k, tasks[k]) for k in group}
+                return {k: future.result() for k, future in futures.items()}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = set()  # Futures of the dispatched groups, one worker slot each
+            while pending or running:
+                while pending and len(running) < self.max_workers:
+                    if should_stop and should_stop():
+                        skipped.extend(pending)
+                        pending.clear()
+                        break
+                    if self.dispatch_interval and last_dispatch is not None:
+                        remaining = self.dispatch_interval - (time.time() - last_dispatch)
+                        if remaining > 0:
+                            time.sleep(remaining)
+                    index = pending.popleft()
+                    group = [index]
+                    if group_size > 1 and batchable[index]:
+                        group.extend(k for k in pending if batchable[k])
+                        group = group[:group_size]
+                        for k in group[1:]:
+                            pending.remove(k)
+                    running.add(executor.submit(run_group, group))
+                    last_dispatch = time.time()
+
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.discard(future)
+                    results.update(future.result())
+
+        return results, sorted(skipped)
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.size = 0
+        self.closed = threading.Event()  # Set when the batch is full and must be sent now
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Gather small requests made by concurrent workers into shared batches.
+
+    The first item submitted under a key opens a batch and its thread becomes the
+    batch leader: it waits up to window seconds, or until the batch reaches
+    max_size or max_items, then sends every item of the batch with one call of
+    send(key, items). Each submitter gets the result for its own item.
+
+    Args:
+        send (function): send(key, items) -> one result per item; a result that is
+            an exception is raised in the thread of that item only
+        window (float): Seconds a batch stays open for more items
+        max_size (int): Most total size of the items of a batch
+        max_items (int): Most items in a batch
+    """
+
+    def __init__(self, send, window=DEFAULT_BATCH_WINDOW, max_size=1000, max_items=MAX_BATCH_TASKS):
+        self.send = send
+        self.window = window
+        self.max_size = max_size
+        self.max_items = max_items
+        self.batches_sent = 0
+        self.items_sent = 0
+        self._open = {}  # Key -> open _Batch
+        self._lock = threading.Lock()
+
+    def submit(self, key, item, size):
+        """
+        Add an item to the open batch of key and wait for its result.
+
+        Raises:
+            Exception: The error of the send call, or of this item
+        """
+        with self._lock:
+            batch = self._open.get(key)
+            if batch is not None and (batch.size + size > self.max_size or len(batch.items) >= self.max_items):
+                # Full: send it now and open a new one for this item
+                del self._open[key]
+                batch.closed.set()
+                batch = None
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._open[key] = batch
+            index = len(batch.items)
+            batch.items.append(item)
+            batch.size += size
+            if batch.size >= self.max_size or len(batch.items) >= self.max_items:
+                del self._open[key]
+                batch.closed.set()
+
+        if not leader:
+            batch.done.wait()
+        else:
+            batch.closed.wait(self.window)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+                self.batches_sent += 1
+                self.items_sent += len(batch.items)
+            try:
+                batch.results = self.send(key, batch.items)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+
+        if batch.error is not None:
+            raise batch.error
+        result = batch.results[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'batches': self.batches_sent, 'batched_chunks': self.items_sent}
+
+
+class LatencyTracker:
+    """Keep recent request latencies per size class and report their p95."""
+
+    def __init__(self):
+        self._latencies = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES_PER_CLASS))
+        self._lock = threading.Lock()
+
+    def record(self, tokens, latency):
+        with self._lock:
+            self._latencies[size_class(tokens)].append(latency)
+
+    def p95(self, tokens, min_samples=HEDGE_MIN_SAMPLES):
+        """Return the p95 latency for the size class of tokens, or None without enough samples."""
+        with self._lock:
+            samples = sorted(self._latencies[size_class(tokens)])
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+
+
+class RequestHedger:
+    """
+    Issue a speculative duplicate of a slow request and take whichever finishes first.
+
+    A hedge is only sent once the request has been running longer than the observed
+    p95 latency for its size class, and only while the extra tokens spent on hedges
+    stay within budget * tokens sent by primary requests. The losing request's
+    cancel event is set and run() returns without waiting for it, so requests must
+    stop soon after their cancel event is set; a request that runs to completion
+    anyway spends tokens the budget does not count. Translator therefore only
+    hedges streamed requests, which stop reading at the next streamed piece.
+    """
+
+    def __init__(self, budget=DEFAULT_HEDGE_BUDGET):
+        self.budget = budget
+        self.latency = LatencyTracker()
+        self.primary_tokens = 0
+        self.hedge_tokens = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._lock = threading.Lock()
+
+    def _reserve_hedge(self, tokens):
+        with self._lock:
+            if self.hedge_tokens + tokens > self.budget * self.primary_tokens:
+                return False
+            self.hedge_tokens += tokens
+            self.hedges_sent += 1
+            return True
+
+    def run(self, request, tokens):
+        """
+        Run request(cancel_event), hedging it if it is slow.
+
+        Args:
+            request (function): Performs the request; must stop early and raise
+                RequestCancelled when its cancel_event is set
+            tokens (int): Estimated size of the request in tokens
+
+        Returns:
+            The result of whichever attempt succeeded first
+        """
+        with self._lock:
+            self.primary_tokens += tokens
+        threshold = self.latency.p95(tokens)
+        start_time = time.time()
+
+        attempts = []  # (future, cancel_event, is_hedge)
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            primary_cancel = threading.Event()
+            attempts.append((executor.submit(request, primary_cancel), primary_cancel, False))
+            hedged = False
+            last_error = None
+
+            while attempts:
+                futures = [a[0] for a in attempts]
+                timeout = None
+                if not hedged and threshold is not None:
+                    timeout = max(0.0, threshold - (time.time() - start_time))
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is slower than p95 for its size class: send a hedge if the budget allows
+                    hedged = True
+                    if self._reserve_hedge(tokens):
+                        hedge_cancel = threading.Event()
+                        attempts.append((executor.submit(request, hedge_cancel), hedge_cancel, True))
+                    continue
+
+                for future in done:
+                    attempt = next(a for a in attempts if a[0] is future)
+                    attempts.remove(attempt)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    # Winner: cancel the other attempt and record the effective latency
+                    for _, cancel_event, _ in attempts:
+                        cancel_event.set()
+                    if attempt[2]:
+                        with self._lock:
+                            self.hedges_won += 1
+                    self.latency.record(tokens, time.time() - start_time)
+                    return result
+
+            raise last_error
+        finally:
+            executor.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hedges_sent': self.hedges_sent,
+                'hedges_won': self.hedges_won,
+                'hedge_tokens': self.hedge_tokens,
+                'primary_tokens': self.primary_tokens,
+            }
@@ -0,0 +1,143 @@
+import re
+import unicodedata
+
+# Closing quotes and brackets that stay with the sentence they end
+_CLOSERS = '\'"”’」』）)\\]»'
+
+# Split points, tried in order until every piece fits: sentence ends, clause
+# punctuation, then any whitespace. Latin punctuation needs whitespace after it (and
+# a sentence end a next word that is not lowercase, so "e.g. this" is kept whole);
+# CJK punctuation is followed by the next sentence directly. The whitespace after a
+# split point belongs to the piece before it.
+SPLIT_PATTERNS = [
+    re.compile(rf'[.!?…]+[{_CLOSERS}]*\s+(?=[^\sa-z])|[。！？｡]+[{_CLOSERS}]*\s*'),
+    re.compile(rf'[,;:][{_CLOSERS}]*\s+|[，、；：]\s*'),
+    re.compile(r'\s+'),
+]
+
+LINE_PATTERN = re.compile(r"(\s*)(.*?)(\r?\n)?$", re.DOTALL)
+
+
+def _is_wide(char):
+    return unicodedata.east_asian_width(char) in ('W', 'F')
+
+
+def _allowed(offset, protected):
+    """Whether a split at offset is outside every protected (start, end) span."""
+    return not any(start < offset < end for start, end in protected)
+
+
+def _pack(length, offsets, max_size):
+    """Pick split offsets so the pieces are at most max_size long where the offsets allow it."""
+    cuts = []
+    start = last = 0
+    for offset in offsets + [length]:
+        if offset - start > max_size and last > start:
+            cuts.append(last)
+            start = last
+        last = offset
+    return cuts
+
+
+def split_text(text, max_size, protected=(), level=0):
+    """
+    Split text into pieces of at most max_size characters at the best split points.
+
+    Args:
+        text (str): Text to split
+        max_size (int): Longest piece wanted
+        protected (list): (start, end) spans of text that must not be split, such as markup
+        level (int): First of SPLIT_PATTERNS to use
+
+    Returns:
+        list: Pieces whose concatenation is text; a piece is only longer than max_size
+            when it has no split point outside the protected spans
+    """
+    if len(text) <= max_size:
+        return [text]
+    if level < len(SPLIT_PATTERNS):
+        offsets = [m.end() for m in SPLIT_PATTERNS[level].finditer(text)
+                   if 0 < m.end() < len(text) and _allowed(m.end(), protected)]
+    else:
+        # Text without spaces (e.g. CJK without punctuation): split between any two characters
+        offsets = [offset for offset in range(1, len(text)) if _allowed(offset, protected)]
+    cuts = _pack(len(text), offsets, max_size)
+
+    pieces = []
+    for start, end in zip([0] + cuts, cuts + [len(text)]):
+        piece_protected = [(s - start, e - start) for s, e in protected if s < end and e > start]
+        if level < len(SPLIT_PATTERNS):
+            pieces.extend(split_text(text[start:end], max_size, piece_protected, level + 1))
+        else:
+            pieces.append(text[start:end])
+    return pieces
+
+
+class LineSplit:
+    """
+    A line too long for one request, split into pieces at sentence boundaries.
+
+    The pieces are sent without the whitespace between them; the whitespace found
+    at each boundary, the line's indentation and its line ending are recorded, so
+    join() rebuilds exactly one line from the translated pieces.
+
+    Args:
+        leading (str): Indentation of the line
+        pieces (list): Text of each piece, without surrounding whitespace
+        separators (list): Whitespace after each piece
+        ending (str): Line ending of the line
+    """
+
+    def __init__(self, leading, pieces, separators, ending):
+        self.leading = leading
+        self.pieces = pieces
+        self.separators = separators
+        self.ending = ending
+
+    @classmethod
+    def split(cls, line, max_size, protected_pattern=None):
+        """
+        Split a line into pieces of at most max_size characters.
+
+        Args:
+            line (str): Line to split, with its line ending
+            max_size (int): Longest piece wanted
+            protected_pattern (str or re.Pattern, optional): Spans the line must not be
+                split inside, e.g. the markup lexer's pattern
+
+        Returns:
+            LineSplit: The split, or None when the line cannot be split in several pieces
+        """
+        match = LINE_PATTERN.match(line)
+        leading, content, ending = match.group(1), match.group(2), match.group(3) or ""
+        protected = [m.span() for m in re.finditer(protected_pattern, content)] if protected_pattern else []
+        pieces = []
+        separators = []
+        for piece in split_text(content, max_size, protected):
+            stripped = piece.rstrip()
+            if not stripped and pieces:
+                separators[-1] += piece
+                continue
+            pieces.append(stripped)
+            separators.append(piece[len(stripped):])
+        if len(pieces) < 2:
+            return None
+        return cls(leading, pieces, separators, ending)
+
+    def join(self, translations):
+        """
+        Rebuild the line from one translation per piece.
+
+        Where the source pieces met without whitespace (CJK text) a space is added if
+        the translations meet between two non-CJK characters, e.g. "Done.Next".
+        """
+        parts = [self.leading]
+        for j, translation in enumerate(translations):
+            text = translation.strip()
+            parts.append(text)
+            separator = self.separators[j]
+            if (not separator and j + 1 < len(translations) and text and translations[j + 1].strip()
+                    and not _is_wide(text[-1]) and not _is_wide(translations[j + 1].strip()[0])):
+                separator = " "
+            parts.append(separator)
+        return "".join(parts) + self.ending
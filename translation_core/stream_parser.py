@@ -0,0 +1,147 @@
+import json
+import re
+
+# Incremental parsers for streamed LLM responses.
+# Each parser is fed text deltas as they arrive and returns the segments
+# that became complete, so callers can use them before the response ends.
+
+class DelimitedSegmentParser:
+    """
+    Split a streamed response into segments separated by a delimiter token.
+
+    A segment is emitted as soon as the delimiter that closes it has been
+    received. Text after the last delimiter stays buffered, so a delimiter
+    split across several deltas is still recognised.
+
+    Args:
+        delimiter (str or re.Pattern): Delimiter token, or a compiled regex matching
+            its variants (e.g. with spaces a model added inside it)
+    """
+
+    def __init__(self, delimiter):
+        self.delimiter = delimiter if isinstance(delimiter, re.Pattern) else re.compile(re.escape(delimiter))
+        self.buffer = ""
+        self.segment_count = 0
+
+    def feed(self, text):
+        """
+        Add a piece of streamed text.
+
+        Returns:
+            list: Segments completed by this piece, in order
+        """
+        self.buffer += text
+        completed = []
+        while True:
+            match = self.delimiter.search(self.buffer)
+            if not match:
+                break
+            completed.append(self.buffer[:match.start()])
+            self.buffer = self.buffer[match.end():]
+        self.segment_count += len(completed)
+        return completed
+
+    def close(self):
+        """
+        Finish parsing.
+
+        Returns:
+            list: The trailing segment (if any text is left in the buffer)
+        """
+        remaining = self.buffer
+        self.buffer = ""
+        if remaining or self.segment_count > 0:
+            self.segment_count += 1
+            return [remaining]
+        return []
+
+
+class JsonStringLeafParser:
+    """
+    Incrementally parse a streamed JSON document and emit string values.
+
+    Each string value is emitted as (path, value) as soon as its closing quote
+    is received, where path is a tuple of object keys and array indexes, e.g.
+    ("ko", 2) for the third element of the "ko" array. Object keys themselves
+    are not emitted. Any text before the first '{' or '[' (such as a markdown
+    code fence) is ignored.
+    """
+
+    def __init__(self):
+        self.stack = []  # Entries: ['array', index] or ['object', key, expecting_key]
+        self.started = False
+        self.finished = False
+        self.in_string = False
+        self.escape = False
+        self.string_chars = []
+
+    def _current_path(self):
+        # Array entries hold the current index, object entries the current key
+        return tuple(entry[1] for entry in self.stack)
+
+    def feed(self, text):
+        """
+        Add a piece of streamed text.
+
+        Returns:
+            list: (path, value) tuples completed by this piece, in order
+        """
+        completed = []
+        for ch in text:
+            if self.finished:
+                break
+
+            if self.in_string:
+                self.string_chars.append(ch)
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    raw = '"' + ''.join(self.string_chars)
+                    self.string_chars = []
+                    try:
+                        value = json.loads(raw)
+                    except ValueError:
+                        value = raw[1:-1]
+                    top = self.stack[-1] if self.stack else None
+                    if top and top[0] == 'object' and top[2]:
+                        top[1] = value  # This string is a key
+                    else:
+                        completed.append((self._current_path(), value))
+                continue
+
+            if not self.started:
+                if ch in '{[':
+                    self.started = True
+                else:
+                    continue
+
+            if ch == '"':
+                self.in_string = True
+            elif ch == '{':
+                self.stack.append(['object', None, True])
+            elif ch == '[':
+                self.stack.append(['array', 0])
+            elif ch in '}]':
+                if self.stack:
+                    self.stack.pop()
+                if not self.stack:
+                    self.finished = True
+            elif ch == ':':
+                if self.stack and self.stack[-1][0] == 'object':
+                    self.stack[-1][2] = False
+            elif ch == ',':
+                if self.stack:
+                    top = self.stack[-1]
+                    if top[0] == 'array':
+                        top[1] += 1
+                    else:
+                        top[2] = True
+            # Numbers, true/false/null fill a slot but are not emitted
+        return completed
+
+    def close(self):
+        """Finish parsing. JSON elements are only emitted once closed, so nothing is pending."""
+        return []
@@ -0,0 +1,109 @@
+import re
+
+# Values lifted out of lines into slots, so lines that differ only by them share one template
+SLOT_PATTERNS = [
+    r'\$[A-Za-z_][\w.|]*\$',  # Engine variables like $NAME$ or $VALUE|Y$
+    r'\[[A-Za-z_][\w.\'|]*(?:\([^\[\]]*\))?\]',  # Scripted localisation like [Root.GetName]
+    r'£\w+£',  # Icons like £gold£
+    r'\{[\w.]+\}',  # Format fields like {count}
+    r'%(?:\d+\$)?[-+ 0#]*\d*(?:\.\d+)?[sdif]',  # printf specifiers like %d or %1$s
+    r'(?<![\w.])[-+]?\d+(?:[.,]\d+)*%?(?!\w)',  # Numbers like 5, -2.5 or 10%
+]
+SLOT_TOKEN = "__SLOT_{}__"
+SLOT_TOKEN_PATTERN = re.compile(r'__SLOT_(\d+)__')
+
+# Leading whitespace and key of quoted key:value lines (KEY:0 "value", key = "value"), kept out of the template
+LINE_PREFIX_PATTERN = re.compile(r'^(\s*(?:[\w.\-]+\s*(?::\d*|=)\s*(?=["\']))?)(.*?)(\r?\n)?$', re.DOTALL)
+
+_slot_regex = re.compile('|'.join(SLOT_PATTERNS))
+
+
+def make_template(text):
+    """
+    Replace numbers and engine variables in a text with numbered slots.
+
+    Returns:
+        tuple: (template, list of slot values), e.g. ("Gain __SLOT_0__ gold", ["5"])
+    """
+    slots = []
+
+    def lift(match):
+        slots.append(match.group(0))
+        return SLOT_TOKEN.format(len(slots) - 1)
+
+    return _slot_regex.sub(lift, text), slots
+
+
+def fill_template(template, slots):
+    """Put slot values back into a (translated) template."""
+    def fill(match):
+        index = int(match.group(1))
+        return slots[index] if index < len(slots) else match.group(0)
+    return SLOT_TOKEN_PATTERN.sub(fill, template)
+
+
+class TemplateTable:
+    """
+    Collapse lines into unique templates.
+
+    Each line is split into its key prefix and its text, and the text becomes a
+    template by lifting numbers and engine variables into slots. Lines such as
+    'A:0 "Gain 5 gold"' and 'B:0 "Gain 10 gold"' then share the template
+    '"Gain __SLOT_0__ gold"', which only needs to be translated once.
+    """
+
+    def __init__(self):
+        self.templates = []  # Unique templates, in order of first use
+        self._index = {}  # Template -> index in templates
+
+    def add_lines(self, lines):
+        """
+        Add lines to the table.
+
+        Returns:
+            list: One entry per line: (prefix, template index or None, slot values, line ending).
+                Lines without text after their prefix get None and are kept as they are.
+        """
+        entries = []
+        for line in lines:
+            match = LINE_PREFIX_PATTERN.match(line)
+            prefix, text, ending = match.group(1), match.group(2), match.group(3) or ""
+            if not text.strip():
+                entries.append((line, None, [], ""))
+                continue
+            template, slots = make_template(text)
+            index = self._index.get(template)
+            if index is None:
+                index = self._index[template] = len(self.templates)
+                self.templates.append(template)
+            entries.append((prefix, index, slots, ending))
+        return entries
+
+    def render(self, entries, translations):
+        """
+        Rebuild lines from their entries.
+
+        Args:
+            entries (list): Entries returned by add_lines()
+            translations (dict): Template index -> translated template; templates without
+                a translation are filled in untranslated
+
+        Returns:
+            list: The rebuilt lines
+        """
+        lines = []
+        for prefix, index, slots, ending in entries:
+            if index is None:
+                lines.append(prefix)
+                continue
+            template = translations.get(index, self.templates[index])
+            lines.append(prefix + fill_template(template.strip(), slots) + ending)
+        return lines
+
+    def stats(self, line_count):
+        """Return how far the lines collapsed, as a dict."""
+        return {
+            'lines': line_count,
+            'templates': len(self.templates),
+            'dedup_rate': 1 - len(self.templates) / line_count if line_count else 0.0,
+        }
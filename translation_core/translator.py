@@ -2,13 +2,34 @@ from utils.file_handler import read_file # write_file is used directly in GUI or
 from llm_services.openai_service import OpenAIService
 from llm_services.anthropic_service import AnthropicService
 from llm_services.google_gemini_service import GoogleGeminiService
+from llm_services.circuit_breaker import CircuitBreaker, CircuitOpenError, DEFAULT_FAILURE_THRESHOLD, DEFAULT_COOLDOWN
+from llm_services.errors import RateLimited, AuthError
+from llm_services.key_pool import KeyPool, parse_api_keys
+from .stream_parser import DelimitedSegmentParser, JsonStringLeafParser
+from .scheduler import (ChunkScheduler, RequestHedger, RequestCancelled, MicroBatcher, estimate_tokens,
+                        DEFAULT_HEDGE_BUDGET, DEFAULT_BATCH_WINDOW)
+from .retry_policy import RetryPolicy, RETRY, SPLIT
+from .cascade import CascadeTier
+from .templating import TemplateTable
+from .glossary import Glossary
+from .markup import MarkupLexer, AUTO_PROFILE, GENERIC_PROFILE, PROFILE_NAMES, detect_profile
+from .placeholders import SCHEMES, DEFAULT_SCHEME
+from .sentences import LineSplit
+from .alignment import AlignmentMap, line_ending
+from .formats import (get_adapter, segment_lines, segment_translations, pending_segments, expand_translations,
+                      AUTO_FORMAT, FORMAT_NAMES)
+from .translation_memory import (TranslationMemory, DEFAULT_REUSE_THRESHOLD, DEFAULT_HINT_THRESHOLD,
+                                 MAX_PROMPT_HINTS)
+from .deferred_queue import (DeferredQueue, DEFAULT_STATE_DIR, DEFAULT_QUOTA_RESET_WAIT,
+                             DEFAULT_MAX_DEFERRED_WAIT, MAX_DEFERRED_ROUNDS)
 import re
 import unicodedata
 import string
 import warnings
 import time
-import random
 import json
+import threading
+from collections import Counter
 
 # Language detection libraries
 try:
@@ -41,41 +62,7 @@ MAX_CHUNK_SIZE = 5000  # Maximum allowed chunk size
 BASE_DELAY = 3  # Base delay in seconds
 MAX_DELAY = 10 # Maximum delay in seconds
 MAX_RETRIES = 5  # Maximum number of retries for failed requests (increased)
-QUOTA_RETRY_MULTIPLIER = 2  # Additional multiplier for quota exceeded errors
-
-def get_exponential_backoff(retry_count, api_retry_delay=None, jitter=True):
-    """
-    Calculate exponential backoff delay with optional jitter and API retry delay.
-    
-    Args:
-        retry_count: Number of retry attempts so far
-        api_retry_delay: Optional retry delay suggested by the API
-        jitter: Whether to add random jitter
-    """
-    if api_retry_delay:
-        # Use API's suggested delay as the base, but add some margin
-        delay = api_retry_delay + (10 * retry_count)  # Increased margin
-    else:
-        # Standard exponential backoff
-        delay = min(MAX_DELAY, BASE_DELAY * (2 ** retry_count))
-    
-    if jitter:
-        # Add random jitter between 0-2 seconds
-        delay += random.uniform(0, 2)
-    
-    return min(MAX_DELAY, delay)
-
-def extract_retry_delay_from_error(error_str):
-    """Extract retry delay from API error message if available."""
-    try:
-        if "retry_delay" in error_str:
-            # Try to parse the JSON-like structure in the error message
-            retry_info = re.search(r'retry_delay\s*{\s*seconds:\s*(\d+)', error_str)
-            if retry_info:
-                return int(retry_info.group(1))
-    except:
-        pass
-    return None
+KEYWORD_CACHE_SIZE = 4096  # Protected texts remembered, so a chunk sent in several languages is parsed once
 
 def detect_language_advanced(text, confidence_threshold=0.3):  # Even lower threshold
     """
@@ -204,38 +191,440 @@ KEYWORD_PATTERNS = [
     r'\b(?:Value|KEY|ID|NAME|TYPE|FIELD|PROPERTY|ATTRIBUTE|PARAMETER|VARIABLE|CONST|ENUM)\b',  # Common value placeholders
     r'\b[A-Z]+(?:_[A-Z]+)*_(?:VALUE|KEY|ID|NAME|TYPE)\b',  # Pattern like SOME_VALUE, CONFIG_KEY
     r'__KEYWORD_\d+__',  # Existing keyword placeholders
+    r'__SLOT_\d+__',  # Template slots (see templating.py)
 ]
 
 class Translator:
     def __init__(self, llm_provider_name, api_key):
+        """
+        Args:
+            llm_provider_name (str): Name of a provider in SUPPORTED_LLM_SERVICES
+            api_key (str or list): API key, or several keys as a list or comma-separated string;
+                requests are then spread across the keys by a KeyPool
+        """
         self.llm_service = None
         self.llm_provider_name = llm_provider_name
-        self.api_key = api_key
+        self.api_keys = parse_api_keys(api_key)
+        self.api_key = self.api_keys[0] if self.api_keys else None
+        self.key_pool = None  # KeyPool when more than one API key is given
+        self.key_rate_limit = None  # Requests per minute allowed per pooled API key; None for unlimited
         self.current_model = None
         self.chunk_size = DEFAULT_CHUNK_SIZE  # Add chunk_size as instance variable
+        self.split_long_lines = True  # Split lines longer than the chunk size at sentence boundaries
+        self.streaming_enabled = True  # Stream responses when the service supports it
+        self.router = None  # Optional ProviderRouter for multi-provider load balancing
+        self.cascade = None  # Optional ModelCascade escalating rejected lines to stronger models
+        self.max_workers = 1  # Number of chunks translated concurrently
+        self.hedger = None  # Optional RequestHedger for tail latency hedging
+        self.micro_batcher = None  # Optional MicroBatcher sending small chunks together
+        self.circuit_breakers = {}  # Provider name -> CircuitBreaker
+        self.breaker_failure_threshold = DEFAULT_FAILURE_THRESHOLD
+        self.breaker_cooldown = DEFAULT_COOLDOWN
+        self._progress_callback = None  # Progress callback of the running job, for breaker state logs
+        self.retry_policy = RetryPolicy(max_attempts=MAX_RETRIES, base_delay=BASE_DELAY, max_delay=MAX_DELAY)
+        self.deferred_retry_enabled = True  # Park quota-deferred chunks and finish them after the reset
+        self.deferred_max_wait = DEFAULT_MAX_DEFERRED_WAIT
+        self.deferred_state_dir = DEFAULT_STATE_DIR
+        self.last_job_metrics = {}  # Metrics of the most recent translate_file run
+        self.last_alignment = None  # AlignmentMap of the most recent translate_file run, for retranslation
+        self._keyword_cache = {}  # Text -> (protected text, keywords) from _extract_keywords_smart
+        self.templating_enabled = False  # Collapse lines differing only by numbers/variables into templates
+        self.translation_memory = TranslationMemory(normalize=self._mask_protected)  # Translated templates, reused across jobs
+        self.file_format = AUTO_FORMAT  # Format adapter used by translate_file: "auto", "plain" or an adapter name
+        self.format_options = {}  # Adapter name -> keyword arguments of that adapter
+        self.glossary = None  # Optional Glossary; the terms found in a chunk are added to its prompt
+        self.markup_profile = AUTO_PROFILE  # Engine markup protected from translation: "auto", "generic" or a profile name
+        self.markup_lexer = None  # MarkupLexer of the active profile; None uses the generic KEYWORD_PATTERNS
+        self.fuzzy_matching_enabled = False  # Reuse near-duplicates and add similar translations to prompts
+        self.fuzzy_reuse_threshold = DEFAULT_REUSE_THRESHOLD
+        self.fuzzy_hint_threshold = DEFAULT_HINT_THRESHOLD
         self._initialize_llm_service()
-        self.keyword_pattern = '|'.join(KEYWORD_PATTERNS)
-        
+
         # Define special tokens
-        self.LINE_BREAK_TOKEN = "__LINE_BREAK_TOKEN_7f8a31c2__"
+        self.placeholder_scheme = None  # PlaceholderScheme writing protected spans and line breaks
+        self.LINE_BREAK_TOKEN = None  # Line break token of the placeholder scheme
+        self.set_placeholder_scheme(DEFAULT_SCHEME)
         self.KEY_VALUE_SEPARATOR = "__KEY_VALUE_SEP__"
 
     def set_chunk_size(self, size):
         """Set the chunk size for translation, with validation."""
         if size < MIN_CHUNK_SIZE:
             self.chunk_size = MIN_CHUNK_SIZE
-            return f"Chunk size too small, using minimum size of {MIN_CHUNK_SIZE} characters"
+            message = f"Chunk size too small, using minimum size of {MIN_CHUNK_SIZE} characters"
         elif size > MAX_CHUNK_SIZE:
             self.chunk_size = MAX_CHUNK_SIZE
-            return f"Chunk size too large, using maximum size of {MAX_CHUNK_SIZE} characters"
+            message = f"Chunk size too large, using maximum size of {MAX_CHUNK_SIZE} characters"
         else:
             self.chunk_size = size
-            return f"Chunk size set to {size} characters"
+            message = f"Chunk size set to {size} characters"
+        if self.micro_batcher is not None:
+            self.micro_batcher.max_size = self.chunk_size
+        return message
+
+    def set_long_line_splitting(self, enabled):
+        """Enable or disable splitting lines longer than the chunk size into sentence pieces."""
+        self.split_long_lines = bool(enabled)
+        if self.split_long_lines:
+            return "Lines longer than the chunk size are split at sentence boundaries"
+        return "Lines longer than the chunk size are sent whole"
 
     def get_chunk_size(self):
         """Get the current chunk size."""
         return self.chunk_size
 
+    def set_streaming(self, enabled):
+        """Enable or disable streaming of LLM responses."""
+        self.streaming_enabled = bool(enabled)
+        return f"Response streaming {'enabled' if self.streaming_enabled else 'disabled'}"
+
+    def set_concurrency(self, max_workers):
+        """Set how many chunks are translated concurrently."""
+        self.max_workers = max(1, int(max_workers))
+        return f"Translating up to {self.max_workers} chunk(s) concurrently"
+
+    def set_hedging(self, enabled, budget=DEFAULT_HEDGE_BUDGET):
+        """
+        Enable or disable hedged requests.
+
+        Only streamed requests are hedged, since only they can be cancelled; with
+        streaming disabled or a service that does not stream, requests are sent once.
+
+        Args:
+            enabled (bool): Whether slow requests get a speculative duplicate
+            budget (float): Extra tokens hedges may spend, as a fraction of the tokens
+                sent by primary requests (0.1 = at most 10% extra)
+        """
+        self.hedger = RequestHedger(budget) if enabled else None
+        if not enabled:
+            return "Request hedging disabled"
+        return f"Request hedging enabled with a {budget * 100:.0f}% extra-spend budget"
+
+    def set_micro_batching(self, enabled, window=DEFAULT_BATCH_WINDOW):
+        """
+        Enable or disable micro-batching of small chunks.
+
+        Chunks of at most half the chunk size (single lines, leftovers of a split,
+        one-line files) are dispatched together and sent as one multi-line request of
+        up to the chunk size, instead of one request with a full prompt each.
+
+        Args:
+            enabled (bool): Whether small chunks are batched
+            window (float): Seconds a batch waits for more small chunks
+        """
+        if not enabled:
+            self.micro_batcher = None
+            return "Micro-batching of small chunks disabled"
+        self.micro_batcher = MicroBatcher(self._send_micro_batch, window, max_size=self.chunk_size)
+        return f"Micro-batching small chunks into requests of up to {self.chunk_size} characters"
+
+    def is_micro_batchable(self, chunk_lines):
+        """Whether a chunk is small enough to be sent in a micro-batch."""
+        return self.micro_batcher is not None and sum(len(line) for line in chunk_lines) * 2 <= self.chunk_size
+
+    def _send_micro_batch(self, key, items):
+        """
+        Translate the (chunk index, chunk lines, progress callback) items of a micro-batch
+        with one multi-line request.
+
+        If the batched response cannot be split back into the chunks, each chunk is
+        sent on its own, one after the other.
+
+        Returns:
+            list: (translated lines, failed) or the request error, for each item
+        """
+        output_language, selected_model = key
+        i, _, progress_callback = items[0]
+        if len(items) > 1:
+            lines = [line for _, chunk_lines, _ in items for line in chunk_lines]
+            if progress_callback:
+                progress_callback(f"Micro-batching {len(items)} small chunk(s), {len(lines)} line(s), into one request")
+            # Padded or truncated lines would shift the chunks, so a line count mismatch fails the batch
+            translated_lines, failed = self._translate_chunk_request(i, lines, output_language, selected_model,
+                                                                     progress_callback, strict_line_count=True)
+            if not failed:
+                results = []
+                offset = 0
+                for _, chunk_lines, _ in items:
+                    results.append((translated_lines[offset:offset + len(chunk_lines)], False))
+                    offset += len(chunk_lines)
+                return results
+            if progress_callback:
+                progress_callback(f"Micro-batch of {len(items)} chunk(s) failed, sending them one by one")
+
+        results = []
+        for i, chunk_lines, progress_callback in items:
+            try:
+                results.append(self._translate_chunk_request(i, chunk_lines, output_language, selected_model,
+                                                             progress_callback))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def set_retry_policy(self, retry_policy):
+        """Set the RetryPolicy deciding how failed requests are retried, split or given up."""
+        self.retry_policy = retry_policy
+
+    def set_templating(self, enabled):
+        """
+        Enable or disable templating.
+
+        With templating, numbers and engine variables ($NAME$, [Root.GetName], ...) are
+        lifted into slots, each unique template is translated once, and translated
+        templates are kept in the translation memory for later lines and jobs.
+        """
+        self.templating_enabled = bool(enabled)
+        return f"Templating {'enabled' if self.templating_enabled else 'disabled'}"
+
+    def set_file_format(self, format_name, options=None):
+        """
+        Set how translate_file() reads files.
+
+        Args:
+            format_name (str): "auto" to detect a format adapter from the file, "plain" to
+                translate whole lines, or the name of an adapter such as "paradox_yaml"
+            options (dict, optional): Adapter name -> keyword arguments of that adapter,
+                e.g. {"json": {"exclude": ["*/id"]}}
+        """
+        if format_name not in FORMAT_NAMES:
+            return f"Unknown file format '{format_name}', keeping '{self.file_format}'"
+        self.file_format = format_name
+        self.format_options = options or {}
+        return f"File format set to {format_name}"
+
+    def set_placeholder_scheme(self, name):
+        """
+        Set how protected spans and line breaks are written in requests.
+
+        Args:
+            name (str): "tag" (<k0/>, <lb/>), "bracket" (⟦0⟧, ⟦¶⟧) or "legacy"
+                (__KEYWORD_0__, __LINE_BREAK_TOKEN_7f8a31c2__); compare their token
+                cost on your files with the benchmark-placeholders command
+        """
+        if name not in SCHEMES:
+            return f"Unknown placeholder scheme '{name}', keeping '{self.placeholder_scheme.name}'"
+        self.placeholder_scheme = SCHEMES[name]
+        self.LINE_BREAK_TOKEN = self.placeholder_scheme.line_break
+        # Line break tokens written in the source text are protected like any other span;
+        # written placeholders are protected first by _extract_keywords_smart()
+        self.keyword_pattern = '|'.join([re.escape(self.LINE_BREAK_TOKEN)] + KEYWORD_PATTERNS)
+        if self.markup_lexer is not None:
+            self.markup_lexer = MarkupLexer(self.markup_lexer.profile, self._scheme_patterns())
+        self._keyword_cache.clear()
+        return f"Placeholder scheme set to {name}"
+
+    def set_markup_profile(self, profile):
+        """
+        Set which engine markup is protected from translation.
+
+        Args:
+            profile (str): "auto" to detect the engine from each file translated by
+                translate_file(), "generic" for the general keyword heuristics, or an
+                engine profile: "paradox", "unity", "rpgmaker" or "renpy"
+        """
+        if profile not in PROFILE_NAMES:
+            return f"Unknown markup profile '{profile}', keeping '{self.markup_profile}'"
+        self.markup_profile = profile
+        self._use_markup_profile(GENERIC_PROFILE if profile == AUTO_PROFILE else profile)
+        return f"Markup profile set to {profile}"
+
+    def _scheme_patterns(self):
+        """
+        Return the patterns of the placeholder scheme's own tokens written in the source
+        text, which must be protected so they are not split on or restored as another span.
+        """
+        # Placeholders are matched like restore() matches them: in any case and with spaces inside
+        return [re.escape(self.LINE_BREAK_TOKEN), f'(?i:{self.placeholder_scheme.keyword_pattern.pattern})']
+
+    def _use_markup_profile(self, profile):
+        """Make profile the active lexer, dropping keyword extractions made with another one."""
+        current = self.markup_lexer.profile if self.markup_lexer else GENERIC_PROFILE
+        if profile == current:
+            return
+        self.markup_lexer = None if profile == GENERIC_PROFILE else MarkupLexer(profile, self._scheme_patterns())
+        self._keyword_cache.clear()
+
+    def detect_markup_profile(self, text, adapter=None, progress_callback=None):
+        """
+        In "auto" mode, activate the markup profile detected from text (or implied by
+        the format adapter) and return it; otherwise return the configured profile.
+        """
+        if self.markup_profile != AUTO_PROFILE:
+            return self.markup_profile
+        profile = 'paradox' if adapter is not None and adapter.name == 'paradox_yaml' else detect_profile(text)
+        self._use_markup_profile(profile)
+        if progress_callback:
+            progress_callback(f"Markup profile: {profile} (detected)")
+        return profile
+
+    def set_glossary(self, glossary):
+        """
+        Set the glossary whose terms are added to the prompts of the chunks they occur in.
+
+        Args:
+            glossary (Glossary): The glossary, or None to translate without one
+        """
+        self.glossary = glossary
+        if glossary is None:
+            return "Glossary disabled"
+        return f"Glossary enabled with {len(glossary)} terms"
+
+    def _glossary_section(self, i, text, output_language, progress_callback=None):
+        """Return the glossary prompt section for the text of chunk i and report how many terms matched."""
+        if self.glossary is None:
+            return ""
+        section, matched, injected = self.glossary.prompt_section(text, output_language, chunk=i)
+        if progress_callback:
+            progress_callback(f"Glossary: {matched} term(s) matched in chunk {i + 1}, {injected} added to the prompt")
+        return section
+
+    def set_fuzzy_matching(self, enabled, reuse_threshold=DEFAULT_REUSE_THRESHOLD, hint_threshold=DEFAULT_HINT_THRESHOLD):
+        """
+        Configure fuzzy translation memory matching.
+
+        Args:
+            enabled (bool): Store translated lines in the translation memory and look up near-duplicates
+            reuse_threshold (float): Similarity (0-1) above which a match that differs only in protected
+                tokens is reused without a request
+            hint_threshold (float): Similarity (0-1) above which a match is added to the prompt as a reference
+        """
+        self.fuzzy_matching_enabled = bool(enabled)
+        self.fuzzy_reuse_threshold = reuse_threshold
+        self.fuzzy_hint_threshold = hint_threshold
+        if not enabled:
+            return "Fuzzy translation memory matching disabled"
+        return f"Fuzzy translation memory matching enabled (reuse above {reuse_threshold:.0%}, hints above {hint_threshold:.0%})"
+
+    def _mask_protected(self, text):
+        """Return text with its protected tokens replaced by placeholders, for fuzzy matching."""
+        return self._extract_keywords_smart(text)[0]
+
+    def memory_translation(self, language, segment):
+        """
+        Return a translation of a segment from the translation memory, or None.
+
+        Exact matches are returned as they are. With fuzzy matching, a close match whose
+        text differs only in protected tokens (placeholders, identifiers, variables) is
+        reused with those tokens swapped for the segment's own.
+        """
+        translation = self.translation_memory.lookup(language, segment)
+        if translation is not None or not self.fuzzy_matching_enabled:
+            return translation
+        match = self.translation_memory.fuzzy_lookup(language, segment, self.fuzzy_reuse_threshold)
+        if match is None:
+            return None
+        _, source, translation = match
+        modified_segment, segment_keywords = self._extract_keywords_smart(segment)
+        modified_source, source_keywords = self._extract_keywords_smart(source)
+        if modified_segment != modified_source or segment_keywords.keys() != source_keywords.keys():
+            return None
+        for placeholder, keyword in source_keywords.items():
+            if keyword != segment_keywords[placeholder]:
+                translation = translation.replace(keyword, segment_keywords[placeholder])
+        return translation
+
+    def _prompt_hints(self, contents, language):
+        """
+        Return a prompt section with earlier translations of segments similar to contents.
+
+        Returns:
+            str: The section followed by a blank line, or "" without fuzzy matching or matches
+        """
+        if not self.fuzzy_matching_enabled:
+            return ""
+        hints = []
+        for content in contents:
+            if len(hints) >= MAX_PROMPT_HINTS:
+                break
+            if not content.strip():
+                continue
+            match = self.translation_memory.fuzzy_lookup(language, content.strip(), self.fuzzy_hint_threshold)
+            if match and (match[1], match[2]) not in hints:
+                hints.append((match[1], match[2]))
+        if not hints:
+            return ""
+        lines = "\n".join(f"- {source[:200]} => {translation[:200]}" for source, translation in hints)
+        return f"REFERENCE TRANSLATIONS (earlier translations of similar text; keep terminology consistent):\n{lines}\n\n"
+
+    def _remember_translations(self, language, contents, translations):
+        """Store translated lines in the translation memory when fuzzy matching is enabled."""
+        if not self.fuzzy_matching_enabled:
+            return
+        for content, translation in zip(contents, translations):
+            if content.strip() and translation.strip():
+                self.translation_memory.store(language, content.strip(), translation.strip())
+
+    def set_deferred_retry(self, enabled, max_wait=DEFAULT_MAX_DEFERRED_WAIT, state_dir=DEFAULT_STATE_DIR):
+        """
+        Configure the deferred retry queue for chunks that hit the API quota.
+
+        Args:
+            enabled (bool): Park deferred chunks until the quota resets instead of keeping them untranslated
+            max_wait (float): Longest time in seconds a job parks; jobs whose quota resets later are saved
+                and finished by running the same translation again
+            state_dir (str, optional): Directory for the saved state of unfinished jobs, so running the
+                same translation again only sends the unfinished chunks; None keeps the state in memory
+        """
+        self.deferred_retry_enabled = enabled
+        self.deferred_max_wait = max_wait
+        self.deferred_state_dir = state_dir
+        if not enabled:
+            return "Deferred retry disabled"
+        if state_dir:
+            return f"Deferred retry enabled, parking jobs for up to {max_wait}s, saving unfinished jobs in {state_dir}"
+        return f"Deferred retry enabled, parking jobs for up to {max_wait}s"
+
+    def job_settings(self):
+        """Return the settings that change the translation of a job, for the key of its saved state."""
+        return {
+            'provider': self.llm_provider_name,
+            'routes': [target.name for target in self.router.targets] if self.router else None,
+            'cascade': [tier.name for tier in self.cascade.tiers] if self.cascade else None,
+            'placeholders': self.placeholder_scheme.name,
+            'markup': self.markup_lexer.profile if self.markup_lexer else GENERIC_PROFILE,
+            'glossary': self.glossary.terms if self.glossary is not None else None,
+            'templating': self.templating_enabled,
+            'fuzzy_matching': self.fuzzy_matching_enabled,
+            'split_long_lines': self.split_long_lines,
+        }
+
+    def set_circuit_breaker(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN):
+        """
+        Configure the per-provider circuit breakers.
+
+        Args:
+            failure_threshold (int): Consecutive transport/5xx failures before a provider's circuit opens
+            cooldown (float): Seconds an open circuit fails fast before a probe request is let through
+        """
+        self.breaker_failure_threshold = max(1, int(failure_threshold))
+        self.breaker_cooldown = cooldown
+        for breaker in self.circuit_breakers.values():
+            breaker.failure_threshold = self.breaker_failure_threshold
+            breaker.cooldown = self.breaker_cooldown
+        return f"Circuit breaker opens after {self.breaker_failure_threshold} failures, probes after {cooldown}s"
+
+    def _get_circuit_breaker(self, provider_name):
+        """Return the circuit breaker for a provider, creating it on first use."""
+        breaker = self.circuit_breakers.get(provider_name)
+        if breaker is None:
+            breaker = self.circuit_breakers.setdefault(provider_name, CircuitBreaker(
+                provider_name, self.breaker_failure_threshold, self.breaker_cooldown,
+                on_state_change=self._on_circuit_state_change
+            ))
+        return breaker
+
+    def _on_circuit_state_change(self, breaker, old_state, new_state):
+        """Log circuit breaker transitions to the console and the running job's progress log."""
+        if new_state == "open":
+            message = (f"Circuit breaker for {breaker.name} OPEN after {breaker.consecutive_failures} "
+                       f"consecutive failures; failing fast for {breaker.cooldown}s")
+        elif new_state == "half_open":
+            message = f"Circuit breaker for {breaker.name} HALF-OPEN; sending a probe request"
+        else:
+            message = f"Circuit breaker for {breaker.name} CLOSED; provider is responding again"
+        print(message)
+        if self._progress_callback:
+            self._progress_callback(message)
+
     def _initialize_llm_service(self):
         if not self.api_key:
             # GUI already checks for API key, but handle defensively here too
@@ -247,8 +636,10 @@ class Translator:
         service_class = SUPPORTED_LLM_SERVICES.get(self.llm_provider_name)
         if service_class:
             try:
-                self.llm_service = service_class(api_key=self.api_key)
+                self.llm_service = self._create_service(self.llm_provider_name, self.api_key)
                 print(f"{self.llm_provider_name} service initialized successfully.")
+                if len(self.api_keys) > 1:
+                    self._initialize_key_pool()
             except ConnectionError as e:
                 print(f"Error initializing {self.llm_provider_name} service: {e}")
                 self.llm_service = None # Handle service initialization failure
@@ -260,6 +651,85 @@ class Translator:
             # raise ValueError(f"Unsupported LLM provider: {self.llm_provider_name}")
             self.llm_service = None
 
+    def _initialize_key_pool(self):
+        """Create a service per API key and pool them; keys that fail to initialize are left out."""
+        pooled = [(self.api_key, self.llm_service)]
+        for api_key in self.api_keys[1:]:
+            try:
+                pooled.append((api_key, self._create_service(self.llm_provider_name, api_key)))
+            except Exception as e:
+                print(f"Error initializing {self.llm_provider_name} service for an additional API key: {e}")
+        self.key_pool = KeyPool(self.llm_provider_name, pooled, self.key_rate_limit) if len(pooled) > 1 else None
+        if self.key_pool:
+            print(f"{self.llm_provider_name} requests are spread across {len(pooled)} API keys.")
+
+    def set_key_rate_limit(self, requests_per_minute):
+        """
+        Limit the request rate of each pooled API key. The limit is kept when the key
+        pool is created again, e.g. after the service is reinitialized.
+
+        Args:
+            requests_per_minute (int): Requests allowed per key and minute, or None for unlimited
+        """
+        self.key_rate_limit = requests_per_minute or None
+        if not self.key_pool:
+            return "Only one API key is configured, key rate limit not applied"
+        self.key_pool.set_rate_limit(requests_per_minute)
+        if not requests_per_minute:
+            return "Per-key rate limit disabled"
+        return f"Each of {len(self.key_pool.keys)} API keys limited to {requests_per_minute} requests per minute"
+
+    def _create_service(self, provider_name, api_key):
+        """Create an LLM service instance for the given provider."""
+        service_class = SUPPORTED_LLM_SERVICES.get(provider_name)
+        if not service_class:
+            raise ValueError(f"Unsupported LLM provider: {provider_name}")
+        return service_class(api_key=api_key)
+
+    def set_router(self, router):
+        """
+        Route translation requests through a ProviderRouter instead of the single
+        configured provider. Pass None to go back to the single provider.
+        """
+        if router is not None:
+            for target in router.targets:
+                try:
+                    target.service = self._create_service(target.provider, target.api_key)
+                    target.service.set_model(target.model)
+                except Exception as e:
+                    print(f"Error initializing route target {target.name}: {e}")
+                    target.service = None
+            if not any(target.service for target in router.targets):
+                self.router = None
+                return "No route target could be initialized, using the single provider"
+        self.router = router
+        if router is None:
+            return "Provider routing disabled"
+        return f"Provider routing enabled with {len(router.targets)} target(s)"
+
+    def set_cascade(self, cascade):
+        """
+        Translate with a ModelCascade instead of the selected model: chunks go to its
+        cheapest tier first and rejected lines are escalated to the next tiers. Pass
+        None to translate with the selected model again.
+        """
+        if cascade is not None:
+            for tier in cascade.tiers:
+                try:
+                    tier.service = self._create_service(tier.provider, tier.api_key)
+                    tier.service.set_model(tier.model)
+                except Exception as e:
+                    print(f"Error initializing cascade tier {tier.name}: {e}")
+                    tier.service = None
+            missing = [tier.name for tier in cascade.tiers if tier.service is None]
+            if missing:
+                self.cascade = None
+                return f"Cascade tier(s) {', '.join(missing)} could not be initialized, using the selected model"
+        self.cascade = cascade
+        if cascade is None:
+            return "Model cascade disabled"
+        return f"Model cascade enabled: {' -> '.join(tier.name for tier in cascade.tiers)}"
+
     def get_available_models(self):
         if self.llm_service:
             try:
@@ -330,9 +800,12 @@ class Translator:
         # Double check that the key-value pairs don't get split across chunks
         # and that each chunk has an appropriate number of lines
         fixed_chunks = []
+        # Lines split at sentence boundaries are only split when they stay a chunk of their own
+        is_long_line = lambda chunk: self.split_long_lines and len(chunk) == 1 and len(chunk[0]) > chunk_size
         for chunk in chunks:
-            # Balance chunks with too few or too many lines
-            if len(chunk) < 3 and len(fixed_chunks) > 0:
+            # Balance chunks with too few or too many lines; small chunks stay whole for micro-batches
+            if (len(chunk) < 3 and len(fixed_chunks) > 0 and not is_long_line(chunk) and not is_long_line(fixed_chunks[-1])
+                    and not self.is_micro_batchable(chunk)):
                 # Merge very small chunks with the previous chunk
                 fixed_chunks[-1].extend(chunk)
             elif len(chunk) > 50:
@@ -373,16 +846,43 @@ class Translator:
         """
         Extract keywords from text and handle key-value pairs specially.
         Keys are preserved while values can be translated.
+        Given the list of lines of a chunk, each line is protected on its own and the
+        protected lines are joined with LINE_BREAK_TOKEN.
+        Results are cached, so translating the same text into several languages parses it once.
+        With an engine markup profile, its lexer replaces these heuristics.
         """
+        cache_key = tuple(text) if isinstance(text, list) else text
+        cached = self._keyword_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        lines = text if isinstance(text, list) else [text]
+        scheme = self.placeholder_scheme
+        if self.markup_lexer is not None:
+            keywords = {}
+            modified_lines = [self.markup_lexer.protect(line, scheme.keyword, keywords)[0] for line in lines]
+            result = (self.LINE_BREAK_TOKEN.join(modified_lines), keywords)
+            if len(self._keyword_cache) >= KEYWORD_CACHE_SIZE:
+                self._keyword_cache.clear()
+            self._keyword_cache[cache_key] = result
+            return result
+
         keywords = {}
         placeholder_counter = 0
-        
+
+        def replace_literal_placeholder(match):
+            # A placeholder written in the source text would be restored as another span
+            nonlocal placeholder_counter
+            placeholder = scheme.keyword(placeholder_counter)
+            keywords[placeholder] = match.group(0)
+            placeholder_counter += 1
+            return placeholder
+
         def replace_match(match):
             nonlocal placeholder_counter
             keyword_val = match.group(0)
             
             # Skip if it's already a placeholder
-            if re.fullmatch(r"__KEYWORD_\d+__", keyword_val):
+            if scheme.keyword_pattern.fullmatch(keyword_val):
                 return keyword_val
             
             # Special handling for common game file patterns (key:0 "value")
@@ -393,7 +893,7 @@ class Translator:
             if ':' in keyword_val or '=' in keyword_val:
                 return keyword_val  # Keep the key as is
                 
-            placeholder = f"__KEYWORD_{placeholder_counter}__"
+            placeholder = scheme.keyword(placeholder_counter)
             keywords[placeholder] = keyword_val
             placeholder_counter += 1
             return placeholder
@@ -420,13 +920,13 @@ class Translator:
                 
                 # Only mark the key part as a keyword (to preserve it)
                 nonlocal placeholder_counter
-                placeholder = f"__KEYWORD_{placeholder_counter}__"
+                placeholder = scheme.keyword(placeholder_counter)
                 keywords[placeholder] = key_part
                 placeholder_counter += 1
                 
                 # If value is a placeholder, protect it too
                 if is_placeholder:
-                    value_placeholder = f"__KEYWORD_{placeholder_counter}__"
+                    value_placeholder = scheme.keyword(placeholder_counter)
                     keywords[value_placeholder] = value_part
                     placeholder_counter += 1
                     return f"{placeholder}{value_placeholder}"
@@ -436,21 +936,33 @@ class Translator:
                 
             return re.sub(kv_pattern, replace_kv, text)
             
-        # Apply key-value handling first
-        modified_text = handle_key_value_pairs(text)
-        
-        # Then apply other keyword patterns
-        modified_text = re.sub(self.keyword_pattern, replace_match, modified_text)
-        
+        # Protect written placeholders first, then apply key-value handling and the other
+        # keyword patterns, line by line; every placeholder left after the first step is our own
+        modified_text = self.LINE_BREAK_TOKEN.join(
+            re.sub(self.keyword_pattern, replace_match,
+                   handle_key_value_pairs(scheme.keyword_pattern.sub(replace_literal_placeholder, line)))
+            for line in lines
+        )
+
+        if len(self._keyword_cache) >= KEYWORD_CACHE_SIZE:
+            self._keyword_cache.clear()
+        self._keyword_cache[cache_key] = (modified_text, keywords)
         return modified_text, keywords
 
+    def protect_chunk(self, chunk_lines):
+        """
+        Return the protected text sent for a chunk of lines and its keywords, without
+        the prompt around it: the content of a single line, or the contents of several
+        lines joined with LINE_BREAK_TOKEN.
+        """
+        if len(chunk_lines) == 1:
+            return self._extract_keywords_smart(chunk_lines[0].lstrip())
+        return self._extract_keywords_smart([re.match(r"(\s*)(.*?)(\r?\n)?$", line, re.DOTALL).group(2)
+                                             for line in chunk_lines])
+
     def _restore_keywords(self, translated_text, keywords):
-        """Restore original keywords in translated text"""
-        # Replace placeholders with original keywords
-        for placeholder, keyword in keywords.items():
-            translated_text = translated_text.replace(placeholder, keyword)
-            
-        return translated_text
+        """Restore original keywords in translated text, even if the model spaced out their placeholders"""
+        return self.placeholder_scheme.restore(translated_text, keywords)
 
     def _reinitialize_llm_service(self):
         """Reinitialize the LLM service with current settings"""
@@ -473,7 +985,290 @@ class Translator:
                     return False
         return False
 
-    def translate_file(self, input_file_path, output_language, selected_model, chunk_size=None, progress_callback=None, update_callback=None):
+    def _call_service(self, service, provider_name, text, output_language, model_name, on_segment=None, cancel_event=None):
+        """
+        Send a translation request to one LLM service through its provider's circuit breaker.
+
+        Raises CircuitOpenError without calling the service while the circuit is open,
+        and the service's LLMServiceError when the request fails.
+
+        Returns:
+            str: The complete response text
+        """
+        breaker = self._get_circuit_breaker(provider_name)
+        breaker.before_call()
+        try:
+            response = self._read_service_response(service, text, output_language, model_name, on_segment, cancel_event)
+        except RequestCancelled:
+            breaker.release()
+            raise
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        breaker.record_success()
+        return response
+
+    def _read_service_response(self, service, text, output_language, model_name, on_segment=None, cancel_event=None):
+        """
+        Send a translation request to one LLM service and read the response.
+
+        When streaming is enabled and the service supports it, the response is read
+        incrementally and on_segment(segment_index, segment_text) is called for every
+        segment closed by LINE_BREAK_TOKEN, before the full response has arrived.
+        Setting cancel_event stops reading a streamed response and raises RequestCancelled.
+        
+        Returns:
+            str: The complete response text
+        """
+        if not (self.streaming_enabled and service.supports_streaming):
+            return service.translate(text, output_language, model_name)
+
+        parser = DelimitedSegmentParser(self.placeholder_scheme.line_break_pattern) if on_segment else None
+        pieces = []
+        segment_index = 0
+        stream = service.translate_stream(text, output_language, model_name)
+        for delta in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                stream.close()  # Lets the service release its HTTP connection
+                raise RequestCancelled("Request cancelled")
+            pieces.append(delta)
+            if parser:
+                for segment in parser.feed(delta):
+                    on_segment(segment_index, segment)
+                    segment_index += 1
+        if parser:
+            for segment in parser.close():
+                on_segment(segment_index, segment)
+                segment_index += 1
+        return "".join(pieces).strip()
+
+    def _dispatch_request(self, text, output_language, selected_model, on_segment=None, cancel_event=None):
+        """
+        Send a translation request, through the router when one is set.
+
+        With a router, the request goes to the best available target and fails over
+        to the next one when a target errors, until every target has been tried.
+        Every error type fails over, since keys, quotas, context sizes and content
+        filters all differ between providers. Requests of a model cascade pass their
+        CascadeTier as selected_model and go to that tier's service.
+        
+        Returns:
+            str: The complete response text
+        """
+        if isinstance(selected_model, CascadeTier):
+            return self._dispatch_tier_request(selected_model, text, output_language, on_segment, cancel_event)
+
+        if not self.router:
+            if self.key_pool:
+                return self._dispatch_pooled_request(text, output_language, selected_model, on_segment, cancel_event)
+            return self._call_service(self.llm_service, self.llm_provider_name, text, output_language, selected_model, on_segment, cancel_event)
+
+        tried = set()
+        last_error = None
+        while True:
+            target = self.router.select(exclude=tried)
+            if target is None:
+                if last_error is not None:
+                    raise last_error
+                raise RuntimeError("No route target is currently available")
+            start_time = time.time()
+            try:
+                response = self._call_service(target.service, target.provider, text, output_language, target.model, on_segment, cancel_event)
+            except RequestCancelled:
+                self.router.release(target)
+                raise
+            except CircuitOpenError as e:
+                # Provider is known to be down: reroute without counting it against the target
+                self.router.release(target)
+                tried.add(target)
+                last_error = e
+                continue
+            except Exception as e:
+                self.router.record_failure(target, e, getattr(e, 'retry_after', None))
+                print(f"Route target {target.name} failed, failing over: {e}")
+                tried.add(target)
+                last_error = e
+                continue
+            self.router.record_success(target, time.time() - start_time, target.service.rate_limit_info)
+            return response
+
+    def _dispatch_tier_request(self, tier, text, output_language, on_segment=None, cancel_event=None):
+        """
+        Send a translation request to a cascade tier, counting its latency and tokens.
+
+        Returns:
+            str: The complete response text
+        """
+        start_time = time.time()
+        try:
+            response = self._call_service(tier.service, tier.provider, text, output_language, tier.model,
+                                          on_segment, cancel_event)
+        except RequestCancelled:
+            raise
+        except Exception:
+            self.cascade.record_request(tier, time.time() - start_time, estimate_tokens(text), failed=True)
+            raise
+        self.cascade.record_request(tier, time.time() - start_time, estimate_tokens(text), estimate_tokens(response))
+        return response
+
+    def _dispatch_pooled_request(self, text, output_language, selected_model, on_segment=None, cancel_event=None):
+        """
+        Send a translation request with one of the pooled API keys.
+
+        A key that is throttled or rejected is rotated out and the request is sent
+        again with the next key, until no key is left.
+
+        Returns:
+            str: The complete response text
+        """
+        tried = set()
+        last_error = None
+        while True:
+            pooled_key = self.key_pool.acquire(exclude=tried)
+            if pooled_key is None:
+                if last_error is not None:
+                    raise last_error
+                raise RateLimited(f"All {self.llm_provider_name} API keys are rate limited",
+                                  provider=self.llm_provider_name, retry_after=self.key_pool.next_available_in())
+            try:
+                response = self._call_service(pooled_key.service, self.llm_provider_name, text, output_language,
+                                              selected_model, on_segment, cancel_event)
+            except RequestCancelled:
+                self.key_pool.release(pooled_key)
+                raise
+            except RateLimited as e:
+                self.key_pool.record_rate_limited(pooled_key, e.retry_after)
+                print(f"API key {pooled_key.name} is rate limited, rotating to the next key")
+                tried.add(pooled_key)
+                last_error = e
+                continue
+            except AuthError as e:
+                self.key_pool.record_rejected(pooled_key)
+                tried.add(pooled_key)
+                last_error = e
+                continue
+            except Exception:
+                self.key_pool.record_failure(pooled_key)
+                raise
+            self.key_pool.record_success(pooled_key, estimate_tokens(text), pooled_key.service.rate_limit_info)
+            return response
+
+    def _requests_cancellable(self, selected_model):
+        """Whether every service that may serve a request for selected_model streams, so the request can be cancelled."""
+        if not self.streaming_enabled:
+            return False
+        if isinstance(selected_model, CascadeTier):
+            services = [selected_model.service]
+        elif self.router:
+            services = [target.service for target in self.router.targets]
+        else:
+            services = [self.llm_service]
+        return all(service is not None and service.supports_streaming for service in services)
+
+    def _request_translation(self, text, output_language, selected_model, on_segment=None):
+        """
+        Send a translation request, hedging it when hedging is enabled.
+
+        Only requests that can be cancelled are hedged: a response that is not streamed
+        cannot be stopped, so a losing duplicate would run to completion and spend
+        tokens outside the hedging budget.
+
+        Returns:
+            str: The complete response text
+        """
+        if not self.hedger or not self._requests_cancellable(selected_model):
+            return self._dispatch_request(text, output_language, selected_model, on_segment)
+
+        # Only the first attempt that produces output may stream segments to the caller
+        segment_owner = []
+        owner_lock = threading.Lock()
+
+        def attempt(cancel_event):
+            def owned_segment(segment_index, segment_text):
+                with owner_lock:
+                    if not segment_owner:
+                        segment_owner.append(cancel_event)
+                    is_owner = segment_owner[0] is cancel_event
+                if is_owner:
+                    on_segment(segment_index, segment_text)
+            return self._dispatch_request(text, output_language, selected_model,
+                                          owned_segment if on_segment else None, cancel_event)
+
+        return self.hedger.run(attempt, estimate_tokens(text))
+
+    def _request_completion(self, prompt):
+        """Get a completion from the current LLM service through its provider's circuit breaker."""
+        breaker = self._get_circuit_breaker(self.llm_provider_name)
+        breaker.before_call()
+        try:
+            response = self.llm_service.get_completion(prompt)
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        breaker.record_success()
+        return response
+
+    def report_job_metrics(self, progress_callback=None):
+        """Collect metrics of the finished job into last_job_metrics and log them."""
+        if self.circuit_breakers:
+            self.last_job_metrics['circuit_breakers'] = [b.snapshot() for b in self.circuit_breakers.values()]
+        if self.key_pool:
+            self.last_job_metrics['api_keys'] = self.key_pool.snapshot()
+        if self.router:
+            self.last_job_metrics['routes'] = self.router.snapshot()
+        if self.hedger:
+            self.last_job_metrics['hedging'] = self.hedger.stats()
+        if self.micro_batcher:
+            self.last_job_metrics['micro_batching'] = self.micro_batcher.stats()
+        if self.cascade:
+            self.last_job_metrics['cascade'] = self.cascade.snapshot()
+        if self.glossary is not None:
+            self.last_job_metrics['glossary'] = self.glossary.stats()
+        if not progress_callback:
+            return
+        for route in self.last_job_metrics.get('routes', []):
+            p50 = f"{route['p50']:.2f}s" if route['p50'] is not None else "n/a"
+            p95 = f"{route['p95']:.2f}s" if route['p95'] is not None else "n/a"
+            progress_callback(
+                f"Route {route['target']}: {route['requests']} requests, "
+                f"error rate {route['error_rate'] * 100:.0f}%, p50 {p50}, p95 {p95}"
+            )
+        for breaker in self.last_job_metrics.get('circuit_breakers', []):
+            progress_callback(
+                f"Circuit breaker {breaker['name']}: {breaker['state']}, opened {breaker['times_opened']} time(s), "
+                f"{breaker['rejected_calls']} call(s) failed fast"
+            )
+        for key in self.last_job_metrics.get('api_keys', []):
+            progress_callback(
+                f"API key {key['key']}: {key['requests']} requests, {key['tokens_sent']} tokens sent, "
+                f"rate limited {key['rate_limited']} time(s), {key['failures']} failure(s)"
+            )
+        glossary = self.last_job_metrics.get('glossary')
+        if glossary:
+            progress_callback(
+                f"Glossary: {glossary['terms_injected']} term(s) added to {glossary['chunks_with_terms']} "
+                f"of {glossary['chunks']} chunk(s), {glossary['average_terms']:.1f} per chunk"
+            )
+        hedging = self.last_job_metrics.get('hedging')
+        if hedging:
+            progress_callback(
+                f"Hedging: {hedging['hedges_sent']} hedges sent, {hedging['hedges_won']} won, "
+                f"{hedging['hedge_tokens']} extra tokens (~{hedging['primary_tokens']} primary)"
+            )
+        for tier in self.last_job_metrics.get('cascade', []):
+            p50 = f"{tier['p50']:.2f}s" if tier['p50'] is not None else "n/a"
+            p95 = f"{tier['p95']:.2f}s" if tier['p95'] is not None else "n/a"
+            progress_callback(
+                f"Cascade tier {tier['tier']}: {tier['lines']} line(s) in {tier['requests']} request(s), "
+                f"{tier['escalated_lines']} escalated ({tier['escalation_rate'] * 100:.0f}%), "
+                f"~{tier['input_tokens'] + tier['output_tokens']} tokens, cost {tier['cost']:.4f}, p50 {p50}, p95 {p95}"
+            )
+        batching = self.last_job_metrics.get('micro_batching')
+        if batching:
+            progress_callback(f"Micro-batching: {batching['batched_chunks']} small chunk(s) sent in "
+                              f"{batching['batches']} request(s)")
+
+    def translate_file(self, input_file_path, output_language, selected_model, chunk_size=None, progress_callback=None, update_callback=None, segment_callback=None):
         """
         Translate a file to the specified language using the selected LLM model.
         
@@ -484,12 +1279,20 @@ class Translator:
             chunk_size (int, optional): Override the default chunk size
             progress_callback (function, optional): Function to call with progress updates
             update_callback (function, optional): Function to call with intermediate results
+            segment_callback (function, optional): Called as segment_callback(chunk_number, line_index, line)
+                for every translated line as soon as it is received from a streamed response; each
+                line is passed once, even when its request is retried or fails over
             
         Returns:
             str: The translated text
+
+        Raises:
+            OSError: The input file cannot be read
         """
         # Set the current model
         self.current_model = selected_model
+        self.last_alignment = None
+        self.last_job_metrics = {}  # Metrics of an earlier run must not describe this one
         
         if self.llm_service:
             self.llm_service.set_model(selected_model)
@@ -500,7 +1303,7 @@ class Translator:
         if content is None:
             message = f"Failed to read file: {input_file_path}"
             if progress_callback: progress_callback(message)
-            return f"Error: {message}"
+            raise OSError(message)
 
         if not content.strip():
             message = "Input file is empty."
@@ -516,82 +1319,747 @@ class Translator:
         # Validate chunk size
         validation_message = self.set_chunk_size(actual_chunk_size)
         if progress_callback: progress_callback(validation_message)
-        actual_chunk_size = self.chunk_size  # Use validated chunk size
-        
+
+        adapter = get_adapter(self.file_format, input_file_path, lines, self.format_options)
+        self.detect_markup_profile(content, adapter, progress_callback)
+        if adapter is not None:
+            return self.translate_document(adapter, lines, output_language, selected_model, progress_callback)
+
+        return self.translate_lines(lines, output_language, selected_model, progress_callback, update_callback, segment_callback)
+
+    def translate_document(self, adapter, lines, output_language, selected_model, progress_callback=None):
+        """
+        Translate the lines of a file through a format adapter.
+
+        Only the segments extracted by the adapter that it still needs translated are
+        sent; the rest of the file is written back as it was. Intermediate results are
+        not previewed. Adapters that keep the lines of the file leave an AlignmentMap
+        of the source and translated lines in last_alignment.
+
+        Returns:
+            str: The translated text
+        """
+        document, segments = adapter.extract(lines)
+        indexes = pending_segments(adapter, document, segments, output_language)
+        if progress_callback:
+            progress_callback(f"Format {adapter.name}: {len(indexes)} of {len(segments)} translatable segment(s) "
+                              f"to translate in {len(lines)} line(s)")
+        translations = self.translate_segments([segments[index] for index in indexes], output_language,
+                                               selected_model, progress_callback)
+        translations = expand_translations(indexes, translations, len(segments))
+        translated_lines = list(adapter.reinject(document, translations, output_language))
+        if adapter.preserves_lines and len(translated_lines) == len(lines):
+            self.last_alignment = AlignmentMap(lines, translated_lines, output_language, adapter.name)
+        return "".join(translated_lines)
+
+    def translate_segments(self, segments, output_language, selected_model, progress_callback=None):
+        """
+        Translate (key, text) segments, one line each, through the usual chunked pipeline.
+
+        Returns:
+            list: One translated text for each segment
+        """
+        if not segments:
+            return []
+        translated_lines = self.translate_line_list(segment_lines(segments), output_language, selected_model,
+                                                    progress_callback)
+        return segment_translations(translated_lines)
+
+    def begin_job(self, selected_model, progress_callback=None):
+        """
+        Start a job: select the model and clear the metrics and statistics of the
+        previous job. Callers translating chunks with translate_chunk() call this
+        first and report_job_metrics() when all chunks are done.
+        """
+        self.current_model = selected_model
+        self.last_job_metrics = {}
+        self._progress_callback = progress_callback
+        if self.glossary is not None:
+            self.glossary.reset_stats()
+        if self.llm_service:
+            self.llm_service.set_model(selected_model)
+
+    def split_into_chunks(self, lines):
+        """Split lines (each keeping its line ending) into chunks of the current chunk size."""
+        return self._split_text_into_chunks(lines, self.chunk_size)
+
+    def translate_chunk(self, i, chunk_lines, total_chunks, output_language, selected_model, progress_callback=None,
+                        strict_line_count=False):
+        """
+        Translate one chunk from split_into_chunks() with the translator's retry policy,
+        cascade, router and micro-batching, for callers that schedule chunks themselves.
+
+        Args:
+            i (int): Index of the chunk (used for log messages)
+            total_chunks (int): Number of chunks of the job (used for log messages)
+            strict_line_count (bool): Fail the chunk when the response does not have one
+                line per source line, instead of padding or truncating it
+
+        Returns:
+            tuple: (translated lines, whether the chunk failed, the error to defer the chunk
+                on until the provider recovers, else None; see deferral_wait())
+        """
+        return self._translate_chunk_with_retries(i, chunk_lines, total_chunks, output_language, selected_model,
+                                                  progress_callback, strict_line_count=strict_line_count)
+
+    def translate_lines(self, lines, output_language, selected_model, progress_callback=None, update_callback=None, segment_callback=None):
+        """
+        Translate a list of lines (each keeping its line ending) using the current chunk size.
+        The AlignmentMap of the source and translated lines is kept in last_alignment.
+
+        Returns:
+            str: The translated text
+        """
+        translated_lines = self.translate_line_list(lines, output_language, selected_model, progress_callback,
+                                                    update_callback, segment_callback)
+        self.last_alignment = AlignmentMap(lines, translated_lines, output_language)
+        return "".join(translated_lines)
+
+    def translate_line_list(self, lines, output_language, selected_model, progress_callback=None, update_callback=None, segment_callback=None):
+        """
+        Translate a list of lines (each keeping its line ending) into a list of the same length.
+
+        With templating enabled the lines are collapsed into templates first; see
+        _translate_templated_lines(). With fuzzy matching, lines the translation memory
+        can translate are reused without a request; see _translate_remembered_lines().
+        Callbacks are the same as for translate_file().
+
+        Returns:
+            list: The translated lines, one for each input line
+        """
+        if self.templating_enabled:
+            return self._translate_templated_lines(lines, output_language, selected_model, progress_callback)
+        if self.fuzzy_matching_enabled:
+            return self._translate_remembered_lines(lines, output_language, selected_model, progress_callback,
+                                                    update_callback, segment_callback)
+        return self._translate_chunked_lines(lines, output_language, selected_model, progress_callback,
+                                             update_callback, segment_callback)
+
+    def _translate_remembered_lines(self, lines, output_language, selected_model, progress_callback=None, update_callback=None, segment_callback=None):
+        """
+        Translate lines, reusing the translation memory's translations of exact and close matches.
+
+        Only the lines without a reusable translation are chunked and sent. Streamed
+        segments are only passed on when no line was reused, since the chunk line
+        indexes then no longer match the input.
+
+        Returns:
+            list: The translated lines, one for each input line
+        """
+        translated = list(lines)
+        missing = []
+        for index, line in enumerate(lines):
+            match = re.match(r"(\s*)(.*?)(\r?\n)?$", line, re.DOTALL)
+            content = match.group(2).strip()
+            translation = self.memory_translation(output_language, content) if content else None
+            if translation is None:
+                missing.append(index)
+            else:
+                translated[index] = match.group(1) + translation + (match.group(3) or "")
+
+        reused = len(lines) - len(missing)
+        if not reused:
+            return self._translate_chunked_lines(lines, output_language, selected_model, progress_callback,
+                                                 update_callback, segment_callback)
+        if progress_callback:
+            progress_callback(f"Translation memory: {reused} of {len(lines)} line(s) reused without a request")
+        self.last_job_metrics = {}
+        if missing:
+            sent = self._translate_chunked_lines([lines[index] for index in missing], output_language,
+                                                 selected_model, progress_callback)
+            for index, translated_line in zip(missing, sent):
+                # A line sent alone may come back without its line ending, which would join it to the next line
+                translated[index] = translated_line.rstrip('\r\n') + line_ending(lines[index])
+        self.last_job_metrics['reused_lines'] = reused
+        if update_callback:
+            update_callback("".join(translated))
+        return translated
+
+    def _translate_templated_lines(self, lines, output_language, selected_model, progress_callback=None):
+        """
+        Translate lines through templates and the translation memory.
+
+        Only the templates not yet in the translation memory are sent, one line each.
+        Intermediate results are not previewed, since the lines sent are templates.
+
+        Returns:
+            list: The translated lines, one for each input line
+        """
+        table = TemplateTable()
+        entries = table.add_lines(lines)
+        translations = {}
+        missing = []
+        for index, template in enumerate(table.templates):
+            translation = self.memory_translation(output_language, template)
+            if translation is None:
+                missing.append(index)
+            else:
+                translations[index] = translation
+
+        if progress_callback:
+            progress_callback(f"Templating: {len(lines)} line(s) collapsed into {len(table.templates)} template(s), "
+                              f"{len(table.templates) - len(missing)} found in the translation memory")
+
+        self.last_job_metrics = {}
+        if missing:
+            template_lines = [table.templates[index] + "\n" for index in missing]
+            translated = self._translate_chunked_lines(template_lines, output_language, selected_model, progress_callback)
+            # Chunks that failed keep the template text, which must not be remembered as a translation
+            failed = bool(self.last_job_metrics.get('failed_chunks'))
+            for index, translated_line in zip(missing, translated):
+                translations[index] = translated_line.strip()
+                if not failed:
+                    self.translation_memory.store(output_language, table.templates[index], translations[index])
+
+        self.last_job_metrics['templating'] = table.stats(len(lines))
+        self.last_job_metrics['translation_memory'] = self.translation_memory.stats()
+        if progress_callback:
+            memory = self.last_job_metrics['translation_memory']
+            progress_callback(f"Translation memory: {memory['entries']} entries, hit rate {memory['hit_rate'] * 100:.0f}%")
+        return table.render(entries, translations)
+
+    def _translate_chunked_lines(self, lines, output_language, selected_model, progress_callback=None, update_callback=None, segment_callback=None):
+        """
+        Translate a list of lines (each keeping its line ending) chunk by chunk.
+
+        Chunks are translated on a ChunkScheduler: in file order with a single worker,
+        or concurrently and largest-first when set_concurrency() allows more workers.
+        With deferred retry enabled, chunks that hit the API quota are parked in a
+        DeferredQueue; the job waits for the quota reset and then sends only those
+        chunks. Completed chunks are saved, so running an unfinished job again does
+        not send them again. Callbacks are the same as for translate_file().
+
+        Returns:
+            list: The translated lines, one for each input line
+        """
+        self.begin_job(selected_model, progress_callback)
+
         # Create chunks split by lines
-        chunks = self._split_text_into_chunks(lines, actual_chunk_size)
-        translated_lines_all = []
+        chunks = self.split_into_chunks(lines)
         total_chunks = len(chunks)
-        failed_chunks = []  # Track failed chunks for reporting
-        quota_exceeded = False  # Track if we hit quota limits
+        results = {}  # Chunk index -> translated lines
+        failed_chunks = set()  # Chunk numbers of failed chunks, for reporting
+        job_state = {'deferring': False, 'completed': 0}  # Set 'deferring' to stop dispatching new chunks
+        state_lock = threading.Lock()
+
+        queue = None
+        if self.deferred_retry_enabled:
+            queue = DeferredQueue.for_job(self.deferred_state_dir, lines, output_language, selected_model,
+                                          self.chunk_size, total_chunks, self.job_settings())
+            results.update(queue.completed)
+            job_state['completed'] = len(queue.completed)
 
         if progress_callback: 
             progress_callback(f"Starting translation of {total_chunks} chunk(s) using {self.llm_provider_name} ({selected_model})")
-            progress_callback(f"Using chunk size: {actual_chunk_size} characters")
+            progress_callback(f"Using chunk size: {self.chunk_size} characters")
+            if self.max_workers > 1:
+                progress_callback(f"Translating up to {self.max_workers} chunks concurrently, largest first")
+            if queue is not None and queue.completed:
+                progress_callback(f"Resuming saved job: {len(queue.completed)}/{total_chunks} chunk(s) already translated")
 
-        for i, chunk_lines in enumerate(chunks):
-            # Check if we've hit quota limits
-            if quota_exceeded:
+        def completed_prefix():
+            """Return the text of the chunks completed in file order and the index of the next chunk."""
+            prefix_lines = []
+            next_index = 0
+            while next_index in results:
+                prefix_lines.extend(results[next_index])
+                next_index += 1
+            return "".join(prefix_lines), next_index
+
+        def run_chunk(i, chunk_lines):
+            emit_segment = None
+            if segment_callback or update_callback:
+                streamed_lines = {}  # Keyed by line index so a retried attempt overwrites earlier output
+
+                def emit_segment(segment_index, streamed_line):
+                    # A request that failed over to another target or key, or a retried chunk,
+                    # streams its lines again from the start; they were already passed on
+                    already_sent = segment_index in streamed_lines
+                    streamed_lines[segment_index] = streamed_line
+                    if segment_callback and not already_sent:
+                        segment_callback(i + 1, segment_index, streamed_line)
+                    if update_callback:
+                        with state_lock:
+                            prefix_text, next_index = completed_prefix()
+                        # Only preview the chunk that directly follows the completed text
+                        if next_index == i:
+                            update_callback(prefix_text + "".join(streamed_lines[k] for k in sorted(streamed_lines)))
+
+            translated_lines_chunk, failed, deferral_error = self._translate_chunk_with_retries(
+                i, chunk_lines, total_chunks, output_language, selected_model, progress_callback, emit_segment
+            )
+
+            with state_lock:
+                results[i] = translated_lines_chunk
+                if failed:
+                    failed_chunks.add(i + 1)
+                else:
+                    failed_chunks.discard(i + 1)
+                    job_state['completed'] += 1
+                if deferral_error:
+                    job_state['deferring'] = True
+                completed = job_state['completed']
+                current_translation, _ = completed_prefix()
+
+            if queue is not None:
+                if deferral_error:
+                    queue.defer(i, self.deferral_wait(deferral_error))
+                elif not failed:
+                    queue.record_done(i, translated_lines_chunk)
+
+            # Update translation results in real-time
+            if update_callback:
+                update_callback(current_translation)
+
+            # Report progress with quality metrics more frequently
+            if completed % 2 == 1 or completed == total_chunks:  # Update every 2 chunks or at the end
+                progress_percent = 10 + (completed / total_chunks) * 80
                 if progress_callback:
-                    progress_callback(f"Skipping remaining chunks due to API quota limits. Will retry later.")
-                failed_chunks.extend(range(i+1, total_chunks+1))
-                translated_lines_all.extend(chunk_lines)  # Keep original content
-                continue
+                    progress_callback(f"Progress: {progress_percent:.1f}% | Chunk {completed}/{total_chunks}")
 
-            # Add initial delay between chunks
-            if i > 0:
-                time.sleep(BASE_DELAY)
-            
-            # Retry logic for failed requests
-            retries = 0
-            success = False
-            last_error = None
+        # Keep the delay between chunk requests, spread across the concurrent workers
+        scheduler = ChunkScheduler(self.max_workers, dispatch_interval=BASE_DELAY / self.max_workers)
+        chunk_sizes = [estimate_tokens("".join(chunk)) for chunk in chunks]
+        pending = [k for k in range(total_chunks) if k not in results]
+        deferred_rounds = 0
+
+        while pending:
+            if queue is not None:
+                wait_time = queue.wait_time()
+                if wait_time > self.deferred_max_wait:
+                    if progress_callback:
+                        progress_callback(f"API quota resets in {wait_time:.0f}s, longer than the {self.deferred_max_wait:.0f}s wait limit. "
+                                          f"{len(pending)} deferred chunk(s) are saved; run the same translation again after the reset to finish them.")
+                    break
+                if wait_time > 0:
+                    if progress_callback:
+                        progress_callback(f"API quota exhausted: parking job for {wait_time:.0f}s until the quota resets ({len(pending)} chunk(s) deferred)")
+                    time.sleep(wait_time)
+
+            job_state['deferring'] = False
+            _, skipped = scheduler.run(
+                [chunks[k] for k in pending], [chunk_sizes[k] for k in pending],
+                lambda j, chunk_lines: run_chunk(pending[j], chunk_lines),
+                should_stop=lambda: job_state['deferring'],
+                batchable=[self.is_micro_batchable(chunks[k]) for k in pending]
+            )
+            skipped = [pending[j] for j in skipped]
+            if skipped and progress_callback:
+                progress_callback(f"Deferring {len(skipped)} remaining chunk(s) due to API quota limits. Will retry later.")
+
+            if queue is None:
+                pending = skipped
+                break
+            for k in skipped:
+                queue.defer(k)
+            pending = queue.take_deferred()
+            if pending:
+                deferred_rounds += 1
+                if deferred_rounds > MAX_DEFERRED_ROUNDS:
+                    if progress_callback:
+                        progress_callback(f"Giving up on {len(pending)} deferred chunk(s) after {MAX_DEFERRED_ROUNDS} deferred retries.")
+                    break
+
+        # Chunks still deferred keep their original content
+        for k in pending:
+            results.setdefault(k, list(chunks[k]))
+            failed_chunks.add(k + 1)
+        quota_exceeded = bool(pending)
+        failed_chunks = sorted(failed_chunks)
+        if queue is not None and not failed_chunks:
+            queue.clear()
+        
+        # Final quality report
+        if progress_callback:
+            progress_callback("Translation completed!")
+        
+        # Report final status with more detail about quota issues
+        if quota_exceeded:
+            if progress_callback:
+                progress_callback(f"Translation partially completed. {len(pending)} chunks deferred due to API quota limits.")
+                progress_callback("Consider retrying the translation after the API quota resets or reducing chunk size.")
+        elif failed_chunks:
+            if progress_callback:
+                progress_callback(f"Translation completed with {len(failed_chunks)} failed chunks (chunks: {', '.join(map(str, failed_chunks))})")
+        else:
+            if progress_callback: 
+                progress_callback("Translation completed successfully.")
+
+        self.last_job_metrics.update({
+            'total_chunks': total_chunks,
+            'failed_chunks': failed_chunks,
+            'quota_exceeded': quota_exceeded,
+            'deferred_chunks': [k + 1 for k in pending],
+            'deferred_rounds': deferred_rounds,
+        })
+        self.report_job_metrics(progress_callback)
             
-            while not success and retries < MAX_RETRIES:
-                try:
-                    # Reinitialize LLM service for each chunk
-                    if not self._reinitialize_llm_service():
-                        error_message = f"[CHUNK_ERROR:{i+1}] Failed to reinitialize LLM service"
-                        if progress_callback: progress_callback(error_message)
-                        failed_chunks.append(i+1)
-                        translated_lines_chunk = chunk_lines
-                        translated_lines_all.extend(translated_lines_chunk)
-                        break
+        # Every chunk translates to as many lines as it has, so the lines stay aligned with the input
+        return [line for i in range(total_chunks) for line in results[i]]
+
+    def deferral_wait(self, error):
+        """Return the seconds until a chunk deferred by error may be sent again."""
+        if isinstance(error, CircuitOpenError):
+            return error.retry_in
+        return error.retry_after if error.retry_after is not None else DEFAULT_QUOTA_RESET_WAIT
+
+    def _translate_chunk_with_retries(self, i, chunk_lines, total_chunks, output_language, selected_model,
+                                      progress_callback=None, emit_segment=None, escalate=True, strict_line_count=False):
+        """
+        Translate one chunk, handling failed requests as decided by the retry policy.
+
+        Depending on the error type the chunk is retried after a delay, split in two
+        halves that are translated separately, or given up on with its original text.
+        With a model cascade the chunk goes through its tiers, unless escalate is
+        False (a request for one tier). With strict_line_count, a response that does
+        not have one line per source line fails the chunk instead of being padded or
+        truncated (see _translate_chunk_request).
 
+        Returns:
+            tuple: (translated lines, whether the chunk failed, the RateLimited or CircuitOpenError
+                error if the chunk should be deferred until the provider recovers, else None)
+        """
+        if self.cascade is not None and escalate:
+            return self._translate_chunk_cascaded(i, chunk_lines, total_chunks, output_language,
+                                                  progress_callback, emit_segment, strict_line_count)
+
+        if self.split_long_lines and len(chunk_lines) == 1 and len(chunk_lines[0]) > self.chunk_size:
+            line_split = LineSplit.split(chunk_lines[0], self.chunk_size,
+                                         self.markup_lexer.pattern if self.markup_lexer else self.keyword_pattern)
+            if line_split is not None:
+                return self._translate_long_line(i, chunk_lines, line_split, total_chunks, output_language,
+                                                 selected_model, progress_callback, emit_segment)
+
+        attempts = 0
+
+        while True:
+            try:
+                # Reinitialize the LLM service before a retry (router targets and pooled keys keep their own services)
+                if attempts > 0 and not self.router and not self.key_pool and not self._reinitialize_llm_service():
+                    error_message = f"[CHUNK_ERROR:{i+1}] Failed to reinitialize LLM service"
+                    if progress_callback: progress_callback(error_message)
+                    return list(chunk_lines), True, None
+
+                if progress_callback:
+                    progress_callback(f"Translating chunk {i + 1}/{total_chunks}...")
+                    if attempts > 0:
+                        progress_callback(f"Retry attempt {attempts + 1} for chunk {i + 1}")
+
+                translated_lines_chunk, failed = self._translate_chunk(
+                    i, chunk_lines, output_language, selected_model, progress_callback, emit_segment, strict_line_count
+                )
+                return translated_lines_chunk, failed, None
+                
+            except CircuitOpenError as e:
+                # Provider is down: fail fast instead of sleeping through retries
+                if progress_callback:
+                    progress_callback(f"[CHUNK_ERROR:{i+1}] {e}")
+                return list(chunk_lines), True, e
+
+            except Exception as e:
+                attempts += 1
+                decision = self.retry_policy.decide(e, attempts, can_split=len(chunk_lines) > 1)
+
+                if decision.action == RETRY:
+                    if progress_callback:
+                        progress_callback(f"{decision.reason} for chunk {i + 1}, waiting {decision.delay:.1f}s before retry...")
+                    time.sleep(decision.delay)
+                    continue
+
+                if decision.action == SPLIT:
                     if progress_callback:
-                        progress_callback(f"Translating chunk {i + 1}/{total_chunks}...")
-                        if retries > 0:
-                            progress_callback(f"Retry attempt {retries + 1} for chunk {i + 1}")
+                        progress_callback(f"{decision.reason} for chunk {i + 1}, splitting it into smaller requests...")
+                    return self._translate_split_chunk(i, chunk_lines, total_chunks, output_language, selected_model,
+                                                       progress_callback, emit_segment, strict_line_count)
+
+                if progress_callback:
+                    progress_callback(f"[CHUNK_ERROR:{i+1}] {decision.reason}: {e}")
+                # Keep original on final failure
+                return list(chunk_lines), True, e if isinstance(e, RateLimited) else None
+
+    def _translate_split_chunk(self, i, chunk_lines, total_chunks, output_language, selected_model,
+                               progress_callback=None, emit_segment=None, strict_line_count=False):
+        """
+        Translate a chunk as two halves, each with its own retries.
+
+        Returns:
+            tuple: (translated lines, whether any half failed, the deferral error of a half, else None)
+        """
+        middle = len(chunk_lines) // 2
+        translated_lines = []
+        failed = False
+        for offset, part in ((0, chunk_lines[:middle]), (middle, chunk_lines[middle:])):
+            part_emit = None
+            if emit_segment:
+                # Streamed line indexes are relative to the half, shift them back into the chunk
+                part_emit = lambda line_index, line, offset=offset: emit_segment(offset + line_index, line)
+            part_lines, part_failed, deferral_error = self._translate_chunk_with_retries(
+                i, part, total_chunks, output_language, selected_model, progress_callback, part_emit, escalate=False,
+                strict_line_count=strict_line_count
+            )
+            translated_lines.extend(part_lines)
+            failed = failed or part_failed
+            if deferral_error:
+                # The whole chunk is deferred and sent again, so drop the half already translated
+                return list(chunk_lines), True, deferral_error
+        return translated_lines, failed, None
+
+    def _translate_chunk_cascaded(self, i, chunk_lines, total_chunks, output_language, progress_callback=None,
+                                  emit_segment=None, strict_line_count=False):
+        """
+        Translate a chunk with the cheapest cascade tier, then send the lines it got
+        wrong (see _rejected_lines) to the next tiers, until none is rejected or the
+        last tier has answered. The requests of a tier are sent with the tier itself
+        as their model, so tiers sharing a model name stay apart.
+
+        Returns:
+            tuple: (translated lines, whether the chunk failed, the deferral error of a tier, else None)
+        """
+        tiers = self.cascade.tiers
+        translated_lines = list(chunk_lines)
+        pending = list(range(len(chunk_lines)))  # Indexes of the lines the current tier translates
+        failed = True
+        for level, tier in enumerate(tiers):
+            source_lines = [chunk_lines[j] for j in pending]
+            tier_lines, failed, deferral_error = self._translate_chunk_with_retries(
+                i, source_lines, total_chunks, output_language, tier, progress_callback,
+                emit_segment if level == 0 else None, escalate=False, strict_line_count=strict_line_count
+            )
+            if deferral_error:
+                return list(chunk_lines), True, deferral_error
+            for j, line in zip(pending, tier_lines):
+                translated_lines[j] = line
+
+            if level == len(tiers) - 1:
+                self.cascade.record_lines(tier, len(source_lines), 0)
+                break
+            # A failed request keeps the source lines, so all of them are escalated
+            rejected = range(len(source_lines)) if failed else self._rejected_lines(source_lines, tier_lines,
+                                                                                   output_language)
+            self.cascade.record_lines(tier, len(source_lines), len(rejected))
+            if not rejected:
+                break
+            pending = [pending[k] for k in rejected]
+            if progress_callback:
+                progress_callback(f"Escalating {len(pending)} line(s) of chunk {i + 1} from {tier.name} "
+                                  f"to {tiers[level + 1].name}")
+        return translated_lines, failed, None
+
+    def _rejected_lines(self, source_lines, translated_lines, output_language):
+        """
+        Return the indexes of the translated lines that fail validation: empty
+        translations of text, protected spans that were lost, placeholders or line
+        break tokens left in the output, and lines not in the output language.
+        """
+        scheme = self.placeholder_scheme
+        rejected = set()
+        for j, (source, translated) in enumerate(zip(source_lines, translated_lines)):
+            content = source.strip()
+            if not content:
+                continue
+            if not translated.strip():
+                rejected.add(j)
+                continue
+            _, keywords = self._extract_keywords_smart(content)
+            spans = Counter(keywords.values())
+            if any(translated.count(span) < count for span, count in spans.items()):
+                rejected.add(j)
+            elif any(pattern.search(translated) and not pattern.search(source)
+                     for pattern in (scheme.keyword_pattern, scheme.line_break_pattern)):
+                rejected.add(j)
+
+        report = self.detect_untranslated_sections("\n".join(line.rstrip('\r\n') for line in translated_lines),
+                                                   output_language)
+        rejected.update(index for index, _ in report['untranslated_lines'])
+        return sorted(rejected)
+
+    def _translate_long_line(self, i, chunk_lines, line_split, total_chunks, output_language, selected_model,
+                             progress_callback=None, emit_segment=None):
+        """
+        Translate a line longer than the chunk size as one request per sentence piece,
+        so no response runs into the output token limit, and join the pieces back
+        into one line. Pieces are translated concurrently when set_concurrency()
+        allows it, each with its own retries.
+
+        Returns:
+            tuple: (translated lines, whether any piece failed, the deferral error of a piece, else None)
+        """
+        pieces = line_split.pieces
+        if progress_callback:
+            progress_callback(f"Chunk {i + 1} is a line of {len(chunk_lines[0])} characters, "
+                              f"translating it as {len(pieces)} sentence pieces")
+        workers = min(self.max_workers, len(pieces))
+        scheduler = ChunkScheduler(workers, dispatch_interval=BASE_DELAY / workers)
+        results, _ = scheduler.run(
+            [[piece] for piece in pieces], [estimate_tokens(piece) for piece in pieces],
+            lambda j, piece_lines: self._translate_chunk_with_retries(
+                i, piece_lines, total_chunks, output_language, selected_model, progress_callback, escalate=False
+            )
+        )
+
+        failed = False
+        for j in range(len(pieces)):
+            piece_lines, piece_failed, deferral_error = results[j]
+            if deferral_error:
+                # The whole line is deferred and sent again
+                return list(chunk_lines), True, deferral_error
+            failed = failed or piece_failed
+        line = line_split.join(["".join(results[j][0]) for j in range(len(pieces))])
+        if emit_segment:
+            emit_segment(0, line)
+        return [line], failed, None
+
+    def translate_chunk_multilingual(self, i, chunk_lines, output_languages, selected_model, progress_callback=None):
+        """
+        Translate the lines of one chunk into several languages with a single structured request.
+
+        The lines are protected once and sent as a JSON array; the model answers with a
+        JSON object holding one array of translated lines per language. Request errors
+        are raised as usual, and ValueError is raised when the response does not hold
+        a translation of every line for every language, so the caller can fall back
+        to one request per language.
+
+        Returns:
+            dict: Language -> translated lines
+        """
+        original_lines_info = []
+        for line_in_chunk in chunk_lines:
+            match = re.match(r"(\s*)(.*?)(\r?\n)?$", line_in_chunk, re.DOTALL)
+            original_lines_info.append({
+                'leading': match.group(1) or "",
+                'content': match.group(2) or "",
+                'ending': match.group(3) or "",
+            })
+
+        modified_chunk_text, keywords = self._extract_keywords_smart([info['content'] for info in original_lines_info])
+        protected_lines = modified_chunk_text.split(self.LINE_BREAK_TOKEN)
+        if len(protected_lines) != len(original_lines_info):
+            raise ValueError("Line structure changed while protecting keywords")
+
+        if progress_callback:
+            progress_callback(f"Processing multi-language content (chunk {i + 1}, {len(output_languages)} languages): "
+                              f"{modified_chunk_text[:100]}...")
+
+        language_list = ", ".join(output_languages)
+        glossary_text = "\n".join(info['content'] for info in original_lines_info)
+        glossary = "".join(self._glossary_section(i, glossary_text, language, progress_callback)
+                           for language in output_languages)
+        example = json.dumps({language: ["..."] for language in output_languages}, ensure_ascii=False)
+        instruction = f"""You are a professional translator. Translate every line of the following JSON array into each of these languages: {language_list}.
+
+PRESERVATION RULES (NEVER translate these):
+- Keep {self.placeholder_scheme.keyword('X')} placeholders exactly as they are
+- Keep technical identifiers like file_name:0, config_key, etc.
+- Keep symbols : = exactly as they are
+- Keep all formatting, punctuation, and special characters
+
+TRANSLATION RULES:
+- Only translate actual content text, especially text in quotes
+- For quoted strings: translate the content but keep the quote marks
+- Keep empty lines empty
+- Maintain natural fluency and the same meaning and tone in every language
+
+OUTPUT FORMAT:
+Reply with ONLY a JSON object that has one key per language, exactly as written above, each holding an array
+of exactly {len(protected_lines)} strings in the same order as the input lines, like: {example}
+
+{glossary}Lines to translate:
+{json.dumps(protected_lines, ensure_ascii=False)}"""
+
+        response = self._request_translation(instruction, language_list, selected_model)
+
+        # Collect the ("language", index) string leaves, ignoring any text around the JSON
+        parser = JsonStringLeafParser()
+        translations = {}
+        for path, value in parser.feed(response):
+            if len(path) == 2 and path[0] in output_languages and isinstance(path[1], int):
+                translations[path] = value
+
+        results = {}
+        for language in output_languages:
+            translated_lines = []
+            for j, info in enumerate(original_lines_info):
+                if not info['content'].strip():
+                    translated_lines.append(info['leading'] + info['ending'])
+                    continue
+                if (language, j) not in translations:
+                    raise ValueError(f"Structured response is missing line {j + 1} for {language}")
+                translated_content = self._restore_keywords(translations[(language, j)], keywords).strip()
+                translated_lines.append(info['leading'] + translated_content + info['ending'])
+            results[language] = translated_lines
+        return results
+
+    def _translate_chunk(self, i, chunk_lines, output_language, selected_model, progress_callback=None, emit_segment=None,
+                         strict_line_count=False):
+        """
+        Translate the lines of one chunk, in a micro-batch with other small chunks when
+        micro-batching is enabled and the chunk is small enough. Lines of batched chunks
+        are not streamed to emit_segment. Chunks with strict_line_count are always
+        sent on their own.
+
+        Returns:
+            tuple: (translated lines, whether the chunk failed)
+        """
+        if strict_line_count:
+            return self._translate_chunk_request(i, chunk_lines, output_language, selected_model, progress_callback,
+                                                 emit_segment, strict_line_count=True)
+        if self.is_micro_batchable(chunk_lines):
+            return self.micro_batcher.submit((output_language, selected_model), (i, chunk_lines, progress_callback),
+                                             sum(len(line) for line in chunk_lines))
+        return self._translate_chunk_request(i, chunk_lines, output_language, selected_model, progress_callback,
+                                             emit_segment)
+
+    def _translate_chunk_request(self, i, chunk_lines, output_language, selected_model, progress_callback=None, emit_segment=None,
+                                 strict_line_count=False):
+        """
+        Translate the lines of one chunk with a single LLM request.
+
+        Args:
+            i (int): Index of the chunk (used for log messages)
+            chunk_lines (list): Lines of the chunk, with line endings
+            emit_segment (function, optional): Called as emit_segment(line_index, line) for
+                each line received early from a streamed response
+            strict_line_count (bool): Fail the chunk when a multi-line response does not
+                have one line per source line, instead of padding or truncating it
+
+        Returns:
+            tuple: (translated lines, whether the chunk failed)
+        """
+        translated_lines_chunk = [] # Use a temporary list for the current chunk's lines
+        failed = False
+        
+        # Translate each line within the chunk
+        if len(chunk_lines) == 1:
+            line = chunk_lines[0]
+            # If the line is empty or contains only whitespace, add it as is
+            if not line.strip():
+                translated_lines_chunk.append(line)
+            else:
+                # Separate leading whitespace, content and the line ending
+                match = re.match(r"(\s*)(.*?)(\r?\n)?$", line, re.DOTALL)
+                leading_space = match.group(1) if match and match.group(1) else ""
+                content_to_translate = match.group(2) if match and match.group(2) else ""
+                line_ending_s = match.group(3) if match and match.group(3) else ""
+
+                if not content_to_translate.strip(): # If there is no content after removing leading whitespace
+                    translated_lines_chunk.append(line)
+                else:
+                    # Extract keywords (excluding those inside quotes) and replace with placeholders
+                    modified_content, keywords = self._extract_keywords_smart(content_to_translate)
                     
-                    translated_lines_chunk = [] # Use a temporary list for the current chunk's lines
+                    # Log the content being sent for translation if there's a callback
+                    if progress_callback:
+                        progress_callback(f"Processing content (chunk {i + 1}): {modified_content[:100]}...")
                     
-                    # Translate each line within the chunk
-                    if len(chunk_lines) == 1:
-                        line = chunk_lines[0]
-                        # If the line is empty or contains only whitespace, add it as is
-                        if not line.strip():
-                            translated_lines_chunk.append(line)
-                        else:
-                            # Separate leading whitespace
-                            match = re.match(r"(\s*)(.*)", line, re.DOTALL)
-                            leading_space = match.group(1) if match else ""
-                            content_to_translate = match.group(2) if match else line
-
-                            if not content_to_translate.strip(): # If there is no content after removing leading whitespace
-                                translated_lines_chunk.append(line)
-                            else:
-                                # Extract keywords (excluding those inside quotes) and replace with placeholders
-                                modified_content, keywords = self._extract_keywords_smart(content_to_translate)
-                                
-                                # Log the content being sent for translation if there's a callback
-                                if progress_callback:
-                                    progress_callback(f"Processing content (chunk {i + 1}): {modified_content[:100]}...")
-                                
-                                # Simplified instruction for single lines
-                                single_line_instruction = f"""You are a professional translator. Translate the following text to {output_language} with these STRICT requirements:
+                    # Glossary terms and similar earlier translations relevant to this line
+                    glossary = self._glossary_section(i, content_to_translate, output_language, progress_callback)
+                    hints = self._prompt_hints([content_to_translate], output_language)
+
+                    # Simplified instruction for single lines
+                    single_line_instruction = f"""You are a professional translator. Translate the following text to {output_language} with these STRICT requirements:
 
 PRESERVATION RULES (NEVER translate these):
-- Keep __KEYWORD_X__ placeholders exactly as they are
+- Keep {self.placeholder_scheme.keyword('X')} placeholders exactly as they are
 - Keep technical identifiers like file_name:0, config_key, etc.
 - Keep symbols : = exactly as they are
 - Keep words like Value, KEY, ID, NAME, TYPE unchanged when they are placeholders
@@ -604,61 +2072,58 @@ TRANSLATION RULES:
 - Maintain natural fluency in {output_language}
 - Keep the same meaning and tone as the original
 
-Text to translate:
+{glossary}{hints}Text to translate:
 {modified_content}
 
 Expected output: Translated text with all technical elements preserved exactly."""
-                                
-                                text_for_llm = single_line_instruction
-                                
-                                try:
-                                    translated_content = self.llm_service.translate(text_for_llm, output_language, selected_model)
-                                    
-                                    # Remove instruction from translated text if it was included
-                                    if "Translate the following text to" in translated_content:
-                                        instruction_end = translated_content.find("Text to translate:")
-                                        if instruction_end > 0:
-                                            translated_content = translated_content[instruction_end + len("Text to translate:"):].strip()
-                                    
-                                    # Restore keywords
-                                    if "Translation error:" in translated_content or "Error:" in translated_content:
-                                        error_message = f"[CHUNK_ERROR:{i+1}] Error translating line: {translated_content}"
-                                        if progress_callback: progress_callback(error_message)
-                                        failed_chunks.append(i+1)
-                                        translated_lines_chunk.append(line)  # Keep original line on error
-                                    else:
-                                        restored_content = self._restore_keywords(translated_content, keywords)
-                                        translated_lines_chunk.append(leading_space + restored_content)
-                                except Exception as e:
-                                    error_message = f"[LINE_ERROR:{i+1}] Exception: {str(e)}"
-                                    if progress_callback: progress_callback(error_message)
-                                    translated_lines_chunk.append(line)  # Keep original line on error
-                    else:
-                        # If there are multiple lines, save leading whitespace, content, and newline characters
-                        original_lines_info = []
-                        for line_in_chunk in chunk_lines:
-                            match = re.match(r"(\s*)(.*?)(\r?\n)?$", line_in_chunk, re.DOTALL)
-                            leading_s = match.group(1) if match and match.group(1) else ""
-                            content_p = match.group(2) if match and match.group(2) else ""
-                            line_e = match.group(3) if match and match.group(3) else ""
-                            original_lines_info.append({'leading': leading_s, 'content': content_p, 'ending': line_e})
-
-                        # When joining with LINE_BREAK_TOKEN, use only the content part (without newlines)
-                        chunk_text_to_translate = self.LINE_BREAK_TOKEN.join(info['content'] for info in original_lines_info)
-                        
-                        # Include metadata about the original text structure
-                        line_count = len(original_lines_info)
-                        
-                        modified_chunk_text, keywords = self._extract_keywords_smart(chunk_text_to_translate)
-                        
-                        # Log the content being sent for translation if there's a callback
-                        if progress_callback:
-                            progress_callback(f"Processing multi-line content (chunk {i + 1}): {modified_chunk_text[:100]}...")
-                        
-                        # Simple but specific instructions
-                        multi_line_instruction = f"""You are a professional translator. Translate the following text to {output_language} with these STRICT requirements:
+                    
+                    text_for_llm = single_line_instruction
+                    
+                    # Request errors are raised to the retry policy in _translate_chunk_with_retries
+                    translated_content = self._request_translation(text_for_llm, output_language, selected_model)
+                    
+                    # Remove instruction from translated text if it was included
+                    if "Translate the following text to" in translated_content:
+                        instruction_end = translated_content.find("Text to translate:")
+                        if instruction_end > 0:
+                            translated_content = translated_content[instruction_end + len("Text to translate:"):].strip()
+                    
+                    # Restore keywords
+                    restored_content = self._restore_keywords(translated_content, keywords).rstrip("\r\n")
+                    translated_lines_chunk.append(leading_space + restored_content + line_ending_s)
+                    self._remember_translations(output_language, [content_to_translate], [restored_content])
+        else:
+            # If there are multiple lines, save leading whitespace, content, and newline characters
+            original_lines_info = []
+            for line_in_chunk in chunk_lines:
+                match = re.match(r"(\s*)(.*?)(\r?\n)?$", line_in_chunk, re.DOTALL)
+                leading_s = match.group(1) if match and match.group(1) else ""
+                content_p = match.group(2) if match and match.group(2) else ""
+                line_e = match.group(3) if match and match.group(3) else ""
+                original_lines_info.append({'leading': leading_s, 'content': content_p, 'ending': line_e})
+
+            # Protect only the content parts; the protected lines are joined with LINE_BREAK_TOKEN
+            contents = [info['content'] for info in original_lines_info]
+            
+            # Include metadata about the original text structure
+            line_count = len(original_lines_info)
+            
+            modified_chunk_text, keywords = self._extract_keywords_smart(contents)
+            
+            # Log the content being sent for translation if there's a callback
+            if progress_callback:
+                progress_callback(f"Processing multi-line content (chunk {i + 1}): {modified_chunk_text[:100]}...")
+            
+            # Glossary terms and similar earlier translations relevant to this chunk
+            glossary = self._glossary_section(i, "\n".join(contents), output_language, progress_callback)
+            hints = self._prompt_hints(contents, output_language)
+
+            # Simple but specific instructions
+            multi_line_instruction = f"""You are a professional translator. Translate the following text to {output_language} with these STRICT requirements:
 
 PRESERVATION RULES (NEVER translate these):
+- Keep {self.placeholder_scheme.keyword('X')} placeholders exactly as they are
+- Keep every {self.LINE_BREAK_TOKEN} line separator, so the text keeps its {line_count} lines
 - Keep technical identifiers like file_name:0, config_key, etc.
 - Keep symbols : = exactly as they are
 - Keep words like Value, KEY, ID, NAME, TYPE unchanged when they are placeholders
@@ -672,136 +2137,81 @@ TRANSLATION RULES:
 - Keep the same meaning and tone as the original
 - Preserve the exact structure and line organization
 
-Text to translate:
+{glossary}{hints}Text to translate:
 {modified_chunk_text}
 
 Expected output: Translated text with all technical elements and structure preserved exactly."""
 
-                        # Replace the previous direct translation with improved instruction
-                        translated_chunk_text = self.llm_service.translate(multi_line_instruction, output_language, selected_model)
-                        
-                        # Check for translation errors
-                        if "Translation error:" in translated_chunk_text or "Error:" in translated_chunk_text:
-                            error_message = f"[CHUNK_ERROR:{i+1}] Error translating chunk: {translated_chunk_text}"
-                            if progress_callback: progress_callback(error_message)
-                            failed_chunks.append(i+1)
-                            translated_lines_chunk.extend(chunk_lines)  # Keep original chunk on error
-                            continue  # Skip to the next chunk
-                        
-                        # Process the translation result
-                        try:
-                            # Remove instruction part from the response
-                            if "Translate the following text to" in translated_chunk_text:
-                                instruction_end = translated_chunk_text.find("Text to translate:")
-                                if instruction_end > 0:
-                                    translated_chunk_text = translated_chunk_text[instruction_end + len("Text to translate:"):].strip()
-                            
-                            # Restore keywords first
-                            restored_chunk_text = self._restore_keywords(translated_chunk_text, keywords)
-                            
-                            # Split by line break tokens more carefully
-                            if self.LINE_BREAK_TOKEN in restored_chunk_text:
-                                translated_segments = restored_chunk_text.split(self.LINE_BREAK_TOKEN)
-                            else:
-                                # Fallback: try to split by actual newlines
-                                translated_segments = restored_chunk_text.split('\n')
-                            
-                            # Process each line with its original formatting
-                            num_original_lines = len(original_lines_info)
-                            
-                            # Ensure we have exactly the right number of segments
-                            while len(translated_segments) < num_original_lines:
-                                translated_segments.append("")
-                            
-                            # If we have too many segments, only take what we need
-                            if len(translated_segments) > num_original_lines:
-                                translated_segments = translated_segments[:num_original_lines]
-                            
-                            # Process each line with its original formatting preserved
-                            for j in range(num_original_lines):
-                                leading_space = original_lines_info[j]['leading']
-                                line_ending = original_lines_info[j]['ending']
-                                
-                                # If original line was empty, keep it empty
-                                if not original_lines_info[j]['content'].strip():
-                                    translated_lines_chunk.append(leading_space + line_ending)
-                                else:
-                                    # Clean the translated segment and preserve original formatting
-                                    translated_content = translated_segments[j].strip() if j < len(translated_segments) else ""
-                                    translated_lines_chunk.append(leading_space + translated_content + line_ending)
-                        
-                        except Exception as e:
-                            error_message = f"[CHUNK_ERROR:{i+1}] Error processing translation result: {str(e)}"
-                            if progress_callback: progress_callback(error_message)
-                            # Keep original in case of error
-                            translated_lines_chunk.extend(chunk_lines)
+            # Emit each line as soon as its LINE_BREAK_TOKEN arrives in the stream
+            def emit_streamed_segment(segment_index, segment_text):
+                if segment_index >= len(original_lines_info):
+                    return
+                info = original_lines_info[segment_index]
+                if info['content'].strip():
+                    segment_text = self._restore_keywords(segment_text, keywords).strip()
+                else:
+                    segment_text = ""
+                emit_segment(segment_index, info['leading'] + segment_text + info['ending'])
 
-                    translated_lines_all.extend(translated_lines_chunk)
-                    
-                    # Update translation results in real-time
-                    if update_callback:
-                        current_translation = "".join(translated_lines_all)
-                        update_callback(current_translation)
+            translated_chunk_text = self._request_translation(
+                multi_line_instruction, output_language, selected_model,
+                on_segment=emit_streamed_segment if emit_segment else None
+            )
+            
+            # Process the translation result
+            try:
+                # Remove instruction part from the response
+                if "Translate the following text to" in translated_chunk_text:
+                    instruction_end = translated_chunk_text.find("Text to translate:")
+                    if instruction_end > 0:
+                        translated_chunk_text = translated_chunk_text[instruction_end + len("Text to translate:"):].strip()
+                
+                # Split by line break tokens, tolerating spaces the model added inside them
+                translated_segments = self.placeholder_scheme.split_lines(translated_chunk_text)
+                if len(translated_segments) == 1:
+                    # Fallback: try to split by actual newlines
+                    translated_segments = translated_chunk_text.split('\n')
 
-                    success = True  # If we get here without exceptions, translation was successful
+                # Restore keywords line by line, so restored text cannot add line breaks
+                translated_segments = [self._restore_keywords(segment, keywords) for segment in translated_segments]
+                
+                # Process each line with its original formatting
+                num_original_lines = len(original_lines_info)
+                if strict_line_count and len(translated_segments) != num_original_lines:
+                    raise ValueError(f"expected {num_original_lines} lines, got {len(translated_segments)}")
+                
+                # Ensure we have exactly the right number of segments
+                while len(translated_segments) < num_original_lines:
+                    translated_segments.append("")
+                
+                # If we have too many segments, only take what we need
+                if len(translated_segments) > num_original_lines:
+                    translated_segments = translated_segments[:num_original_lines]
+                
+                # Process each line with its original formatting preserved
+                for j in range(num_original_lines):
+                    leading_space = original_lines_info[j]['leading']
+                    line_ending = original_lines_info[j]['ending']
                     
-                except Exception as e:
-                    last_error = str(e)
-                    retries += 1
-
-                    # Check for quota exceeded error
-                    if "quota" in last_error.lower() or "rate limit" in last_error.lower():
-                        if retries < MAX_RETRIES:
-                            api_retry_delay = extract_retry_delay_from_error(last_error)
-                            # Use shorter wait times for retranslation to be more responsive
-                            base_wait = get_exponential_backoff(retries, api_retry_delay)
-                            wait_time = min(base_wait * QUOTA_RETRY_MULTIPLIER, 60)  # Cap at 60 seconds max
-                            if progress_callback:
-                                progress_callback(f"API quota exceeded for chunk {i + 1}, waiting {wait_time:.1f}s...")
-                            time.sleep(wait_time)
-                        else:
-                            quota_exceeded = True
-                            failed_chunks.append(i+1)
-                            translated_lines_all.extend(chunk_lines)
-                            break
+                    # If original line was empty, keep it empty
+                    if not original_lines_info[j]['content'].strip():
+                        translated_lines_chunk.append(leading_space + line_ending)
                     else:
-                        # Handle other errors
-                        if retries < MAX_RETRIES:
-                            wait_time = get_exponential_backoff(retries)
-                            if progress_callback:
-                                progress_callback(f"Translation error for chunk {i + 1}, waiting {wait_time:.1f}s before retry...")
-                            time.sleep(wait_time)
-                        else:
-                            if progress_callback:
-                                progress_callback(f"Failed to translate chunk {i + 1} after {MAX_RETRIES} attempts: {str(last_error)}")
-                            failed_chunks.append(i+1)
-                            translated_lines_all.extend(chunk_lines)  # Keep original on final failure
-            
-            # Report progress with quality metrics more frequently
-            if i % 2 == 0 or i == len(chunks) - 1:  # Update every 2 chunks or at the end
-                progress_percent = 10 + ((i + 1) / len(chunks)) * 80  # Fixed base_progress issue
-                if progress_callback:
-                    progress_callback(f"Progress: {progress_percent:.1f}% | Chunk {i + 1}/{len(chunks)}")
-        
-        # Final quality report
-        if progress_callback:
-            progress_callback("Translation completed!")
-        
-        # Report final status with more detail about quota issues
-        if quota_exceeded:
-            if progress_callback:
-                progress_callback(f"Translation partially completed. {len(failed_chunks)} chunks skipped due to API quota limits.")
-                progress_callback("Consider retrying the translation after the API quota resets or reducing chunk size.")
-        elif failed_chunks:
-            if progress_callback:
-                progress_callback(f"Translation completed with {len(failed_chunks)} failed chunks (chunks: {', '.join(map(str, failed_chunks))})")
-        else:
-            if progress_callback: 
-                progress_callback("Translation completed successfully.")
+                        # Clean the translated segment and preserve original formatting
+                        translated_content = translated_segments[j].strip() if j < len(translated_segments) else ""
+                        translated_lines_chunk.append(leading_space + translated_content + line_ending)
+
+                self._remember_translations(output_language, [info['content'] for info in original_lines_info],
+                                            translated_lines_chunk)
             
-        # Combine all translated lines
-        full_translated_text = "".join(translated_lines_all)
-        return full_translated_text
+            except Exception as e:
+                error_message = f"[CHUNK_ERROR:{i+1}] Error processing translation result: {str(e)}"
+                if progress_callback: progress_callback(error_message)
+                failed = True
+                # Keep original in case of error
+                translated_lines_chunk.extend(chunk_lines)
+
+        return translated_lines_chunk, failed
 
     def detect_untranslated_sections(self, translated_text, target_language):
         """
@@ -1087,7 +2497,7 @@ Expected output: Translated text with all technical elements and structure prese
                     return False  # Has substantial translatable quoted content
         
         # Check keywords in the text, but be more precise
-        keywords = re.findall(self.keyword_pattern, text)
+        keywords = re.findall(self.markup_lexer.pattern if self.markup_lexer else self.keyword_pattern, text)
         
         # Calculate what percentage of meaningful content consists of keywords
         meaningful_chars = sum(1 for c in text if c.isalnum() or c in ' \'"')
@@ -1117,9 +2527,14 @@ Expected output: Translated text with all technical elements and structure prese
         return False
     
     def retranslate_untranslated_sections(self, translated_text, untranslated_lines, output_language, 
-                                          selected_model, progress_callback=None):
+                                          selected_model, progress_callback=None, alignment=None):
         """
         Retranslate only the untranslated sections of the text with optimized performance.
+
+        When the text is the unedited result of a job with an AlignmentMap (the one
+        given, else last_alignment), the source lines of the sections are translated
+        again through the chunked pipeline (see retranslate_aligned_lines). Otherwise
+        the translated lines are sent back with some context.
         
         Args:
             translated_text (str): The original translated text
@@ -1128,6 +2543,7 @@ Expected output: Translated text with all technical elements and structure prese
             output_language (str): The target language
             selected_model (str): The model to use for translation
             progress_callback (function): Callback function to report progress
+            alignment (AlignmentMap, optional): Alignment of the text with its source lines
             
         Returns:
             str: The updated translated text with retranslated sections
@@ -1149,6 +2565,17 @@ Expected output: Translated text with all technical elements and structure prese
                 progress_callback("No untranslated sections to process.")
             return translated_text
             
+        self._progress_callback = progress_callback
+
+        alignment = alignment or self.last_alignment
+        if alignment is not None and alignment.output_language in (None, output_language):
+            if alignment.matches(translated_text):
+                return self.retranslate_aligned_lines(alignment, [line_idx for line_idx, _ in actual_untranslated_lines],
+                                                      output_language, selected_model, progress_callback,
+                                                      translated_text)
+            if progress_callback:
+                progress_callback("The text was edited after translation, retranslating from the translated lines")
+
         # Set the selected model
         if selected_model != self.current_model:
             self.current_model = selected_model
@@ -1305,7 +2732,7 @@ TRANSLATION RULES:
 Expected output: {len(chunk)} correctly translated lines with all technical elements preserved."""
                     
                     # Get translation from LLM with enhanced error handling
-                    response = self.llm_service.get_completion(prompt)
+                    response = self._request_completion(prompt)
                     translated_chunk = response.strip()
                     
                     # Clean up the response
@@ -1340,46 +2767,41 @@ Expected output: {len(chunk)} correctly translated lines with all technical elem
                     
                     chunk_success = True
                     
+                except CircuitOpenError as e:
+                    # Provider is down: skip this chunk instead of waiting through retries
+                    if progress_callback:
+                        progress_callback(f"{e}; skipping chunk {i + 1}")
+                    failed_translations += 1
+                    break
+
                 except Exception as translation_error:
-                    error_str = str(translation_error)
                     retries += 1
+                    decision = self.retry_policy.decide(translation_error, retries)
                     
-                    # Check for quota exceeded error
-                    if "quota" in error_str.lower() or "rate limit" in error_str.lower():
-                        if retries < MAX_RETRIES:
-                            api_retry_delay = extract_retry_delay_from_error(error_str)
-                            # Use shorter wait times for retranslation to be more responsive
-                            base_wait = get_exponential_backoff(retries, api_retry_delay)
-                            wait_time = min(base_wait * QUOTA_RETRY_MULTIPLIER, 60)  # Cap at 60 seconds max
-                            if progress_callback:
-                                progress_callback(f"API quota exceeded for chunk {i + 1}, waiting {wait_time:.1f}s...")
-                            time.sleep(wait_time)
-                        else:
-                            quota_exceeded = True
-                            break
+                    if decision.action == RETRY:
+                        if progress_callback:
+                            progress_callback(f"{decision.reason} for chunk {i + 1}, waiting {decision.delay:.1f}s...")
+                        time.sleep(decision.delay)
+                    elif isinstance(translation_error, RateLimited):
+                        quota_exceeded = True
+                        break
                     else:
-                        # Handle other errors
-                        if retries < MAX_RETRIES:
-                            wait_time = get_exponential_backoff(retries)
-                            if progress_callback:
-                                progress_callback(f"Translation error for chunk {i + 1}, waiting {wait_time:.1f}s before retry...")
-                            time.sleep(wait_time)
-                        else:
-                            # Try simpler fallback translation
-                            try:
-                                simple_prompt = f"""Translate to {output_language}. PRESERVE technical identifiers, symbols, and placeholder words like Value, KEY, ID exactly as they are. Only translate actual content: {chunk_text}"""
-                                fallback_response = self.llm_service.get_completion(simple_prompt)
-                                
-                                if fallback_response and len(fallback_response.strip()) > 0:
-                                    line_idx = indices[0]
-                                    leading_space = original_line_formats.get(line_idx, "")
-                                    lines[line_idx] = leading_space + fallback_response.strip()
-                                    successful_translations += 1
-                                    chunk_success = True
-                                else:
-                                    failed_translations += 1
-                            except:
+                        # Give up retrying: try a simpler fallback translation once
+                        try:
+                            simple_prompt = f"""Translate to {output_language}. PRESERVE technical identifiers, symbols, and placeholder words like Value, KEY, ID exactly as they are. Only translate actual content: {chunk_text}"""
+                            fallback_response = self._request_completion(simple_prompt)
+                            
+                            if fallback_response and len(fallback_response.strip()) > 0:
+                                line_idx = indices[0]
+                                leading_space = original_line_formats.get(line_idx, "")
+                                lines[line_idx] = leading_space + fallback_response.strip()
+                                successful_translations += 1
+                                chunk_success = True
+                            else:
                                 failed_translations += 1
+                        except:
+                            failed_translations += 1
+                        break
             
             # Report progress with quality metrics more frequently
             if i % 2 == 0 or i == len(chunks) - 1:  # Update every 2 chunks or at the end
@@ -1403,6 +2825,80 @@ Expected output: {len(chunk)} correctly translated lines with all technical elem
         # Combine the lines back into a single text
         return '\n'.join(lines)
         
+    def retranslate_aligned_lines(self, alignment, line_indexes, output_language, selected_model,
+                                  progress_callback=None, translated_text=None):
+        """
+        Translate the source lines behind lines of a translated text again.
+
+        The source lines, with their protected tokens, go through translate_line_list()
+        like in the first translation: chunked, concurrent, cached and validated
+        by the model cascade when one is set. Lines of an alignment made through a
+        format adapter are sent through that adapter again, so only their segments
+        are translated. New translations that are identical to their source (e.g.
+        from failed chunks) are not used. The alignment is updated in place.
+
+        last_job_metrics keeps the metrics of the job that made the alignment, and no
+        job state is saved for the retranslation.
+
+        Args:
+            alignment (AlignmentMap): Alignment of the translated text with its source lines
+            line_indexes (list): Indexes of lines of the translated text to retranslate
+            output_language (str): The target language
+            selected_model (str): The model to use for translation
+            progress_callback (function, optional): Callback function to report progress
+            translated_text (str, optional): The text the line indexes refer to, if it has
+                the trailing newline of a text widget
+
+        Returns:
+            str: The updated translated text
+        """
+        suffix = alignment.trailing_newline(translated_text) if translated_text is not None else ""
+        layout = alignment.entries_of_text_lines()
+        entries = sorted({index for line_index in line_indexes if 0 <= line_index < len(layout)
+                          for index in layout[line_index] if alignment.source_lines[index].strip()})
+        if not entries:
+            if progress_callback:
+                progress_callback("No source lines to retranslate.")
+            return alignment.text() + suffix
+
+        if progress_callback:
+            progress_callback(f"Retranslating {len(entries)} source line(s) behind {len(line_indexes)} flagged line(s)")
+        source_lines = [alignment.source_lines[index] for index in entries]
+        adapter = get_adapter(alignment.adapter, None, source_lines, self.format_options) if alignment.adapter else None
+
+        job_metrics = self.last_job_metrics
+        state_dir = self.deferred_state_dir
+        self.deferred_state_dir = None
+        try:
+            if adapter is not None:
+                document, segments = adapter.extract(source_lines)
+                sent_lines = segment_lines(segments)
+                translations = self.translate_segments(segments, output_language, selected_model, progress_callback)
+                translated_lines = list(adapter.reinject(document, translations, output_language))
+                received_lines = [translation + "\n" for translation in translations]
+            else:
+                translated_lines = self.translate_line_list(source_lines, output_language, selected_model,
+                                                            progress_callback)
+                sent_lines, received_lines = source_lines, translated_lines
+        finally:
+            self.deferred_state_dir = state_dir
+            self.last_job_metrics = job_metrics
+        if len(translated_lines) != len(source_lines):
+            if progress_callback:
+                progress_callback(f"Format {adapter.name} changed the number of lines, keeping the translation")
+            return alignment.text() + suffix
+
+        updated = 0
+        for index, source, translation in zip(entries, source_lines, translated_lines):
+            if translation.strip() and translation.strip() != source.strip():
+                alignment.update(index, translation)
+                updated += 1
+        if progress_callback:
+            still_rejected = self._rejected_lines(sent_lines, received_lines, output_language)
+            progress_callback(f"Retranslation complete: {updated}/{len(entries)} line(s) updated, "
+                              f"{len(still_rejected)} still fail validation")
+        return alignment.text() + suffix
+
     def analyze_translation_quality(self, translated_text, target_language, original_text=None):
         """
         Comprehensive translation quality analysis with detailed insights.
@@ -15,8 +15,44 @@ def save_api_key(provider, api_key):
     _save_config_to_file(config)
 
 def load_api_key(provider):
+    keys = load_api_keys(provider)
+    return keys[0] if keys else None
+
+def save_api_keys(provider, api_keys):
+    """Save all API keys of a provider. A single key is stored as a plain string, as save_api_key does."""
+    api_keys = list(api_keys)
+    if len(api_keys) == 1:
+        save_api_key(provider, api_keys[0])
+        return
+    config = load_config()
+    if 'api_keys' not in config:
+        config['api_keys'] = {}
+    config['api_keys'][provider] = api_keys
+    _save_config_to_file(config)
+
+def load_api_keys(provider):
+    """Load all API keys of a provider as a list (empty if none is saved)."""
+    config = load_config()
+    value = config.get('api_keys', {}).get(provider)
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+def save_key_rate_limit(provider, requests_per_minute):
+    """Save the requests per minute allowed for each API key of a provider (None removes the limit)."""
     config = load_config()
-    return config.get('api_keys', {}).get(provider)
+    limits = config.setdefault('key_rate_limits', {})
+    if requests_per_minute:
+        limits[provider] = requests_per_minute
+    else:
+        limits.pop(provider, None)
+    _save_config_to_file(config)
+
+def load_key_rate_limit(provider):
+    """Load the requests per minute allowed for each API key of a provider, or None for unlimited."""
+    return load_config().get('key_rate_limits', {}).get(provider) or None
 
 def load_config():
     if os.path.exists(CONFIG_FILE):